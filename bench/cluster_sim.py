@@ -0,0 +1,166 @@
+"""Simulare locală de cluster: N procese worker, un "gateway" fals și baza SQLite comună.
+
+Rulare: python -m bench.cluster_sim [procese] [shard-uri] [evenimente]
+
+Procesul părinte joacă rolul gateway-ului: generează evenimente pentru servere
+aleatoare și le trimite procesului care deține shard-ul serverului. Workerii
+folosesc exact store-urile botului (storage cu STORAGE_BACKEND=sqlite):
+donații în jurnalul comun, configurări per server, tickete. La final verificăm:
+  - id-urile donațiilor sunt unice și nu s-a pierdut nimic;
+  - fiecare proces a convergent la aceleași totaluri / aceleași chei;
+  - serverul principal (buclele "o dată per cluster") e deținut de un singur proces.
+"""
+import asyncio
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HOME_GUILD = 1231671527838056469
+GUILDS = 200
+
+
+def worker(cluster_id, cluster_count, shard_count, directory, inbox, outbox):
+    os.environ.update(
+        CLUSTER_ID=str(cluster_id), CLUSTER_COUNT=str(cluster_count), SHARD_COUNT=str(shard_count),
+        STORAGE_BACKEND="sqlite", SHARED_DB=os.path.join(directory, "cluster.db"), SHARED_POLL_INTERVAL="0.2",
+    )
+    sys.path.insert(0, ROOT)
+    # Căile store-urilor sunt relative; nu vrem să importăm fișierele reale ale botului
+    os.chdir(directory)
+    asyncio.run(run_worker(cluster_id, inbox, outbox))
+
+
+async def run_worker(cluster_id, inbox, outbox):
+    from utils import cluster, storage
+    from utils.rollups import DonationRollups
+    from utils.tickets import TicketRegistry
+
+    storage.FLUSH_DELAY = 0.05
+    journal = storage.open_journal("donatii.jsonl", legacy_path="donatii.json")
+    snapshot = journal.scan()
+    rollups = DonationRollups().rebuild(snapshot)
+    rollups.seq = snapshot.seq
+
+    def apply_remote(record, removed, seq):
+        if seq <= rollups.seq:
+            return
+        rollups.seq = seq
+        if removed:
+            rollups.remove(record)
+        else:
+            rollups.add(record)
+
+    journal.subscribe(apply_remote)
+    config = storage.open_store("invite_config.json", default=dict)
+    tickets = TicketRegistry(storage.open_store("active_tickets.json", default=dict))
+    storage.start_sync()
+
+    handled = 0
+    while True:
+        event = await asyncio.to_thread(inbox.get)
+        if event is None:
+            break
+        kind, guild_id, user_id = event
+        assert cluster.owns_guild(guild_id), f"serverul {guild_id} a ajuns în procesul greșit"
+        if kind == "donate":
+            record = {"id": journal.next_id(), "user_id": str(user_id), "username": f"user{user_id}", "motiv": "test",
+                      "suma": 5, "cod": "x", "timestamp": "2025-06-01 12:00:00"}
+            await journal.append(record)
+            rollups.add(record)
+        elif kind == "config":
+            config.data[str(guild_id)] = user_id
+            config.mark_dirty()
+        elif kind == "ticket":
+            tickets.open(user_id, {"channel_id": guild_id + user_id, "guild_id": guild_id, "opened_at": "2025-06-01 12:00:00"})
+        handled += 1
+
+    for store in (config, tickets.store):
+        await store.flush()
+    outbox.put(("flushed", cluster_id))
+    # Așteptăm ca toți să fi scris, apoi lăsăm polling-ul să aducă ce lipsește
+    await asyncio.to_thread(inbox.get)
+    await asyncio.sleep(1.0)
+    outbox.put(("result", cluster_id, {
+        "handled": handled,
+        "owns_home": cluster.owns_guild(HOME_GUILD),
+        "donations": rollups.count,
+        "total": rollups.total,
+        "config_keys": len(config.data),
+        "tickets": len(tickets),
+        "tickets_indexed": len(tickets.by_channel),
+    }))
+
+
+def main():
+    sys.path.insert(0, ROOT)
+    from utils.cluster import shard_for
+
+    processes = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    shard_count = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    events = int(sys.argv[3]) if len(sys.argv) > 3 else 4000
+    random.seed(3)
+    directory = tempfile.mkdtemp(prefix="cluster-sim-")
+    from utils.cluster import shard_ranges
+    ranges = shard_ranges(shard_count, processes)
+    owner = {shard: cluster_id for cluster_id, shards in enumerate(ranges) for shard in shards}
+
+    context = multiprocessing.get_context("spawn")
+    inboxes = [context.Queue() for _ in range(processes)]
+    outbox = context.Queue()
+    workers = [context.Process(target=worker, args=(i, processes, shard_count, directory, inboxes[i], outbox)) for i in range(processes)]
+    for process in workers:
+        process.start()
+
+    guilds = [HOME_GUILD] + [random.getrandbits(60) << 2 for _ in range(GUILDS - 1)]
+    sent = {"donate": 0, "config": set(), "ticket": set()}
+    start = time.perf_counter()
+    for _ in range(events):
+        guild_id = random.choice(guilds)
+        kind = random.choice(("donate", "donate", "config", "ticket"))
+        user_id = random.randint(1, 5000)
+        if kind == "donate":
+            sent["donate"] += 1
+        elif kind == "config":
+            sent["config"].add(guild_id)
+        else:
+            sent["ticket"].add(user_id)
+        inboxes[owner[shard_for(guild_id, shard_count)]].put((kind, guild_id, user_id))
+    for inbox in inboxes:
+        inbox.put(None)
+    for _ in range(processes):
+        outbox.get()
+    elapsed = time.perf_counter() - start
+    for inbox in inboxes:
+        inbox.put("sync")
+    results = dict(message[1:] for message in (outbox.get() for _ in range(processes)))
+    for process in workers:
+        process.join()
+
+    import sqlite3
+    conn = sqlite3.connect(os.path.join(directory, "cluster.db"))
+    ids = [row[0] for row in conn.execute("SELECT id FROM journal WHERE record IS NOT NULL")]
+
+    print(f"{processes} procese, {shard_count} shard-uri, {GUILDS} servere, {events} evenimente în {elapsed:.2f}s ({events / elapsed:.0f}/s)")
+    print(f"{'proces':<7} {'evenimente':>11} {'server principal':>17} {'donații':>8} {'chei config':>12} {'tickete':>8}")
+    for cluster_id in sorted(results):
+        r = results[cluster_id]
+        print(f"{cluster_id:<7} {r['handled']:>11} {'da' if r['owns_home'] else '-':>17} {r['donations']:>8} {r['config_keys']:>12} {r['tickets']:>8}")
+
+    checks = {
+        "id-uri de donație unice": len(ids) == len(set(ids)) == sent["donate"],
+        "toate procesele au aceleași totaluri": all(r["donations"] == sent["donate"] and r["total"] == sent["donate"] * 500 for r in results.values()),
+        "configurările au convergent": all(r["config_keys"] == len(sent["config"]) for r in results.values()),
+        "ticketele au convergent (și indexul după canal)": all(r["tickets"] == r["tickets_indexed"] == len(sent["ticket"]) for r in results.values()),
+        "serverul principal are un singur proces": sum(r["owns_home"] for r in results.values()) == 1,
+    }
+    for name, ok in checks.items():
+        print(f"{'✅' if ok else '❌'} {name}")
+    sys.exit(0 if all(checks.values()) else 1)
+
+
+if __name__ == "__main__":
+    main()
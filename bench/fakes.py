@@ -0,0 +1,298 @@
+"""Obiecte false, minimale, care imită suprafața discord.py folosită de cog-uri.
+
+Nu se conectează nicăieri; apelurile "REST" au latență și rate limit simulate.
+"""
+import asyncio
+import itertools
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+_ids = itertools.count(10**17)
+
+
+def next_id():
+    return next(_ids)
+
+
+class RateLimiter:
+    """Bucket simplu: `limit` apeluri la fiecare `per` secunde, apoi așteptare (ca un 429)."""
+
+    def __init__(self, limit=5, per=5.0):
+        self.limit = limit
+        self.per = per
+        self.calls = 0
+        self.waited = 0.0
+        self._window_start = time.monotonic()
+        self._used = 0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            self.calls += 1
+            now = time.monotonic()
+            if now - self._window_start >= self.per:
+                self._window_start, self._used = now, 0
+            if self._used >= self.limit:
+                wait = self.per - (now - self._window_start)
+                self.waited += wait
+                await asyncio.sleep(wait)
+                self._window_start, self._used = time.monotonic(), 0
+            self._used += 1
+
+
+class FakeUser:
+    def __init__(self, user_id=None, name="user", bot=False):
+        self.id = user_id or next_id()
+        self.name = name
+        self.bot = bot
+        self.sent = []
+
+    @property
+    def mention(self):
+        return f"<@{self.id}>"
+
+    def __str__(self):
+        return self.name
+
+    async def send(self, content=None, **kwargs):
+        self.sent.append(content)
+
+
+class FakeMessage:
+    def __init__(self, channel, content=None, author=None, **kwargs):
+        self.id = next_id()
+        self.channel = channel
+        self.guild = channel.guild
+        self.author = author or channel.guild.me
+        self.content = content or ""
+        self.created_at = datetime.now(timezone.utc)
+        self.attachments = []
+        self.embeds = [kwargs["embed"]] if kwargs.get("embed") else []
+        self.reactions = []
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+
+    async def add_reaction(self, emoji):
+        await self.guild.rest()
+        self.reactions.append(emoji)
+
+    async def reply(self, content=None, **kwargs):
+        return await self.channel.send(content, **kwargs)
+
+
+class FakeRole:
+    def __init__(self, role_id=None, name="role"):
+        self.id = role_id or next_id()
+        self.name = name
+
+    @property
+    def mention(self):
+        return f"<@&{self.id}>"
+
+
+class FakeMember(FakeUser):
+    def __init__(self, guild, user_id=None, name="member", roles=(), administrator=False):
+        super().__init__(user_id, name)
+        self.guild = guild
+        self.roles = list(roles)
+        self.guild_permissions = SimpleNamespace(administrator=administrator)
+
+    async def add_roles(self, *roles, **kwargs):
+        await self.guild.rest()
+        self.roles.extend(roles)
+
+
+class FakeChannel:
+    def __init__(self, guild, channel_id=None, name="channel", category=None):
+        self.id = channel_id or next_id()
+        self.guild = guild
+        self.name = name
+        self.category = category
+        self.sent = []
+        self.messages = []
+        self.last_message_id = None
+
+    @property
+    def mention(self):
+        return f"<#{self.id}>"
+
+    async def send(self, content=None, **kwargs):
+        await self.guild.rest()
+        self.sent.append(content if content is not None else kwargs)
+        return FakeMessage(self, content, **kwargs)
+
+    def add_message(self, content, author):
+        """Mesaj în istoric fără apel REST (date pregătite pentru benchmark)."""
+        message = FakeMessage(self, content, author)
+        self.messages.append(message)
+        self.last_message_id = message.id
+        return message
+
+    async def history(self, limit=None, oldest_first=False):
+        # Discord întoarce istoricul în pagini de 100 de mesaje, câte un apel REST per pagină
+        messages = self.messages if oldest_first else self.messages[::-1]
+        for start in range(0, len(messages) if limit is None else min(limit, len(messages)), 100):
+            await self.guild.rest()
+            for message in messages[start:start + 100]:
+                yield message
+
+    async def edit(self, **kwargs):
+        await self.guild.rest(route="edit_channel")
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+
+    async def delete(self, **kwargs):
+        await self.guild.rest()
+        self.guild.channels.pop(self.id, None)
+
+
+class FakeInvite:
+    def __init__(self, guild, code, uses=0, inviter=None):
+        self.guild = guild
+        self.code = code
+        self.uses = uses
+        self.inviter = inviter
+
+    def snapshot(self):
+        return FakeInvite(self.guild, self.code, self.uses, self.inviter)
+
+
+class FakeGuild:
+    def __init__(self, guild_id=None, latency=0.05, invites_rate_limiter=None, owner_id=None, route_latency=None):
+        self.id = guild_id or next_id()
+        self.latency = latency
+        # Latențe diferite pe rute, ex. {"create_channel": 0.6}; restul folosesc `latency`
+        self.route_latency = route_latency or {}
+        # Fiecare rută are bucket-ul ei; simulăm limita doar pe GET /invites
+        self.invites_rate_limiter = invites_rate_limiter
+        self.owner_id = owner_id
+        self.filesize_limit = 25 * 1024 * 1024
+        self.icon = SimpleNamespace(url="https://cdn.example/icon.png")
+        self.banner = None
+        self.default_role = FakeRole(self.id, name="@everyone")
+        self.roles = [self.default_role]
+        self.channels = {}
+        self.members = {}
+        self.live_invites = []
+        self.rest_calls = 0
+        self.invite_fetches = 0
+        self.me = FakeMember(self, name="bot")
+
+    async def rest(self, rate_limiter=None, route=None):
+        self.rest_calls += 1
+        if rate_limiter is not None:
+            await rate_limiter.acquire()
+        latency = self.route_latency.get(route, self.latency)
+        if latency:
+            await asyncio.sleep(latency() if callable(latency) else latency)
+
+    @property
+    def text_channels(self):
+        return list(self.channels.values())
+
+    def add_channel(self, name="channel"):
+        channel = FakeChannel(self, name=name)
+        self.channels[channel.id] = channel
+        return channel
+
+    async def create_text_channel(self, name, category=None, overwrites=None, topic=None, **kwargs):
+        await self.rest(route="create_channel")
+        channel = self.add_channel(name)
+        channel.category, channel.overwrites, channel.topic = category, overwrites, topic
+        return channel
+
+    def add_member(self, **kwargs):
+        member = FakeMember(self, **kwargs)
+        self.members[member.id] = member
+        return member
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+    def get_member(self, user_id):
+        return self.members.get(user_id)
+
+    def get_role(self, role_id):
+        return next((role for role in self.roles if role.id == role_id), None)
+
+    async def invites(self):
+        self.invite_fetches += 1
+        await self.rest(self.invites_rate_limiter)
+        return [invite.snapshot() for invite in self.live_invites]
+
+
+class FakeBot:
+    def __init__(self, guilds=()):
+        self.guilds = list(guilds)
+        self.user = FakeUser(name="bot", bot=True)
+
+        self.views = []
+        self.dispatched = []
+
+    def get_guild(self, guild_id):
+        return next((guild for guild in self.guilds if guild.id == guild_id), None)
+
+    async def wait_until_ready(self):
+        return None
+
+    def add_view(self, view, **kwargs):
+        self.views.append(view)
+
+    def dispatch(self, event, *args):
+        self.dispatched.append((event, args))
+
+
+class FakeResponse:
+    """`interaction.response`: reține momentul primului răspuns, ca latența să fie cea văzută de utilizator."""
+
+    def __init__(self, interaction):
+        self.interaction = interaction
+        self.responded_at = None
+        self.sent = []
+
+    def is_done(self):
+        return self.responded_at is not None
+
+    def _respond(self, kind, content=None, **kwargs):
+        if self.responded_at is not None:
+            raise RuntimeError("interaction already responded")
+        self.responded_at = time.perf_counter()
+        self.sent.append((kind, content, kwargs))
+
+    async def send_message(self, content=None, **kwargs):
+        await self.interaction.guild.rest()
+        self._respond("message", content, **kwargs)
+
+    async def defer(self, **kwargs):
+        await self.interaction.guild.rest()
+        self._respond("defer", **kwargs)
+
+    async def edit_message(self, **kwargs):
+        await self.interaction.guild.rest()
+        self._respond("edit", **kwargs)
+
+    async def send_modal(self, modal):
+        await self.interaction.guild.rest()
+        self._respond("modal", modal=modal)
+
+
+class FakeFollowup:
+    def __init__(self, interaction):
+        self.interaction = interaction
+        self.sent = []
+
+    async def send(self, content=None, **kwargs):
+        await self.interaction.guild.rest()
+        self.sent.append((content, kwargs))
+
+
+class FakeInteraction:
+    def __init__(self, client, guild, user, channel=None):
+        self.client = client
+        self.guild = guild
+        self.guild_id = guild.id
+        self.user = user
+        self.channel = channel
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
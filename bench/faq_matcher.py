@@ -0,0 +1,76 @@
+"""Debitul potrivirii automate FAQ (mesaje/secundă) în funcție de numărul de FAQ-uri.
+
+Rulare: python -m bench.faq_matcher
+"""
+import random
+import string
+import time
+
+from utils.faq_index import KeywordMatcher, tokenize
+
+MESSAGES = 20000
+SIZES = (100, 1000, 10000, 50000)
+
+
+def random_word(rng):
+    return "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10)))
+
+
+def make_entries(rng, vocabulary, count):
+    return [
+        {"id": i, "question": "", "answer": "", "keywords": rng.sample(vocabulary, rng.randint(1, 4))}
+        for i in range(1, count + 1)
+    ]
+
+
+def make_messages(rng, chat_words, keywords, count):
+    # Mesaje de chat obișnuite, cu 0-2 cuvinte cheie strecurate
+    messages = []
+    for _ in range(count):
+        words = rng.choices(chat_words, k=rng.randint(5, 40))
+        for _ in range(rng.randint(0, 2)):
+            words.insert(rng.randrange(len(words) + 1), rng.choice(keywords))
+        messages.append(" ".join(words))
+    return messages
+
+
+def naive_best_match(entries, text):
+    # Varianta fără automat: fiecare cuvânt cheie al fiecărui FAQ verificat pe rând
+    words = set(tokenize(text))
+    best = None
+    for entry in entries:
+        score = sum(len(keyword) for keyword in entry["keywords"] if keyword in words)
+        if score and (best is None or score > best[0]):
+            best = (score, entry["id"])
+    return best and best[1]
+
+
+def measure(function, messages):
+    start = time.perf_counter()
+    for message in messages:
+        function(message)
+    return len(messages) / (time.perf_counter() - start)
+
+
+def main():
+    rng = random.Random(42)
+    words = list({random_word(rng) for _ in range(80000)})
+    vocabulary, chat_words = words[:60000], words[60000:]
+
+    print(f"{'FAQ-uri':>8} {'build ms':>9} {'Aho-Corasick msg/s':>19} {'scanare naivă msg/s':>20}")
+    for size in SIZES:
+        entries = make_entries(rng, vocabulary, size)
+        keywords = [keyword for entry in entries for keyword in entry["keywords"]]
+        messages = make_messages(rng, chat_words, keywords, MESSAGES)
+        start = time.perf_counter()
+        matcher = KeywordMatcher(entries)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        automaton_rate = measure(matcher.best_match, messages)
+        sample = messages[:max(50, MESSAGES * 100 // size)]
+        naive_rate = measure(lambda text: naive_best_match(entries, text), sample)
+        print(f"{size:>8} {build_ms:>9.1f} {automaton_rate:>19,.0f} {naive_rate:>20,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""Memoria și costul de pornire pentru modul gateway "full" vs. "lean" pe un server sintetic mare.
+
+Rulare: python -m bench.gateway_cache [număr_membri] [număr_mesaje]
+
+Fiecare mod rulează într-un proces separat. Payload-urile (GUILD_CREATE, chunk-uri de
+membri cu prezențe, MESSAGE_CREATE) sunt generate local și trecute prin parserul
+discord.py, deci măsurăm cache-ul real al bibliotecii, fără rețea. "Payload MB" e
+cât JSON ar fi primit botul de la gateway până la ready (fără mesaje).
+"""
+import asyncio
+import gc
+import json
+import os
+import subprocess
+import sys
+import time
+
+os.environ.setdefault("GUILD_ID", "0")
+os.environ.setdefault("NOTIFY_ROLE_ID", "0")
+
+import discord
+from discord.member import Member
+from discord.presences import RawPresenceUpdateEvent
+
+from utils.gateway import client_options
+
+EXTENSIONS = ["cogs.vps", "cogs.faq", "cogs.verify", "cogs.ticket", "cogs.preturi", "cogs.invite", "cogs.donat"]
+GUILD_ID = 10**17
+BOT_ID = 10**17 + 1
+CHUNK_SIZE = 1000
+ROLES = 40
+CHANNELS = 60
+ONLINE_RATIO = 0.15
+# Discord trimite în GUILD_CREATE membrii online doar sub large_threshold
+LARGE_THRESHOLD = 250
+
+
+def rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def user_payload(i):
+    return {"id": str(GUILD_ID + 1000 + i), "username": f"user{i}", "discriminator": "0", "global_name": f"User {i}", "avatar": None, "bot": False}
+
+
+def member_payload(i):
+    return {
+        "user": user_payload(i),
+        "roles": [str(GUILD_ID + 10 + (i + k) % ROLES) for k in range(i % 4)],
+        "joined_at": "2024-01-01T00:00:00+00:00",
+        "nick": None, "deaf": False, "mute": False, "flags": 0,
+    }
+
+
+def presence_payload(i):
+    return {
+        "user": {"id": str(GUILD_ID + 1000 + i)},
+        "status": "online",
+        "activities": [{"name": "Minecraft", "type": 0, "created_at": 0}],
+        "client_status": {"desktop": "online"},
+    }
+
+
+def is_online(i):
+    return i % int(1 / ONLINE_RATIO) == 0
+
+
+def guild_payload(members, full):
+    bot_member = {"user": {"id": str(BOT_ID), "username": "bot", "discriminator": "0", "avatar": None, "bot": True},
+                  "roles": [], "joined_at": "2024-01-01T00:00:00+00:00", "deaf": False, "mute": False, "flags": 0}
+    online = [i for i in range(members) if is_online(i)][:LARGE_THRESHOLD] if full else []
+    return {
+        "id": str(GUILD_ID), "name": "Sintetic", "owner_id": str(BOT_ID), "member_count": members, "large": True,
+        "roles": [{"id": str(GUILD_ID + 10 + r), "name": f"rol{r}", "permissions": "0", "position": r, "color": 0,
+                   "hoist": False, "managed": False, "mentionable": False} for r in range(ROLES)] +
+                 [{"id": str(GUILD_ID), "name": "@everyone", "permissions": "0", "position": 0, "color": 0,
+                   "hoist": False, "managed": False, "mentionable": False}],
+        "channels": [{"id": str(GUILD_ID + 100 + c), "type": 0, "name": f"canal{c}", "position": c,
+                      "permission_overwrites": []} for c in range(CHANNELS)],
+        "members": [bot_member] + [member_payload(i) for i in online],
+        "presences": [presence_payload(i) for i in online],
+        "emojis": [], "stickers": [], "features": [], "threads": [], "stage_instances": [],
+        "guild_scheduled_events": [], "voice_states": [],
+    }
+
+
+def message_payload(i, members):
+    author = i * 7919 % members
+    return {
+        "id": str(GUILD_ID + 10**6 + i), "channel_id": str(GUILD_ID + 100 + i % CHANNELS), "guild_id": str(GUILD_ID),
+        "author": user_payload(author), "member": {k: v for k, v in member_payload(author).items() if k != "user"},
+        "content": f"mesajul {i} " + "text " * 20, "timestamp": "2024-01-01T00:00:00+00:00", "edited_timestamp": None,
+        "tts": False, "mention_everyone": False, "mentions": [], "mention_roles": [], "attachments": [], "embeds": [],
+        "pinned": False, "type": 0,
+    }
+
+
+def apply_chunk(state, guild, chunk, presences):
+    # Ce face discord.py cu un GUILD_MEMBERS_CHUNK cerut cu cache=True
+    members = [Member(guild=guild, data=data, state=state) for data in chunk]
+    by_id = {str(member.id): member for member in members}
+    for presence in presences:
+        member = by_id.get(presence["user"]["id"])
+        if member is not None:
+            member._presence_update(RawPresenceUpdateEvent(data=presence, state=state), presence["user"])
+    for member in members:
+        guild._add_member(member)
+
+
+async def measure(mode, members, messages):
+    options = client_options(mode, EXTENSIONS)
+    client = discord.Client(**options)
+    state = client._connection
+    gc.collect()
+    baseline = rss_mb()
+    start = time.perf_counter()
+
+    data = guild_payload(members, full=state._chunk_guilds)
+    payload_bytes = len(json.dumps(data))
+    guild = state._add_guild_from_data(data)
+    if state._chunk_guilds:
+        # Cu chunking la pornire, ready abia după ce au venit toți membrii
+        for offset in range(0, members, CHUNK_SIZE):
+            chunk = [member_payload(i) for i in range(offset, min(offset + CHUNK_SIZE, members))]
+            presences = [presence_payload(i) for i in range(offset, offset + len(chunk)) if is_online(i)] if state._intents.presences else []
+            payload_bytes += len(json.dumps({"members": chunk, "presences": presences}))
+            apply_chunk(state, guild, chunk, presences)
+    ready = time.perf_counter() - start
+
+    for i in range(messages):
+        state.parse_message_create(message_payload(i, members))
+    gc.collect()
+
+    return {
+        "mode": mode,
+        "intents": sum(1 for _, enabled in state._intents if enabled),
+        "members_cached": len(guild._members),
+        "messages_cached": len(state._messages or ()),
+        "payload_mb": payload_bytes / 1e6,
+        "ready_s": ready,
+        "rss_mb": rss_mb() - baseline,
+        "chunk_requests": -(-members // CHUNK_SIZE) if state._chunk_guilds else 0,
+    }
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        mode, members, messages = sys.argv[2], int(sys.argv[3]), int(sys.argv[4])
+        print(json.dumps(asyncio.run(measure(mode, members, messages))))
+        return
+
+    members = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    messages = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    print(f"Server sintetic: {members} membri ({ONLINE_RATIO:.0%} online), {messages} mesaje, {CHANNELS} canale")
+    print(f"{'mod':<6} {'intents':>8} {'membri':>8} {'mesaje':>7} {'chunk-uri':>10} {'payload MB':>11} {'ready s':>8} {'RSS MB':>8}")
+    for mode in ("full", "lean"):
+        output = subprocess.run(
+            [sys.executable, "-m", "bench.gateway_cache", "--child", mode, str(members), str(messages)],
+            capture_output=True, text=True, check=True
+        ).stdout
+        r = json.loads(output.strip().splitlines()[-1])
+        print(f"{r['mode']:<6} {r['intents']:>8} {r['members_cached']:>8} {r['messages_cached']:>7} {r['chunk_requests']:>10} "
+              f"{r['payload_mb']:>11.2f} {r['ready_s']:>8.2f} {r['rss_mb']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
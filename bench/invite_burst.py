@@ -0,0 +1,118 @@
+"""Val de intrări (raid) pe un server fals: un apel invites() per intrare vs. loturi.
+
+Rulare: python -m bench.invite_burst [număr_intrări]
+
+"exact" = membrul a primit codul real; "pe cod" = numărul de intrări atribuite
+fiecărei invitații e corect. Într-un lot, numerele de folosiri nu spun care
+membru a folosit care cod, deci doar "pe cod" e garantat.
+"""
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+
+os.environ.setdefault("GUILD_ID", "0")
+os.environ.setdefault("NOTIFY_ROLE_ID", "0")
+
+from bench.fakes import FakeBot, FakeGuild, FakeInvite, FakeUser, RateLimiter
+import cogs.invite as invite_cog
+
+INVITES = 20
+JOIN_SPREAD = 1.0
+
+
+def make_guild():
+    # Discord limitează GET /invites; simulăm 5 apeluri / 5 secunde și 80 ms latență
+    guild = FakeGuild(latency=0.08, invites_rate_limiter=RateLimiter(limit=5, per=5.0))
+    guild.live_invites = [FakeInvite(guild, f"code{i}", uses=random.randint(0, 50), inviter=FakeUser()) for i in range(INVITES)]
+    return guild
+
+
+async def legacy_join(cache, guild, member, log_channel):
+    # Algoritmul de dinainte: fetch la fiecare intrare, cache partajat fără sincronizare
+    before = cache.get(guild.id, [])
+    after = await guild.invites()
+    cache[guild.id] = after
+    used = None
+    for invite in after:
+        for old in before:
+            if invite.code == old.code and invite.uses > old.uses:
+                used = invite
+                break
+    await log_channel.send(f"📥 {member.mention} `{used.code}`" if used else f"📥 {member.mention} -")
+
+
+async def storm(guild, joins, on_join):
+    truth = {}
+    tasks = []
+    for _ in range(joins):
+        await asyncio.sleep(random.uniform(0, 2 * JOIN_SPREAD / joins))
+        invite = random.choice(guild.live_invites)
+        invite.uses += 1
+        member = guild.add_member()
+        truth[member.mention] = invite.code
+        tasks.append(asyncio.create_task(on_join(member)))
+    await asyncio.gather(*tasks)
+    return truth
+
+
+def accuracy(truth, sent):
+    attributed = {}
+    for message in sent:
+        for line in message.splitlines():
+            mention = line.split()[1]
+            attributed[mention] = line.split("`")[1] if "`" in line else None
+    exact = sum(1 for mention, code in truth.items() if attributed.get(mention) == code) / len(truth)
+    expected, got = Counter(truth.values()), Counter(code for code in attributed.values() if code)
+    per_code = sum((expected & got).values()) / len(truth)
+    return exact, per_code
+
+
+async def run_legacy(joins):
+    guild = make_guild()
+    log_channel = guild.add_channel("invite-log")
+    cache = {guild.id: await guild.invites()}
+    start = time.perf_counter()
+    truth = await storm(guild, joins, lambda member: legacy_join(cache, guild, member, log_channel))
+    elapsed = time.perf_counter() - start
+    return elapsed, guild.invite_fetches - 1, accuracy(truth, log_channel.sent), len(log_channel.sent)
+
+
+async def run_coalesced(joins):
+    # Nu atingem fișierele reale ale botului
+    scratch = tempfile.mkdtemp()
+    invite_cog.invite_config_store.path = os.path.join(scratch, "invite_config.json")
+    invite_cog.invite_stats.counters.path = os.path.join(scratch, "invite_stats.json")
+    invite_cog.invite_stats.members.path = os.path.join(scratch, "invite_members.jsonl")
+    guild = make_guild()
+    log_channel = guild.add_channel("invite-log")
+    invite_cog.invite_config_store.data[str(guild.id)] = log_channel.id
+    tracker = invite_cog.InviteTracker(FakeBot([guild]))
+    await tracker.refresh_all()
+    fetches_before = guild.invite_fetches
+    start = time.perf_counter()
+    truth = await storm(guild, joins, tracker.on_member_join)
+    while tracker.pending_joins:
+        await asyncio.sleep(0.01)
+    await asyncio.sleep(0.2)
+    elapsed = time.perf_counter() - start
+    tracker.cog_unload()
+    fetches = guild.invite_fetches - fetches_before
+    return elapsed, fetches, accuracy(truth, log_channel.sent), len(log_channel.sent)
+
+
+def main():
+    joins = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    random.seed(7)
+    print(f"{joins} intrări în ~{JOIN_SPREAD:.0f}s, {INVITES} invitații, GET /invites limitat la 5/5s")
+    print(f"{'mod':<12} {'durată s':>9} {'fetch-uri':>10} {'intrări/s':>10} {'exact':>7} {'pe cod':>7} {'mesaje':>7}")
+    for name, runner in (("per intrare", run_legacy), ("loturi", run_coalesced)):
+        elapsed, fetches, (exact, per_code), messages = asyncio.run(runner(joins))
+        print(f"{name:<12} {elapsed:>9.2f} {fetches:>10} {joins / elapsed:>10.1f} {exact:>7.0%} {per_code:>7.0%} {messages:>7}")
+
+
+if __name__ == "__main__":
+    main()
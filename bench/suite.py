@@ -0,0 +1,445 @@
+"""Benchmark offline pentru toate cog-urile: handler-ele reale, obiecte discord false, date generate.
+
+Rulare:
+  python -m bench.suite                                   # dimensiunile 1000,10000,100000
+  python -m bench.suite --sizes 1000000 --out raport.json
+  python -m bench.suite --baseline bench/baseline.json    # cod de ieșire 1 la regresii
+  python -m bench.suite --baseline bench/baseline.json --update-baseline
+
+Fiecare dimensiune N rulează într-un proces separat, într-un director temporar.
+Store-urile se deschid la importul cog-urilor, deci datele sunt scrise pe disc înainte:
+N donații, N VPS-uri, N membri invitați, N/10 FAQ-uri și tickete deschise.
+REST-ul fals nu are latență, deci măsurăm doar codul botului. Debounce-ul store-urilor
+e amânat cât durează măsurătorile; scrierea finală apare separat ca "flush_all".
+
+Raportul JSON (stdout sau --out) are, per dimensiune și per comandă: percentilele
+latenței (ms), throughput (op/s) și vârful de memorie alocată într-un apel (KB,
+tracemalloc). Tabelul pentru oameni merge pe stderr.
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GUILD_ID = 10**18
+NOTIFY_ROLE_ID = 10**18 + 1
+USER_BASE = 10**16
+DEFAULT_SIZES = "1000,10000,100000"
+DEFAULT_ITERATIONS = 200
+# Transcriptul unui ticket închis în benchmark
+TICKET_HISTORY = 300
+# Metricile verificate față de baseline (p99 e raportat, dar e prea zgomotos pentru un prag)
+# și diferențele absolute sub care o creștere e considerată zgomot
+REGRESSION_FLOORS = {"p50_ms": 0.1, "p90_ms": 0.5, "peak_kb": 64}
+
+SYLLABLES = ["ba", "ce", "di", "fo", "gu", "la", "me", "ni", "po", "ru", "sa", "te", "vi", "zo", "cra", "pli"]
+VOCABULARY = [a + b + c for a in SYLLABLES for b in SYLLABLES for c in SYLLABLES[:8]]
+
+
+def percentile(sorted_values, p):
+    return sorted_values[min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))]
+
+
+# --- date ---
+
+def seed(size, world, rng):
+    users = max(10, size // 10)
+    guild = str(GUILD_ID)
+
+    with open("donatii.jsonl", "w", encoding="utf-8") as f:
+        start = date(2025, 1, 1)
+        for i in range(1, size + 1):
+            user = USER_BASE + rng.randrange(users)
+            day = start + timedelta(days=rng.randrange(365))
+            f.write(json.dumps({
+                "id": i, "user_id": str(user), "username": f"user{user}", "motiv": "hosting",
+                "suma": rng.choice((5, 10, 20, 50)), "cod": f"PSF{i:08d}", "timestamp": f"{day} 12:00:00"
+            }) + "\n")
+
+    today = date.today()
+    servers = {
+        str(n): {
+            "user_id": str(USER_BASE + rng.randrange(users)),
+            "expiration": str(today + timedelta(days=rng.randrange(1, 730))),
+            "added_by": "1", "vps_number": n, "ip": f"10.{n >> 16 & 255}.{n >> 8 & 255}.{n & 255}", "notified": [],
+        }
+        for n in range(1, size + 1)
+    }
+    with open("vps_data.json", "w", encoding="utf-8") as f:
+        json.dump({"next_number": size + 1, "servers": servers}, f)
+
+    faqs = [
+        {
+            "id": i,
+            "question": " ".join(rng.choice(VOCABULARY) for _ in range(6)) + "?",
+            "answer": " ".join(rng.choice(VOCABULARY) for _ in range(20)),
+            "keywords": rng.sample(VOCABULARY, 3),
+        }
+        for i in range(1, max(10, size // 10) + 1)
+    ]
+    with open("faq_data.json", "w", encoding="utf-8") as f:
+        json.dump(faqs, f, ensure_ascii=False)
+    with open("faq_config.json", "w", encoding="utf-8") as f:
+        json.dump({guild: [world.support.id]}, f)
+
+    with open("active_tickets.json", "w", encoding="utf-8") as f:
+        json.dump({
+            str(USER_BASE + users + i): {"channel_id": 10**15 + i, "guild_id": GUILD_ID, "opened_at": "2025-01-01 12:00:00"}
+            for i in range(max(10, size // 10))
+        }, f)
+    with open("tickets_config.json", "w", encoding="utf-8") as f:
+        json.dump({guild: {
+            "category_id": world.category.id, "log_channel_id": world.log.id, "staff_role_id": world.staff_role.id,
+            "pool_size": 0, "pool": [], "transcript_html": False, "idle_hours": 0,
+        }}, f)
+
+    with open("verify_config.json", "w", encoding="utf-8") as f:
+        json.dump({guild: {"channel_id": world.verify.id, "role_id": world.member_role.id, "message_id": world.verify_message_id}}, f)
+
+    inviters = max(10, size // 100)
+    counters = {}
+    with open("invite_members.jsonl", "w", encoding="utf-8") as f:
+        for i in range(size):
+            inviter = str(USER_BASE + rng.randrange(inviters))
+            f.write(json.dumps([f"{guild}:{USER_BASE + i}", inviter]) + "\n")
+            counters.setdefault(inviter, [0, 0])[0] += 1
+    with open("invite_stats.json", "w", encoding="utf-8") as f:
+        json.dump({guild: counters}, f)
+    with open("invite_config.json", "w", encoding="utf-8") as f:
+        json.dump({guild: world.log.id}, f)
+
+
+def build_world():
+    from bench.fakes import FakeBot, FakeGuild, FakeInvite, FakeRole, FakeUser
+
+    guild = FakeGuild(GUILD_ID, latency=0, owner_id=None)
+    world = SimpleNamespace(guild=guild, bot=FakeBot([guild]))
+    world.notify_role = FakeRole(NOTIFY_ROLE_ID, name="notify")
+    world.staff_role = FakeRole(name="staff")
+    world.member_role = FakeRole(name="member")
+    guild.roles += [world.notify_role, world.staff_role, world.member_role]
+    world.owner = guild.add_member(name="owner", administrator=True)
+    guild.owner_id = world.owner.id
+    world.admin = guild.add_member(name="admin", roles=[world.notify_role, world.staff_role], administrator=True)
+    world.category = guild.add_channel("Tickete")
+    world.log = guild.add_channel("log")
+    world.support = guild.add_channel("suport")
+    world.verify = guild.add_channel("verificare")
+    world.verify_message_id = 10**18 + 2
+    guild.live_invites = [FakeInvite(guild, f"code{i}", uses=0, inviter=FakeUser(USER_BASE + i)) for i in range(20)]
+    return world
+
+
+# --- scenarii ---
+
+class Suite:
+    def __init__(self, world, size, rng):
+        from bench.fakes import FakeInteraction
+        import cogs.donat as donat
+        import cogs.faq as faq
+        import cogs.invite as invite
+        import cogs.ticket as ticket
+        import cogs.verify as verify
+        import cogs.vps as vps
+
+        self.world = world
+        self.size = size
+        self.rng = rng
+        self.FakeInteraction = FakeInteraction
+        self.modules = SimpleNamespace(donat=donat, faq=faq, invite=invite, ticket=ticket, verify=verify, vps=vps)
+        bot = world.bot
+        self.donate = donat.Donate(bot)
+        self.faq = faq.FAQCog(bot)
+        self.vps = vps.VPSCog(bot)
+        self.ticket = ticket.TicketCog(bot)
+        self.verify = verify.VerifyCog(bot)
+        self.invite = invite.InviteTracker(bot)
+        # Buclele periodice nu fac parte din măsurători
+        self.invite.update_invites.cancel()
+        self.ticket_view = ticket.CreateTicketView()
+        self.opened_channels = []
+        self.users = max(10, size // 10)
+        self.faq_count = len(faq.faq_store.data)
+
+    async def start(self):
+        await self.verify.cog_load()
+
+    def interaction(self, user=None, channel=None):
+        return self.FakeInteraction(self.world.bot, self.world.guild, user or self.world.guild.add_member(), channel)
+
+    def owner_of(self):
+        from bench.fakes import FakeUser
+        return FakeUser(USER_BASE + self.rng.randrange(self.users))
+
+    def inviter(self):
+        from bench.fakes import FakeUser
+        return FakeUser(USER_BASE + self.rng.randrange(max(10, self.size // 100)))
+
+    def scenarios(self, iterations):
+        """(nume, rulări, corutină(i)); ordinea contează: ștergerile vin după adăugări."""
+        w, m, rng = self.world, self.modules, self.rng
+        heavy = max(3, iterations // 20)
+        d, f, v, t, vf, iv = self.donate, self.faq, self.vps, self.ticket, self.verify, self.invite
+
+        async def ticket_create(i):
+            it = self.interaction()
+            await self.ticket_view.create.callback(it)
+            self.opened_channels.append(m.ticket.tickets.get_by_user(it.user.id)["channel_id"])
+
+        async def ticket_close(i):
+            channel = w.guild.get_channel(self.opened_channels[i])
+            author = w.guild.add_member()
+            for n in range(TICKET_HISTORY):
+                channel.add_message(f"mesajul {n} " + " ".join(rng.sample(VOCABULARY, 8)), author)
+            await t.closeticket.callback(t, self.interaction(w.admin, channel))
+
+        async def ticket_message(i):
+            channel = w.guild.get_channel(self.opened_channels[-1])
+            await t.on_message(channel.add_message("salut", w.guild.add_member()))
+
+        async def faq_suggestion(i):
+            f.last_suggestion.clear()
+            message = w.support.add_message(" ".join(rng.sample(VOCABULARY, 12)), w.guild.add_member())
+            await f.on_message(message)
+
+        async def verify_reaction(i):
+            member = w.guild.add_member()
+            payload = SimpleNamespace(message_id=w.verify_message_id, guild_id=w.guild.id, emoji="✅", member=member)
+            await vf.on_raw_reaction_add(payload)
+            await vf.queue.join()
+
+        async def member_join(i):
+            member = w.guild.add_member()
+            rng.choice(w.guild.live_invites).uses += 1
+            logged = len(w.log.sent)
+            await iv.on_member_join(member)
+            # Lotul se procesează într-un task separat; așteptăm mesajul din canalul de log
+            while len(w.log.sent) == logged:
+                await asyncio.sleep(0)
+
+        async def member_remove(i):
+            await iv.on_raw_member_remove(SimpleNamespace(guild_id=w.guild.id, user=SimpleNamespace(id=USER_BASE + i)))
+
+        def word():
+            return rng.choice(VOCABULARY)
+
+        return [
+            ("donate", iterations, lambda i: d.donate.callback(d, self.interaction(), "bench", 10.0, "PSF")),
+            ("dstatus", iterations, lambda i: d.dstatus.callback(d, self.interaction())),
+            ("dstats", iterations, lambda i: d.dstats.callback(d, self.interaction(), 10, False)),
+            ("dstats verifica", heavy, lambda i: d.dstats.callback(d, self.interaction(w.admin), 10, True)),
+            ("check", iterations, lambda i: d.check.callback(d, self.interaction(), rng.randint(1, self.size))),
+            ("dremove", iterations, lambda i: d.dremove.callback(d, self.interaction(w.admin), i + 1)),
+
+            ("faq", iterations, lambda i: f.faq.callback(f, self.interaction(), f"{word()} {word()}")),
+            ("faq id", iterations, lambda i: f.faq.callback(f, self.interaction(), str(rng.randint(1, self.faq_count)))),
+            ("faq autocomplete", iterations, lambda i: f.faq_autocomplete(self.interaction(), word()[:-1])),
+            ("add_faq", iterations, lambda i: f.add_faq.callback(f, self.interaction(w.admin), f"{word()} {word()}?", word(), f"{word()},{word()}")),
+            ("remove_faq", iterations, lambda i: f.remove_faq.callback(f, self.interaction(w.admin), i + 1)),
+            ("faq on_message", iterations, faq_suggestion),
+
+            ("addvps", iterations, lambda i: v.addvps.callback(v, self.interaction(w.admin), "1", "2030-01-01", "1", f"192.168.{i >> 8 & 255}.{i & 255}")),
+            ("vps", iterations, lambda i: v.vps.callback(v, self.interaction(), None, None)),
+            ("vps owner", iterations, lambda i: v.vps.callback(v, self.interaction(), self.owner_of(), None)),
+            ("vps expira_in", iterations, lambda i: v.vps.callback(v, self.interaction(), None, 30)),
+            ("myvps", iterations, lambda i: v.myvps.callback(v, self.interaction(self.owner_of()))),
+            ("renewvps", iterations, lambda i: v.renewvps.callback(v, self.interaction(w.admin), rng.randint(1, self.size), "2031-06-01")),
+            ("removevps", iterations, lambda i: v.removevps.callback(v, self.interaction(w.admin), i + 1)),
+            ("vpsexport", heavy, lambda i: v.vpsexport.callback(v, self.interaction(w.admin), "csv")),
+
+            ("ticket create", iterations, ticket_create),
+            ("closeticket", heavy, ticket_close),
+            ("ticket on_message", iterations, ticket_message),
+            ("settickets", iterations, lambda i: t.settickets.callback(t, self.interaction(w.owner, w.support), w.category, w.log, w.staff_role)),
+
+            ("verify reaction", iterations, verify_reaction),
+            ("setverify", iterations, lambda i: vf.setverify.callback(vf, self.interaction(w.owner), w.verify, w.member_role)),
+
+            ("invites", iterations, lambda i: iv.invites.callback(iv, self.interaction(), None, 10)),
+            ("invites user", iterations, lambda i: iv.invites.callback(iv, self.interaction(), self.inviter(), 10)),
+            ("member join", iterations, member_join),
+            ("member remove", iterations, member_remove),
+            ("setinvitelog", iterations, lambda i: iv.setinvitelog.callback(iv, self.interaction(w.admin), w.log)),
+        ]
+
+
+async def measure(call, runs):
+    latencies = []
+    start = time.perf_counter()
+    for i in range(runs):
+        began = time.perf_counter()
+        await call(i)
+        latencies.append(time.perf_counter() - began)
+    elapsed = time.perf_counter() - start
+
+    # Un apel în plus sub tracemalloc: vârful de memorie alocată de handler
+    tracemalloc.start()
+    try:
+        await call(runs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "runs": runs,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 4),
+        "p90_ms": round(percentile(latencies, 90) * 1000, 4),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 4),
+        "max_ms": round(latencies[-1] * 1000, 4),
+        "ops_per_s": round(runs / elapsed, 1),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+async def run_size(size, iterations):
+    from utils import storage
+
+    rng = random.Random(size)
+    world = build_world()
+    started = time.perf_counter()
+    seed(size, world, rng)
+    seeded = time.perf_counter()
+
+    storage.FLUSH_DELAY = 3600
+    suite = Suite(world, size, rng)
+    await suite.start()
+    loaded = time.perf_counter()
+
+    # Biroul de tickete e deschis doar ziua; benchmark-ul rulează "la prânz"
+    real_datetime = suite.modules.ticket.datetime
+
+    class OfficeHours(real_datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return real_datetime.now(tz).replace(hour=12)
+
+    suite.modules.ticket.datetime = OfficeHours
+    suite.modules.invite.JOIN_WINDOW = 0
+
+    commands = {}
+    for name, runs, call in suite.scenarios(iterations):
+        # Gunoiul scenariului anterior nu trebuie colectat în timpul acestuia
+        gc.collect()
+        commands[name] = await measure(call, runs)
+
+    flush_start = time.perf_counter()
+    await storage.flush_all()
+    flush_ms = (time.perf_counter() - flush_start) * 1000
+    return {
+        "seed_s": round(seeded - started, 3),
+        "load_s": round(loaded - seeded, 3),
+        "flush_all_ms": round(flush_ms, 1),
+        # ru_maxrss e în KB pe Linux
+        "rss_peak_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "commands": commands,
+    }
+
+
+def child(size, iterations):
+    os.environ["GUILD_ID"] = str(GUILD_ID)
+    os.environ["NOTIFY_ROLE_ID"] = str(NOTIFY_ROLE_ID)
+    os.environ["STORAGE_BACKEND"] = "json"
+    sys.path.insert(0, ROOT)
+    # Căile store-urilor sunt relative; nu atingem fișierele reale ale botului
+    with tempfile.TemporaryDirectory(prefix="bench-suite-") as directory:
+        os.chdir(directory)
+        result = asyncio.run(run_size(size, iterations))
+        os.chdir(ROOT)
+    print(json.dumps(result))
+
+
+# --- raport și baseline ---
+
+def compare(report, baseline, tolerance):
+    regressions = []
+    for size, base_size in baseline["sizes"].items():
+        current = report["sizes"].get(size)
+        if current is None:
+            continue
+        for name, base in base_size["commands"].items():
+            now = current["commands"].get(name)
+            if now is None:
+                continue
+            for metric, floor in REGRESSION_FLOORS.items():
+                if now[metric] > base[metric] * (1 + tolerance) and now[metric] - base[metric] > floor:
+                    regressions.append(f"N={size} {name}: {metric} {base[metric]} -> {now[metric]}")
+    return regressions
+
+
+def print_table(size, result, out=sys.stderr):
+    print(f"\nN={size}: date {result['seed_s']}s, încărcare {result['load_s']}s, "
+          f"flush_all {result['flush_all_ms']} ms, RSS maxim {result['rss_peak_mb']} MB", file=out)
+    print(f"{'comandă':<18} {'rulări':>6} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'op/s':>10} {'vârf KB':>9}", file=out)
+    for name, r in result["commands"].items():
+        print(f"{name:<18} {r['runs']:>6} {r['p50_ms']:>9.3f} {r['p90_ms']:>9.3f} {r['p99_ms']:>9.3f} {r['ops_per_s']:>10.0f} {r['peak_kb']:>9.1f}", file=out)
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child(int(sys.argv[2]), int(sys.argv[3]))
+        return
+
+    parser = argparse.ArgumentParser(description="Benchmark offline pentru cog-uri.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="dimensiunile seturilor de date, separate prin virgulă")
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS, help="rulări per comandă (cele grele: /20)")
+    parser.add_argument("--out", default="-", help="fișierul raportului JSON (implicit stdout)")
+    parser.add_argument("--baseline", help="raport de referință; ieșire cu cod 1 la regresii")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="creșterea relativă acceptată față de baseline")
+    parser.add_argument("--update-baseline", action="store_true", help="scrie raportul curent ca baseline")
+    args = parser.parse_args()
+
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "iterations": args.iterations,
+        "sizes": {},
+    }
+    for size in (int(s) for s in args.sizes.split(",")):
+        output = subprocess.run(
+            [sys.executable, "-m", "bench.suite", "--child", str(size), str(args.iterations)],
+            cwd=ROOT, capture_output=True, text=True
+        )
+        if output.returncode != 0:
+            print(output.stderr, file=sys.stderr)
+            sys.exit(f"❌ N={size}: procesul de benchmark a eșuat")
+        result = json.loads(output.stdout.strip().splitlines()[-1])
+        report["sizes"][str(size)] = result
+        print_table(size, result)
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.out == "-":
+        print(text)
+    else:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+    if args.baseline and args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"\n📌 Baseline actualizat: {args.baseline}", file=sys.stderr)
+    elif args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regresii față de {args.baseline}:", file=sys.stderr)
+            for line in regressions:
+                print(f"  {line}", file=sys.stderr)
+            sys.exit(1)
+        print(f"\n✅ Nicio regresie față de {args.baseline} (toleranță {args.tolerance:.0%})", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
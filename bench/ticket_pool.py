@@ -0,0 +1,102 @@
+"""Latența deschiderii unui ticket: canal creat la cerere vs. canal luat din pool.
+
+Rulare: python -m bench.ticket_pool [număr_tickete] [pool_size]
+
+Latențele REST sunt simulate (create_channel mai lent și cu coadă lungă,
+edit_channel mai rapid); măsurăm de la click până la răspunsul "Ticket creat".
+"""
+import asyncio
+import datetime as dt
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+os.environ.setdefault("GUILD_ID", "0")
+os.environ.setdefault("NOTIFY_ROLE_ID", "0")
+
+from bench.fakes import FakeGuild
+import cogs.ticket as ticket_cog
+
+# Secunde; create_channel are ocazional vârfuri, ca atunci când Discord e lent
+ROUTE_LATENCY = {
+    "create_channel": lambda: random.choice([0.35] * 9 + [2.5]),
+    "edit_channel": lambda: 0.12,
+}
+CLICK_SPREAD = 20.0
+
+
+class OfficeHours(dt.datetime):
+    # Butonul refuză ticketele în afara programului; benchmark-ul rulează "la prânz"
+    @classmethod
+    def now(cls, tz=None):
+        return dt.datetime(2025, 1, 1, 12, 0, tzinfo=tz)
+
+
+def fake_interaction(guild, member, latencies):
+    start = time.perf_counter()
+
+    async def defer(**kwargs):
+        pass
+
+    async def send(content=None, **kwargs):
+        latencies.append(time.perf_counter() - start)
+
+    return SimpleNamespace(
+        guild=guild, user=member, client=SimpleNamespace(dispatch=lambda *args: None),
+        response=SimpleNamespace(defer=defer), followup=SimpleNamespace(send=send)
+    )
+
+
+async def run(count, pool_size):
+    ticket_cog.datetime = OfficeHours
+    # Nu atingem fișierele reale ale botului
+    scratch = tempfile.mkdtemp()
+    ticket_cog.config_store.path = os.path.join(scratch, "tickets_config.json")
+    ticket_cog.active_store.path = os.path.join(scratch, "active_tickets.json")
+    ticket_cog.config_store.data.clear()
+    ticket_cog.active_store.data.clear()
+    ticket_cog.tickets = ticket_cog.TicketRegistry(ticket_cog.active_store)
+
+    guild = FakeGuild(latency=0.08, route_latency=ROUTE_LATENCY)
+    category = guild.add_channel("Tickete")
+    ticket_cog.config_store.data[str(guild.id)] = {
+        "category_id": category.id,
+        "log_channel_id": guild.add_channel("log").id,
+        "staff_role_id": None,
+        "pool_size": pool_size,
+        "pool": []
+    }
+    await ticket_cog.refill_pool(guild, category)
+
+    view = ticket_cog.CreateTicketView()
+    latencies = []
+    for _ in range(count):
+        member = guild.add_member()
+        await view.create.callback(fake_interaction(guild, member, latencies))
+        # Clicurile vin la intervale aleatoare, cât să aibă pool-ul timp să se reumple
+        await asyncio.sleep(random.expovariate(count / CLICK_SPREAD))
+    for task in list(ticket_cog.pool_refills.values()):
+        await task
+    ticket_cog.pool_refills.clear()
+    return latencies
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    pool_size = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    print(f"{count} tickete în ~{CLICK_SPREAD:.0f}s, pool de {pool_size} canale")
+    print(f"{'mod':<8} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'> 2.5s':>7}")
+    for name, size in (("rece", 0), ("pool", pool_size)):
+        random.seed(11)
+        latencies = sorted(asyncio.run(run(count, size)))
+        p95 = latencies[int(0.95 * (len(latencies) - 1))]
+        slow = sum(1 for latency in latencies if latency >= 2.5)
+        print(f"{name:<8} {statistics.median(latencies) * 1000:>8.0f} {p95 * 1000:>8.0f} {latencies[-1] * 1000:>8.0f} {slow:>7}")
+
+
+if __name__ == "__main__":
+    main()
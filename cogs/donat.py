@@ -1,24 +1,56 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import json
-import os
+import asyncio
 from datetime import datetime, timedelta
 import pytz
+from utils import storage
+from utils.rollups import DonationRollups, period_keys
 
+REQUIRED_INTENTS = ("guilds",)
 DONATE_FILE = "donatii.json"
+DONATE_LOG = "donatii.jsonl"
 COOLDOWN_FILE = "cooldown_donate.json"
 TZ = pytz.timezone("Europe/Bucharest")
 
-def load_json(filename):
-    if not os.path.exists(filename):
-        return []
-    with open(filename, "r") as f:
-        return json.load(f)
+# Donațiile vechi din donatii.json sunt migrate automat la prima pornire
+donation_journal = storage.open_journal(DONATE_LOG, legacy_path=DONATE_FILE)
+cooldown_store = storage.open_store(COOLDOWN_FILE, default=dict)
 
-def save_json(filename, data):
-    with open(filename, "w") as f:
-        json.dump(data, f, indent=4)
+
+def load_rollups():
+    snapshot = donation_journal.scan()
+    rollups = DonationRollups().rebuild(snapshot)
+    rollups.seq = snapshot.seq
+    return rollups
+
+
+donation_rollups = load_rollups()
+# /donate și /dremove așteaptă cât timp /dstats verifica recalculează agregatele
+rollups_lock = asyncio.Lock()
+# Modificările venite din alte procese în timpul recalculării, aplicate apoi și rezultatului
+remote_during_rebuild = None
+
+
+def apply_change(rollups, donatie, removed, seq):
+    # Cele din snapshot-ul din care s-au construit agregatele sunt deja numărate
+    if seq <= rollups.seq:
+        return
+    rollups.seq = seq
+    if removed:
+        rollups.remove(donatie)
+    else:
+        rollups.add(donatie)
+
+
+def apply_remote_donation(donatie, removed, seq):
+    # Donații adăugate/șterse de alt proces din cluster
+    if remote_during_rebuild is not None:
+        remote_during_rebuild.append((donatie, removed, seq))
+    apply_change(donation_rollups, donatie, removed, seq)
+
+
+donation_journal.subscribe(apply_remote_donation)
 
 class Donate(commands.Cog):
     def __init__(self, bot):
@@ -28,7 +60,7 @@ class Donate(commands.Cog):
     @app_commands.describe(motiv="Motivul donației", suma="Suma în EUR (maxim 50)", cod="Codul PSF")
     async def donate(self, interaction: discord.Interaction, motiv: str, suma: float, cod: str):
         user_id = str(interaction.user.id)
-        cooldowns = load_json(COOLDOWN_FILE)
+        cooldowns = cooldown_store.data
         now = datetime.now(TZ)
 
         if suma > 50:
@@ -45,8 +77,7 @@ class Donate(commands.Cog):
                 return
 
         # Salvare donație
-        donatii = load_json(DONATE_FILE)
-        new_id = (donatii[-1]["id"] + 1) if donatii else 1
+        new_id = donation_journal.next_id()
 
         donatie = {
             "id": new_id,
@@ -58,11 +89,13 @@ class Donate(commands.Cog):
             "timestamp": now.strftime("%Y-%m-%d %H:%M:%S")
         }
 
-        donatii.append(donatie)
-        save_json(DONATE_FILE, donatii)
+        # În cluster, id-ul poate fi schimbat dacă alt proces l-a luat între timp
+        async with rollups_lock:
+            new_id = await donation_journal.append(donatie)
+            donation_rollups.add(donatie)
 
         cooldowns[user_id] = now.strftime("%Y-%m-%d %H:%M:%S")
-        save_json(COOLDOWN_FILE, cooldowns)
+        cooldown_store.mark_dirty()
 
         await interaction.response.send_message(
             f"✅ Donație #{new_id} înregistrată!\n📌 **Motiv:** {motiv}\n💶 **Sumă:** {suma:.2f} EUR\n🔑 **Cod:** ||{cod}||",
@@ -71,15 +104,67 @@ class Donate(commands.Cog):
 
     @app_commands.command(name="dstatus", description="Afișează totalul donațiilor")
     async def dstatus(self, interaction: discord.Interaction):
-        donatii = load_json(DONATE_FILE)
-        total = sum([d.get("suma", 0) for d in donatii])
+        total = donation_rollups.total / 100
         await interaction.response.send_message(f"💰 Total donații: **{total:.2f} EUR**", ephemeral=False)
 
+    @app_commands.command(name="dstats", description="Statistici donații: perioade, top donatori, percentile")
+    @app_commands.describe(top="Câți donatori să fie afișați (maxim 25)", verifica="Recalculează totul din istoric (admin only)")
+    async def dstats(self, interaction: discord.Interaction, top: app_commands.Range[int, 1, 25] = 5, verifica: bool = False):
+        global donation_rollups, remote_during_rebuild
+        rollups = donation_rollups
+        footer = "Statistici actualizate la fiecare donație."
+
+        if verifica:
+            if not interaction.user.guild_permissions.administrator:
+                await interaction.response.send_message("❌ Doar administratorii pot recalcula statisticile.", ephemeral=True)
+                return
+            await interaction.response.defer()
+            async with rollups_lock:
+                remote_during_rebuild = []
+                try:
+                    fresh = await asyncio.to_thread(load_rollups)
+                    for donatie, removed, seq in remote_during_rebuild:
+                        apply_change(fresh, donatie, removed, seq)
+                finally:
+                    remote_during_rebuild = None
+                rollups = donation_rollups
+                if fresh.snapshot() == rollups.snapshot():
+                    footer = "✅ Recalculare completă: statisticile coincid."
+                else:
+                    donation_rollups = rollups = fresh
+                    footer = "⚠️ Recalculare completă: statisticile au fost corectate."
+
+        now = datetime.now(TZ)
+        day, week, month = period_keys(now.strftime("%Y-%m-%d %H:%M:%S"))
+
+        embed = discord.Embed(title="📊 Statistici donații", color=0x00ff99)
+        embed.add_field(name="Total", value=f"{rollups.total / 100:.2f} EUR ({rollups.count} donații)", inline=False)
+        embed.add_field(name="Azi", value=f"{rollups.by_day[day] / 100:.2f} EUR", inline=True)
+        embed.add_field(name="Săptămâna aceasta", value=f"{rollups.by_week[week] / 100:.2f} EUR", inline=True)
+        embed.add_field(name="Luna aceasta", value=f"{rollups.by_month[month] / 100:.2f} EUR", inline=True)
+        embed.add_field(
+            name="Percentile sumă",
+            value=" · ".join(f"p{p}: {rollups.percentile(p) / 100:.2f}" for p in (50, 90, 99)),
+            inline=False
+        )
+
+        top_donors = rollups.top(top)
+        lines = [
+            f"**{i}.** <@{user_id}> ({rollups.usernames.get(user_id, user_id)}) — {cents / 100:.2f} EUR"
+            for i, (user_id, cents) in enumerate(top_donors, start=1)
+        ]
+        embed.add_field(name=f"Top {top} donatori", value="\n".join(lines) or "Nicio donație încă.", inline=False)
+        embed.set_footer(text=footer)
+
+        if interaction.response.is_done():
+            await interaction.followup.send(embed=embed)
+        else:
+            await interaction.response.send_message(embed=embed)
+
     @app_commands.command(name="check", description="Verifică detalii despre o donație după ID")
     @app_commands.describe(donatie_id="ID-ul donației")
     async def check(self, interaction: discord.Interaction, donatie_id: int):
-        donatii = load_json(DONATE_FILE)
-        donatie = next((d for d in donatii if d["id"] == donatie_id), None)
+        donatie = await donation_journal.get(donatie_id)
         if not donatie:
             await interaction.response.send_message("❌ Donația nu a fost găsită.", ephemeral=True)
             return
@@ -100,14 +185,15 @@ class Donate(commands.Cog):
             await interaction.response.send_message("❌ Nu ai permisiunea să ștergi donații.", ephemeral=True)
             return
 
-        donatii = load_json(DONATE_FILE)
-        updated = [d for d in donatii if d["id"] != donatie_id]
-
-        if len(updated) == len(donatii):
+        async with rollups_lock:
+            donatie = await donation_journal.get(donatie_id)
+            removed = bool(donatie) and await donation_journal.remove(donatie_id)
+            if removed:
+                donation_rollups.remove(donatie)
+        if not removed:
             await interaction.response.send_message("❌ Donația nu a fost găsită.", ephemeral=True)
             return
 
-        save_json(DONATE_FILE, updated)
         await interaction.response.send_message(f"🗑️ Donația #{donatie_id} a fost ștearsă cu succes.", ephemeral=True)
 
 async def setup(bot):
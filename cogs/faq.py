@@ -2,27 +2,43 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 import os
-import json
+import time
+from utils import storage
+from utils.faq_index import FAQIndex, FAQSuggester, KeywordMatcher
 
+# Răspunsurile automate citesc conținutul mesajelor din canalele de suport
+REQUIRED_INTENTS = ("guilds", "guild_messages", "message_content")
 GUILD_ID = int(os.getenv("GUILD_ID"))
 NOTIFY_ROLE_ID = int(os.getenv("NOTIFY_ROLE_ID"))
 AUTHORIZED_USER_IDS = {753179409682399332, 1135863271363186768, 348516511352094720}
 
 faq_data_file = "faq_data.json"
+faq_config_file = "faq_config.json"
+# Cel mult o sugestie automată pe canal în acest interval (secunde)
+SUGGEST_COOLDOWN = 60
 
-def load_faq_data():
-    if not os.path.exists(faq_data_file):
-        return []
-    with open(faq_data_file, 'r', encoding='utf-8') as f:
-        return json.load(f)
+faq_store = storage.open_store(faq_data_file, default=list, ensure_ascii=False)
+faq_config_store = storage.open_store(faq_config_file, default=dict)
+faq_index = FAQIndex(faq_store.data)
+faq_suggester = FAQSuggester(faq_store.data)
+faq_matcher = KeywordMatcher(faq_store.data)
 
-def save_faq_data(data):
-    with open(faq_data_file, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=4, ensure_ascii=False)
+
+def reload_faq_indexes(key, value):
+    # Lista de FAQ a fost modificată de alt proces din cluster
+    global faq_index, faq_suggester, faq_matcher
+    faq_index = FAQIndex(faq_store.data)
+    faq_suggester = FAQSuggester(faq_store.data)
+    faq_matcher = KeywordMatcher(faq_store.data)
+
+
+faq_store.subscribe(reload_faq_indexes)
 
 class FAQCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.support_channels = {channel_id for channels in faq_config_store.data.values() for channel_id in channels}
+        self.last_suggestion = {}
 
     @app_commands.command(name="add_faq", description="Adaugă o întrebare frecventă (FAQ)")
     @app_commands.describe(question="Întrebarea completă", answer="Răspunsul", keywords="Cuvinte cheie separate prin virgulă")
@@ -32,7 +48,7 @@ class FAQCog(commands.Cog):
             await interaction.response.send_message("⛔ Nu ai permisiunea să adaugi FAQ-uri.", ephemeral=True)
             return
 
-        faq_data = load_faq_data()
+        faq_data = faq_store.data
         new_id = 1 if not faq_data else max(entry['id'] for entry in faq_data) + 1
         keyword_list = [k.strip().lower() for k in keywords.split(',') if k.strip()]
 
@@ -43,7 +59,10 @@ class FAQCog(commands.Cog):
             "keywords": keyword_list
         }
         faq_data.append(new_faq)
-        save_faq_data(faq_data)
+        faq_store.mark_dirty()
+        faq_index.add(new_faq)
+        faq_suggester.add(new_faq)
+        faq_matcher.rebuild(faq_data)
 
         embed = discord.Embed(title="✅ FAQ Adăugat!", color=discord.Color.green())
         embed.add_field(name="Întrebare", value=question, inline=False)
@@ -54,21 +73,12 @@ class FAQCog(commands.Cog):
     @app_commands.command(name="faq", description="Caută un FAQ după cuvinte cheie sau ID")
     @app_commands.describe(query="ID-ul FAQ-ului sau cuvinte cheie")
     async def faq(self, interaction: discord.Interaction, query: str):
-        faq_data = load_faq_data()
-        results = []
-
         try:
             query_id = int(query)
-            for entry in faq_data:
-                if entry['id'] == query_id:
-                    results.append(entry)
-                    break
+            results = [faq_index.entries[query_id]] if query_id in faq_index.entries else []
         except ValueError:
-            search_terms = query.lower().split()
-            for entry in faq_data:
-                if any(term in kw for term in search_terms for kw in entry['keywords']) or \
-                   any(term in entry['question'].lower() or term in entry['answer'].lower() for term in search_terms):
-                    results.append(entry)
+            # Rezultatele vin ordonate după relevanță
+            results = faq_index.search(query, limit=5)
 
         if not results:
             await interaction.response.send_message("Niciun rezultat găsit.", ephemeral=True)
@@ -83,6 +93,15 @@ class FAQCog(commands.Cog):
             )
         await interaction.response.send_message(embed=embed)
 
+    @faq.autocomplete("query")
+    async def faq_autocomplete(self, interaction: discord.Interaction, current: str):
+        # Rulează la fiecare tastă: doar căutări în memorie, fără acces la disc
+        choices = []
+        for faq_id in faq_suggester.suggest(current, limit=25):
+            entry = faq_index.entries[faq_id]
+            choices.append(app_commands.Choice(name=f"#{faq_id}: {entry['question']}"[:100], value=str(faq_id)))
+        return choices
+
     @app_commands.command(name="remove_faq", description="Șterge un FAQ după ID")
     @app_commands.describe(faq_id="ID-ul FAQ-ului")
     async def remove_faq(self, interaction: discord.Interaction, faq_id: int):
@@ -91,15 +110,59 @@ class FAQCog(commands.Cog):
             await interaction.response.send_message("⛔ Nu ai permisiunea să ștergi FAQ-uri.", ephemeral=True)
             return
 
-        faq_data = load_faq_data()
+        faq_data = faq_store.data
         initial_len = len(faq_data)
         faq_data = [entry for entry in faq_data if entry['id'] != faq_id]
 
         if len(faq_data) == initial_len:
             await interaction.response.send_message(f"FAQ-ul cu ID {faq_id} nu a fost găsit.", ephemeral=True)
         else:
-            save_faq_data(faq_data)
+            faq_store.set(faq_data)
+            faq_index.remove(faq_id)
+            faq_suggester.remove(faq_id)
+            faq_matcher.rebuild(faq_data)
             await interaction.response.send_message(f"✅ FAQ #{faq_id} a fost șters.", ephemeral=True)
 
+    @app_commands.command(name="faqchannel", description="Activează/dezactivează sugestiile FAQ automate într-un canal")
+    @app_commands.describe(channel="Canalul de suport")
+    async def faqchannel(self, interaction: discord.Interaction, channel: discord.TextChannel):
+        notify_role = discord.utils.get(interaction.guild.roles, id=NOTIFY_ROLE_ID)
+        if notify_role not in interaction.user.roles and interaction.user.id not in AUTHORIZED_USER_IDS:
+            await interaction.response.send_message("⛔ Nu ai permisiunea să configurezi FAQ-urile.", ephemeral=True)
+            return
+
+        channels = faq_config_store.data.setdefault(str(interaction.guild.id), [])
+        if channel.id in channels:
+            channels.remove(channel.id)
+            self.support_channels.discard(channel.id)
+            message = f"🔕 Sugestiile FAQ automate au fost dezactivate în {channel.mention}."
+        else:
+            channels.append(channel.id)
+            self.support_channels.add(channel.id)
+            message = f"🔔 Sugestiile FAQ automate au fost activate în {channel.mention}."
+        faq_config_store.mark_dirty()
+
+        await interaction.response.send_message(message, ephemeral=True)
+
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        # Rulează pentru fiecare mesaj: ieșim cât mai devreme
+        if message.channel.id not in self.support_channels or message.author.bot:
+            return
+
+        now = time.monotonic()
+        if now - self.last_suggestion.get(message.channel.id, -SUGGEST_COOLDOWN) < SUGGEST_COOLDOWN:
+            return
+
+        faq_id = faq_matcher.best_match(message.content)
+        if faq_id is None:
+            return
+        self.last_suggestion[message.channel.id] = now
+
+        entry = faq_index.entries[faq_id]
+        embed = discord.Embed(title=f"💡 FAQ #{faq_id}: {entry['question']}", description=entry['answer'], color=discord.Color.blue())
+        embed.set_footer(text=f"Folosește /faq {faq_id} pentru a-l revedea.")
+        await message.reply(embed=embed, mention_author=False)
+
 async def setup(bot):
     await bot.add_cog(FAQCog(bot))
\ No newline at end of file
@@ -1,79 +1,189 @@
 import discord
+import asyncio
+from collections import defaultdict
 from discord.ext import commands, tasks
 from discord import app_commands
-import json
-import os
+from utils import storage
+from utils.invite_stats import InviteStats
+from utils.metrics import background_task
 
+REQUIRED_INTENTS = ("guilds", "members", "invites")
 INVITE_CONFIG = "invite_config.json"
 INVITE_CACHE = {}
-
-def load_invite_config():
-    if not os.path.exists(INVITE_CONFIG):
-        return {}
-    with open(INVITE_CONFIG, "r") as f:
-        return json.load(f)
-
-def save_invite_config(data):
-    with open(INVITE_CONFIG, "w") as f:
-        json.dump(data, f, indent=4)
+# Câte serverele își reîmprospătează invitațiile în paralel
+REFRESH_CONCURRENCY = 5
+# Intrările dintr-o fereastră de atâtea secunde sunt atribuite cu un singur apel invites()
+JOIN_WINDOW = 1.5
+
+invite_config_store = storage.open_store(INVITE_CONFIG, default=dict)
+invite_stats = InviteStats(storage.open_store("invite_stats.json", default=dict), storage.open_log("invite_members.jsonl"))
+
+def uses_by_code(invites):
+    return {invite.code: invite.uses or 0 for invite in invites}
+
+def find_used_invite(before, invites_after):
+    """Invitația al cărei număr de folosiri a crescut față de cache (code -> uses)."""
+    for invite in invites_after:
+        if (invite.uses or 0) > before.get(invite.code, 0):
+            return invite
+    return None
+
+def attribute_joins(members, before, invites_after):
+    """Împarte membrii (în ordinea intrării) pe invitații după creșterea numărului de folosiri."""
+    used = []
+    for invite in invites_after:
+        delta = (invite.uses or 0) - before.get(invite.code, 0)
+        if delta > 0:
+            used.extend([invite] * delta)
+    return [(member, used[i] if i < len(used) else None) for i, member in enumerate(members)]
+
+def chunk_lines(lines, limit=2000):
+    chunk = ""
+    for line in lines:
+        if chunk and len(chunk) + len(line) + 1 > limit:
+            yield chunk
+            chunk = ""
+        chunk = f"{chunk}\n{line}" if chunk else line
+    if chunk:
+        yield chunk
 
 class InviteTracker(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.invite_cache = {}
+        self.refresh_semaphore = asyncio.Semaphore(REFRESH_CONCURRENCY)
+        self.guild_locks = defaultdict(asyncio.Lock)
+        self.pending_joins = {}
+        self.flush_tasks = {}
         self.update_invites.start()
 
     def cog_unload(self):
         self.update_invites.cancel()
+        for task in self.flush_tasks.values():
+            task.cancel()
+
+    async def refresh_guild(self, guild):
+        async with self.refresh_semaphore, self.guild_locks[guild.id]:
+            # Un lot de intrări în așteptare are nevoie de valorile vechi ca referință
+            if guild.id in self.pending_joins:
+                return
+            try:
+                invites = await guild.invites()
+            except discord.HTTPException:
+                # Fără referință intrările nu sunt atribuite; un cache gol ar număra toate folosirile vechi
+                return
+            # Dacă între timp a intrat cineva, valorile noi îi includ deja folosirea
+            if guild.id not in self.pending_joins:
+                self.invite_cache[guild.id] = uses_by_code(invites)
+
+    async def refresh_all(self):
+        await asyncio.gather(*(self.refresh_guild(guild) for guild in self.bot.guilds))
 
     @tasks.loop(minutes=5)
     async def update_invites(self):
-        for guild in self.bot.guilds:
-            try:
-                self.invite_cache[guild.id] = await guild.invites()
-            except:
-                pass
+        # bot.guilds conține doar serverele shard-urilor acestui proces, deci într-un
+        # cluster fiecare server e reîmprospătat o singură dată
+        await self.refresh_all()
+
+    @update_invites.before_loop
+    async def before_update_invites(self):
+        await self.bot.wait_until_ready()
 
     @commands.Cog.listener()
-    async def on_ready(self):
-        for guild in self.bot.guilds:
-            try:
-                self.invite_cache[guild.id] = await guild.invites()
-            except:
-                self.invite_cache[guild.id] = []
+    async def on_invite_create(self, invite):
+        cache = self.invite_cache.get(invite.guild.id) if invite.guild is not None else None
+        if cache is not None:
+            cache[invite.code] = invite.uses or 0
+
+    @commands.Cog.listener()
+    async def on_invite_delete(self, invite):
+        if invite.guild is not None:
+            self.invite_cache.get(invite.guild.id, {}).pop(invite.code, None)
 
     @commands.Cog.listener()
     async def on_member_join(self, member):
+        guild = member.guild
+        # Statisticile se țin și fără canal de loguri; canalul decide doar dacă trimitem mesajul
+        batch = self.pending_joins.get(guild.id)
+        if batch is None:
+            batch = self.pending_joins[guild.id] = []
+            task = self.flush_tasks[guild.id] = background_task(self.flush_joins(guild))
+            task.add_done_callback(lambda task: self.flush_done(guild.id, task))
+        batch.append(member)
+
+    def flush_done(self, guild_id, task):
+        if self.flush_tasks.get(guild_id) is task:
+            del self.flush_tasks[guild_id]
+        if not task.cancelled() and task.exception() is not None:
+            print(f"[Invite Tracker Error]: {task.exception()}")
+
+    async def flush_joins(self, guild):
+        await asyncio.sleep(JOIN_WINDOW)
         try:
-            guild = member.guild
-            invites_before = self.invite_cache.get(guild.id, [])
-            invites_after = await guild.invites()
-            self.invite_cache[guild.id] = invites_after
-
-            used_invite = None
-            for invite in invites_after:
-                for old in invites_before:
-                    if invite.code == old.code and invite.uses > old.uses:
-                        used_invite = invite
-                        break
-
-            config = load_invite_config()
-            log_channel_id = config.get(str(guild.id))
-            if not log_channel_id:
-                return
+            async with self.guild_locks[guild.id]:
+                invites_before = self.invite_cache.get(guild.id)
+                try:
+                    invites_after = await guild.invites()
+                finally:
+                    # Cine intră de acum încolo ajunge în lotul următor
+                    members = self.pending_joins.pop(guild.id, [])
+                self.invite_cache[guild.id] = uses_by_code(invites_after)
+
+            if invites_before is None:
+                # Prima referință pentru server (pornire, refresh eșuat, server nou): folosirile
+                # de până acum nu sunt intrări noi, deci lotul rămâne neatribuit
+                attributions = [(member, None) for member in members]
+            else:
+                attributions = attribute_joins(members, invites_before, invites_after)
+            for member, used_invite in attributions:
+                if used_invite and used_invite.inviter:
+                    invite_stats.record_join(guild.id, member.id, used_invite.inviter.id)
 
-            log_channel = guild.get_channel(log_channel_id)
+            log_channel = guild.get_channel(invite_config_store.data.get(str(guild.id)))
             if not log_channel:
                 return
 
-            if used_invite:
-                inviter = used_invite.inviter
-                await log_channel.send(f"📥 {member.mention} a fost invitat de {inviter.mention} folosind codul `{used_invite.code}`.")
-            else:
-                await log_channel.send(f"📥 {member.mention} a intrat, dar nu am putut detecta invitația.")
+            lines = []
+            for member, used_invite in attributions:
+                if used_invite:
+                    inviter = used_invite.inviter
+                    inviter_text = inviter.mention if inviter else "un utilizator necunoscut"
+                    lines.append(f"📥 {member.mention} a fost invitat de {inviter_text} folosind codul `{used_invite.code}`.")
+                else:
+                    lines.append(f"📥 {member.mention} a intrat, dar nu am putut detecta invitația.")
+            for message in chunk_lines(lines):
+                await log_channel.send(message)
         except Exception as e:
             print(f"[Invite Tracker Error]: {e}")
 
+    @commands.Cog.listener()
+    async def on_raw_member_remove(self, payload: discord.RawMemberRemoveEvent):
+        # Varianta raw vine și pentru membrii care nu sunt în cache (modul lean)
+        invite_stats.record_leave(payload.guild_id, payload.user.id)
+
+    @app_commands.command(name="invites", description="Clasamentul invitațiilor sau statisticile unui utilizator.")
+    @app_commands.describe(user="Utilizatorul (opțional)", top="Câți invitatori să fie afișați (maxim 25)")
+    async def invites(self, interaction: discord.Interaction, user: discord.User = None, top: app_commands.Range[int, 1, 25] = 10):
+        if user is not None:
+            joins, leaves, net = invite_stats.get(interaction.guild.id, user.id)
+            await interaction.response.send_message(
+                f"📊 {user.mention}: **{net}** invitații ({joins} intrări, {leaves} plecări).",
+                ephemeral=True
+            )
+            return
+
+        leaderboard = invite_stats.top(interaction.guild.id, top)
+        if not leaderboard:
+            await interaction.response.send_message("Nu există încă statistici de invitații.", ephemeral=True)
+            return
+
+        embed = discord.Embed(title="🏆 Top invitații", color=discord.Color.gold())
+        embed.description = "\n".join(
+            f"**{i}.** <@{inviter_id}> — **{joins - leaves}** ({joins} intrări, {leaves} plecări)"
+            for i, (inviter_id, joins, leaves) in enumerate(leaderboard, start=1)
+        )
+        await interaction.response.send_message(embed=embed)
+
     @app_commands.command(name="setinvitelog", description="Setează canalul unde să fie trimise logurile de invitații.")
     @app_commands.describe(channel="Canalul de loguri")
     async def setinvitelog(self, interaction: discord.Interaction, channel: discord.TextChannel):
@@ -81,9 +191,9 @@ class InviteTracker(commands.Cog):
             await interaction.response.send_message("⛔ Doar administratorii pot folosi această comandă.", ephemeral=True)
             return
 
-        config = load_invite_config()
+        config = invite_config_store.data
         config[str(interaction.guild.id)] = channel.id
-        save_invite_config(config)
+        invite_config_store.mark_dirty()
 
         await interaction.response.send_message(f"✅ Canalul de loguri pentru invitații a fost setat la {channel.mention}", ephemeral=True)
 
@@ -2,6 +2,8 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 
+REQUIRED_INTENTS = ("guilds",)
+
 class Preturi(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
@@ -1,65 +1,180 @@
+import asyncio
+import os
+import shutil
+import tempfile
 import discord
 from discord.ext import commands
 from discord import app_commands
-import json
-import os
 import random
-from datetime import datetime, time
+from datetime import datetime, time, timedelta
 import pytz
+from utils import cluster, storage
+from utils.metrics import background_task
+from utils.scheduler import DeadlineScheduler
+from utils.tickets import TicketRegistry
+from utils.transcripts import export_transcript
 
+# Conținutul mesajelor e necesar pentru transcripturi
+REQUIRED_INTENTS = ("guilds", "guild_messages", "message_content")
 CONFIG_FILE = "tickets_config.json"
 ACTIVE_FILE = "active_tickets.json"
 TZ = pytz.timezone("Europe/Bucharest")
+# Cât mai așteptăm după avertizarea de inactivitate înainte de închiderea automată
+IDLE_GRACE = timedelta(hours=24)
+# Cât așteptăm până reîncercăm închiderea automată când transcriptul nu a putut fi salvat
+IDLE_RETRY = timedelta(hours=1)
+
+config_store = storage.open_store(CONFIG_FILE, default=dict)
+active_store = storage.open_store(ACTIVE_FILE, default=dict)
+tickets = TicketRegistry(active_store)
+
+POOL_CHANNEL_NAME = "ticket-liber"
+# Task-urile de reumplere a pool-ului, câte unul per server
+pool_refills = {}
+
+
+async def claim_pooled_channel(guild, category, name, overwrites, topic):
+    """Ia un canal pre-creat din pool și îl transformă în ticket; None dacă pool-ul e gol."""
+    config = config_store.data.get(str(guild.id), {})
+    pool = config.get("pool", [])
+    while pool:
+        channel = guild.get_channel(pool.pop(0))
+        config_store.mark_dirty()
+        if channel is None:
+            continue
+        try:
+            await channel.edit(name=name, category=category, overwrites=overwrites, topic=topic)
+        except discord.HTTPException as e:
+            # Id-ul e deja scos din pool: un canal șters sau pe care nu-l mai putem edita nu e reîncercat
+            if not isinstance(e, discord.NotFound):
+                print(f"[Ticket Error] Canalul din pool {channel.id} nu poate fi folosit: {e}")
+            continue
+        return channel
+    return None
+
+
+async def refill_pool(guild, category):
+    config = config_store.data.get(str(guild.id), {})
+    pool = config.setdefault("pool", [])
+    overwrites = {
+        guild.default_role: discord.PermissionOverwrite(view_channel=False),
+        guild.me: discord.PermissionOverwrite(view_channel=True)
+    }
+    while len(pool) < config.get("pool_size", 0):
+        channel = await guild.create_text_channel(name=POOL_CHANNEL_NAME, category=category, overwrites=overwrites)
+        pool.append(channel.id)
+        config_store.mark_dirty()
+
+
+def schedule_refill(guild, category):
+    task = pool_refills.get(guild.id)
+    if task is not None and not task.done():
+        return
+    # REST-ul reumplerii nu aparține comenzii care a luat canalul din pool
+    task = pool_refills[guild.id] = background_task(refill_pool(guild, category))
+    task.add_done_callback(lambda task: refill_done(guild.id, task))
+
+
+def refill_done(guild_id, task):
+    if pool_refills.get(guild_id) is task:
+        del pool_refills[guild_id]
+    if not task.cancelled() and task.exception() is not None:
+        print(f"[Ticket Error] Reumplerea pool-ului {guild_id}: {task.exception()}")
+
+TRANSCRIPT_DIR = "transcripts"
+NO_LOG_CHANNEL = "⚠️ Canalul de log pentru tickete nu mai există, deci transcriptul nu poate fi salvat; ticketul rămâne deschis. Reconfigurează cu /settickets."
+# Canalele care se arhivează acum, ca un al doilea click să nu pornească alt export
+closing_channels = set()
+
 
-def load_config():
-    if not os.path.exists(CONFIG_FILE):
-        return {}
-    with open(CONFIG_FILE, "r") as f:
-        return json.load(f)
+async def archive_and_delete(channel, log_channel, log_message):
+    """Exportă transcriptul în canalul de log și abia apoi șterge canalul.
 
-def save_config(data):
-    with open(CONFIG_FILE, "w") as f:
-        json.dump(data, f, indent=4)
+    Întoarce False (și lasă canalul neatins) dacă nu există canal de log sau upload-ul eșuează.
+    """
+    if log_channel is None:
+        # Canalul de log a fost șters: fără el istoricul s-ar pierde odată cu ticketul
+        print(f"[Ticket Error] Transcript {channel.id}: canalul de log lipsește, ticketul rămâne deschis")
+        return False
+    if channel.id in closing_channels:
+        return True
+    closing_channels.add(channel.id)
+    try:
+        with_html = config_store.data.get(str(channel.guild.id), {}).get("transcript_html", False)
+        with tempfile.TemporaryDirectory() as scratch:
+            paths = [os.path.join(scratch, f"{channel.name}.jsonl.gz")]
+            if with_html:
+                paths.append(os.path.join(scratch, f"{channel.name}.html"))
+            count = await export_transcript(
+                channel.history(limit=None, oldest_first=True), paths[0], paths[1] if with_html else None, title=f"#{channel.name}"
+            )
+            # Ce depășește limita de upload a serverului rămâne pe disc
+            kept = []
+            for path in [p for p in paths if os.path.getsize(p) > channel.guild.filesize_limit]:
+                os.makedirs(TRANSCRIPT_DIR, exist_ok=True)
+                kept.append(shutil.move(path, os.path.join(TRANSCRIPT_DIR, f"{channel.id}-{os.path.basename(path)}")))
+                paths.remove(path)
+            content = f"{log_message} ({count} mesaje)"
+            if kept:
+                content += "\n⚠️ Transcript prea mare pentru upload, salvat local: " + ", ".join(f"`{path}`" for path in kept)
+            try:
+                await log_channel.send(content, files=[discord.File(path) for path in paths])
+            except discord.HTTPException as e:
+                print(f"[Ticket Error] Transcript {channel.id}: {e}")
+                return False
 
-def load_active():
-    if not os.path.exists(ACTIVE_FILE):
-        return {}
-    with open(ACTIVE_FILE, "r") as f:
-        return json.load(f)
+        tickets.close_channel(channel.id)
+        await channel.delete()
+        return True
+    finally:
+        closing_channels.discard(channel.id)
+
+
+def ticket_settings(guild):
+    """(categorie, canal de log, rol staff) din tickets_config.json; None dacă serverul nu e configurat."""
+    config = config_store.data.get(str(guild.id))
+    if not config:
+        return None
+    return guild.get_channel(config["category_id"]), guild.get_channel(config["log_channel_id"]), guild.get_role(config["staff_role_id"])
 
-def save_active(data):
-    with open(ACTIVE_FILE, "w") as f:
-        json.dump(data, f, indent=4)
 
 class CloseButton(discord.ui.View):
-    def __init__(self, author: discord.Member, log_channel: discord.TextChannel, staff_role: discord.Role):
+    """View persistent: autorul ticketului și setările se citesc din registru/config la fiecare click."""
+
+    def __init__(self):
         super().__init__(timeout=None)
-        self.author = author
-        self.log_channel = log_channel
-        self.staff_role = staff_role
 
-    @discord.ui.button(label="🔒 Close Ticket", style=discord.ButtonStyle.danger)
+    @discord.ui.button(label="🔒 Close Ticket", style=discord.ButtonStyle.danger, custom_id="ticket:close")
     async def close(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if interaction.user != self.author and self.staff_role not in interaction.user.roles:
-            await interaction.response.send_message("⛔ Doar autorul sau staff-ul poate închide acest ticket.", ephemeral=True)
+        found = tickets.get_by_channel(interaction.channel.id)
+        settings = ticket_settings(interaction.guild)
+        if found is None or settings is None:
+            await interaction.response.send_message("⚠️ Acest canal nu mai este un ticket activ.", ephemeral=True)
             return
 
-        active = load_active()
-        if str(self.author.id) in active:
-            del active[str(self.author.id)]
-            save_active(active)
+        author_id = int(found[0])
+        _, log_channel, staff_role = settings
+        if interaction.user.id != author_id and staff_role not in interaction.user.roles:
+            await interaction.response.send_message("⛔ Doar autorul sau staff-ul poate închide acest ticket.", ephemeral=True)
+            return
+        if log_channel is None:
+            await interaction.response.send_message(NO_LOG_CHANNEL, ephemeral=True)
+            return
 
-        await interaction.channel.delete()
-        await self.log_channel.send(f"📨 Ticket închis de {interaction.user.mention} pentru {self.author.mention}.")
+        await interaction.response.send_message("🗂️ Se salvează transcriptul și se închide ticketul...")
+        closed = await archive_and_delete(
+            interaction.channel, log_channel, f"📨 Ticket închis de {interaction.user.mention} pentru <@{author_id}>."
+        )
+        if not closed:
+            await interaction.followup.send("⚠️ Transcriptul nu a putut fi încărcat; ticketul rămâne deschis.", ephemeral=True)
 
 class CreateTicketView(discord.ui.View):
-    def __init__(self, category: discord.CategoryChannel, log_channel: discord.TextChannel, staff_role: discord.Role):
+    """View persistent: un singur exemplar servește panourile tuturor serverelor."""
+
+    def __init__(self):
         super().__init__(timeout=None)
-        self.category = category
-        self.log_channel = log_channel
-        self.staff_role = staff_role
 
-    @discord.ui.button(label="📩 Creează Ticket", style=discord.ButtonStyle.primary)
+    @discord.ui.button(label="📩 Creează Ticket", style=discord.ButtonStyle.primary, custom_id="ticket:create")
     async def create(self, interaction: discord.Interaction, button: discord.ui.Button):
         now = datetime.now(TZ).time()
         if now < time(9, 0) or now > time(17, 0):
@@ -68,67 +183,192 @@ class CreateTicketView(discord.ui.View):
 
         guild = interaction.guild
         author = interaction.user
+        settings = ticket_settings(guild)
+        if settings is None:
+            await interaction.response.send_message("⚠️ Sistemul de tickete nu este configurat.", ephemeral=True)
+            return
+        category, _, staff_role = settings
 
-        active = load_active()
-        if str(author.id) in active:
-            ticket_channel = guild.get_channel(active[str(author.id)]["channel_id"])
-            if ticket_channel:
-                await interaction.response.send_message(f"⛔ Ai deja un ticket deschis: {ticket_channel.mention}", ephemeral=True)
-                return
-            else:
-                del active[str(author.id)]
-                save_active(active)
+        # Răspunsul poate întârzia cât se creează canalul (sau cât așteptăm lock-ul)
+        await interaction.response.defer(ephemeral=True, thinking=True)
 
-        overwrites = {
-            guild.default_role: discord.PermissionOverwrite(view_channel=False),
-            author: discord.PermissionOverwrite(view_channel=True, send_messages=True, attach_files=True),
-            guild.me: discord.PermissionOverwrite(view_channel=True)
-        }
+        async with tickets.lock(author.id):
+            info = tickets.get_by_user(author.id)
+            if info:
+                ticket_channel = guild.get_channel(info["channel_id"])
+                if ticket_channel:
+                    await interaction.followup.send(f"⛔ Ai deja un ticket deschis: {ticket_channel.mention}", ephemeral=True)
+                    return
+                tickets.close_user(author.id)
 
-        if self.staff_role:
-            overwrites[self.staff_role] = discord.PermissionOverwrite(view_channel=True, send_messages=True)
+            overwrites = {
+                guild.default_role: discord.PermissionOverwrite(view_channel=False),
+                author: discord.PermissionOverwrite(view_channel=True, send_messages=True, attach_files=True),
+                guild.me: discord.PermissionOverwrite(view_channel=True)
+            }
 
-        channel = await guild.create_text_channel(
-            name=f"ticket-{author.name.lower().replace(' ', '-')}-{random.randint(1000, 9999)}",
-            category=self.category,
-            overwrites=overwrites,
-            topic=f"Ticket deschis de {author}"
-        )
+            if staff_role:
+                overwrites[staff_role] = discord.PermissionOverwrite(view_channel=True, send_messages=True)
+
+            name = f"ticket-{author.name.lower().replace(' ', '-')}-{random.randint(1000, 9999)}"
+            topic = f"Ticket deschis de {author}"
+            channel = await claim_pooled_channel(guild, category, name, overwrites, topic)
+            if channel is None:
+                channel = await guild.create_text_channel(name=name, category=category, overwrites=overwrites, topic=topic)
+
+            tickets.open(author.id, {
+                "channel_id": channel.id,
+                "guild_id": guild.id,
+                "opened_at": datetime.now(TZ).strftime("%Y-%m-%d %H:%M:%S")
+            })
+            interaction.client.dispatch("ticket_opened", channel.id)
+
+        await interaction.followup.send(f"✅ Ticket creat: {channel.mention}", ephemeral=True)
+        schedule_refill(guild, category)
 
         embed = discord.Embed(
             title="🎫 Ticket Deschis",
             description=f"Salut {author.mention}, un membru al echipei te va ajuta în curând.",
             color=discord.Color.blurple()
         )
-        await channel.send(embed=embed, view=CloseButton(author, self.log_channel, self.staff_role))
+        await channel.send(embed=embed, view=CloseButton())
 
-        active[str(author.id)] = {
-            "channel_id": channel.id,
-            "guild_id": guild.id,
-            "opened_at": datetime.now(TZ).strftime("%Y-%m-%d %H:%M:%S")
-        }
-        save_active(active)
+def opened_at(info):
+    return TZ.localize(datetime.strptime(info["opened_at"], "%Y-%m-%d %H:%M:%S"))
+
+
+def idle_limit(guild_id):
+    hours = config_store.data.get(str(guild_id), {}).get("idle_hours", 0)
+    return timedelta(hours=hours) if hours else None
 
-        await interaction.response.send_message(f"✅ Ticket creat: {channel.mention}", ephemeral=True)
 
 class TicketCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        # channel_id -> ultimul mesaj al unui om; ținut doar în memorie
+        self.last_activity = {}
+        self.idle_scheduler = DeadlineScheduler(self.check_idle_ticket, TZ)
+        self._idle_start = None
+
+    async def cog_load(self):
+        # Două view-uri persistente acoperă toate panourile și toate ticketele deschise;
+        # starea (config, autor) se ia din tickets_config.json și din registru la click
+        self.bot.add_view(CreateTicketView())
+        self.bot.add_view(CloseButton())
+        self._idle_start = asyncio.create_task(self.start_idle_reaper())
+
+    def cog_unload(self):
+        if self._idle_start is not None:
+            self._idle_start.cancel()
+        self.idle_scheduler.stop()
+
+    async def start_idle_reaper(self):
+        # Callback-ul are nevoie de cache-ul de servere/canale
+        await self.bot.wait_until_ready()
+        for user_id, info in list(tickets.store.data.items()):
+            limit = idle_limit(info["guild_id"])
+            if limit and cluster.owns_guild(info["guild_id"]):
+                self.idle_scheduler.schedule(info["channel_id"], opened_at(info) + limit)
+        self.idle_scheduler.start()
+
+    def ticket_activity(self, channel, info):
+        """Ultima activitate cunoscută, fără să citim istoricul canalului."""
+        candidates = [opened_at(info)]
+        if channel.id in self.last_activity:
+            candidates.append(self.last_activity[channel.id])
+        if channel.last_message_id:
+            candidates.append(discord.utils.snowflake_time(channel.last_message_id))
+        return max(candidates)
+
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        if message.author.bot or message.channel.id not in tickets.by_channel:
+            return
+        # Nu reprogramăm nimic aici; reaper-ul verifică activitatea abia la termen
+        self.last_activity[message.channel.id] = message.created_at
+
+    @commands.Cog.listener()
+    async def on_ticket_opened(self, channel_id):
+        found = tickets.get_by_channel(channel_id)
+        if found:
+            limit = idle_limit(found[1]["guild_id"])
+            if limit:
+                self.idle_scheduler.schedule(channel_id, opened_at(found[1]) + limit)
+
+    async def check_idle_ticket(self, channel_id, when, payload):
+        found = tickets.get_by_channel(channel_id)
+        guild = self.bot.get_guild(found[1]["guild_id"]) if found else None
+        channel = guild.get_channel(channel_id) if guild else None
+        limit = idle_limit(guild.id) if guild else None
+        if channel is None or not limit:
+            self.last_activity.pop(channel_id, None)
+            return
+
+        user_id, info = found
+        now = datetime.now(TZ)
+        last = self.ticket_activity(channel, info)
+        warned_at = datetime.fromisoformat(info["idle_warned_at"]) if info.get("idle_warned_at") else None
+
+        if warned_at is not None and last <= warned_at:
+            if now < warned_at + IDLE_GRACE:
+                self.idle_scheduler.schedule(channel_id, warned_at + IDLE_GRACE)
+                return
+            config = config_store.data.get(str(guild.id), {})
+            log_channel = guild.get_channel(config.get("log_channel_id"))
+            # Fără canal de log (sau dacă upload-ul eșuează) nu închidem: istoricul s-ar pierde.
+            # Reîncercăm mai târziu, poate între timp staff-ul reconfigurează /settickets
+            closed = log_channel is not None and await archive_and_delete(
+                channel, log_channel, f"💤 Ticketul lui <@{user_id}> a fost închis automat pentru inactivitate."
+            )
+            if closed:
+                self.last_activity.pop(channel_id, None)
+            else:
+                if log_channel is None:
+                    print(f"[Ticket] Ticketul inactiv {channel_id} nu e închis: serverul {guild.id} nu are canal de log")
+                self.idle_scheduler.schedule(channel_id, now + IDLE_RETRY)
+            return
+
+        if warned_at is not None:
+            # Cineva a scris după avertizare
+            del info["idle_warned_at"]
+            active_store.mark_dirty()
+
+        if now < last + limit:
+            self.idle_scheduler.schedule(channel_id, last + limit)
+            return
+
+        hours = int(IDLE_GRACE.total_seconds() // 3600)
+        warning = await channel.send(f"⏰ <@{user_id}> Ticketul este inactiv și va fi închis automat peste {hours} ore dacă nu mai scrie nimeni.")
+        info["idle_warned_at"] = warning.created_at.isoformat()
+        active_store.mark_dirty()
+        self.idle_scheduler.schedule(channel_id, warning.created_at + IDLE_GRACE)
 
     @app_commands.command(name="settickets", description="Configurează sistemul de tickete")
-    @app_commands.describe(category="Categoria pentru canale de tickete", log_channel="Canalul pentru loguri", staff_role="Rolul care poate vedea și închide ticketele")
-    async def settickets(self, interaction: discord.Interaction, category: discord.CategoryChannel, log_channel: discord.TextChannel, staff_role: discord.Role):
+    @app_commands.describe(category="Categoria pentru canale de tickete", log_channel="Canalul pentru loguri", staff_role="Rolul care poate vedea și închide ticketele", pool_size="Câte canale ascunse să fie pregătite din timp (0 = dezactivat)", transcript_html="Atașează și o versiune HTML a transcriptului", idle_hours="După câte ore de inactivitate se închide automat un ticket (0 = niciodată)")
+    async def settickets(self, interaction: discord.Interaction, category: discord.CategoryChannel, log_channel: discord.TextChannel, staff_role: discord.Role, pool_size: app_commands.Range[int, 0, 10] = 0, transcript_html: bool = False, idle_hours: app_commands.Range[int, 0, 720] = 0):
         if interaction.user.id != interaction.guild.owner_id:
             await interaction.response.send_message("⛔ Doar owner-ul poate configura ticketele.", ephemeral=True)
             return
 
-        config = load_config()
+        config = config_store.data
+        old_pool = config.get(str(interaction.guild.id), {}).get("pool", [])
         config[str(interaction.guild.id)] = {
             "category_id": category.id,
             "log_channel_id": log_channel.id,
-            "staff_role_id": staff_role.id
+            "staff_role_id": staff_role.id,
+            "pool_size": pool_size,
+            "pool": old_pool,
+            "transcript_html": transcript_html,
+            "idle_hours": idle_hours
         }
-        save_config(config)
+        config_store.mark_dirty()
+        schedule_refill(interaction.guild, category)
+        if idle_hours:
+            # Termenele reale se calculează în callback, pe baza activității
+            now = datetime.now(TZ)
+            for user_id, info in list(tickets.store.data.items()):
+                if info["guild_id"] == interaction.guild.id:
+                    self.idle_scheduler.schedule(info["channel_id"], now)
 
         embed = discord.Embed(
             title="🎫 Creează un Ticket",
@@ -139,12 +379,12 @@ class TicketCog(commands.Cog):
         if interaction.guild.banner:
             embed.set_image(url=interaction.guild.banner.url)
 
-        await interaction.channel.send(embed=embed, view=CreateTicketView(category, log_channel, staff_role))
+        await interaction.channel.send(embed=embed, view=CreateTicketView())
         await interaction.response.send_message("✅ Sistemul de tickete a fost configurat.", ephemeral=True)
 
     @app_commands.command(name="closeticket", description="Închide un ticket")
     async def closeticket(self, interaction: discord.Interaction):
-        config = load_config().get(str(interaction.guild.id))
+        config = config_store.data.get(str(interaction.guild.id))
         if not config:
             await interaction.response.send_message("⚠️ Sistemul de tickete nu este configurat.", ephemeral=True)
             return
@@ -155,16 +395,15 @@ class TicketCog(commands.Cog):
             await interaction.response.send_message("⛔ Doar staff-ul poate închide tickete prin comandă.", ephemeral=True)
             return
 
-        active = load_active()
-        for uid, info in list(active.items()):
-            if info["channel_id"] == interaction.channel.id:
-                del active[uid]
-                save_active(active)
-                break
-
-        await interaction.channel.delete()
         log_channel = interaction.guild.get_channel(config["log_channel_id"])
-        await log_channel.send(f"📨 Ticket închis de {interaction.user.mention} folosind comanda.")
+        if log_channel is None:
+            await interaction.response.send_message(NO_LOG_CHANNEL, ephemeral=True)
+            return
+
+        await interaction.response.send_message("🗂️ Se salvează transcriptul și se închide ticketul...")
+        closed = await archive_and_delete(interaction.channel, log_channel, f"📨 Ticket închis de {interaction.user.mention} folosind comanda.")
+        if not closed:
+            await interaction.followup.send("⚠️ Transcriptul nu a putut fi încărcat; ticketul rămâne deschis.", ephemeral=True)
 
 async def setup(bot):
     await bot.add_cog(TicketCog(bot))
\ No newline at end of file
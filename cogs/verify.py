@@ -1,24 +1,58 @@
+import asyncio
+
 import discord
 from discord.ext import commands
 from discord import app_commands
-import json
-import os
+from utils import storage
 
+REQUIRED_INTENTS = ("guilds", "guild_reactions")
 CONFIG_FILE = "verify_config.json"
 
-def load_config():
-    if not os.path.exists(CONFIG_FILE):
-        return {}
-    with open(CONFIG_FILE, "r") as f:
-        return json.load(f)
+VERIFY_EMOJI = "✅"
+# Câte roluri/DM-uri trimitem în paralel; restul așteaptă în coadă
+VERIFY_WORKERS = 3
+MAX_RETRIES = 3
+
+config_store = storage.open_store(CONFIG_FILE, default=dict)
+
+
+def build_index(config):
+    """message_id -> (guild_id, role_id) pentru toate mesajele de verificare configurate."""
+    return {
+        int(data["message_id"]): (int(guild_id), int(data["role_id"]))
+        for guild_id, data in config.items()
+        if data.get("message_id")
+    }
+
+
+verify_index = build_index(config_store.data)
+
+
+async def with_retry(call):
+    # discord.py așteaptă singur la 429; aici reîncercăm doar erorile trecătoare (5xx / 429 rămase)
+    for attempt in range(MAX_RETRIES):
+        try:
+            return await call()
+        except discord.HTTPException as e:
+            if isinstance(e, discord.Forbidden) or (e.status != 429 and e.status < 500) or attempt == MAX_RETRIES - 1:
+                raise
+            await asyncio.sleep(getattr(e, "retry_after", None) or 2 ** attempt)
 
-def save_config(data):
-    with open(CONFIG_FILE, "w") as f:
-        json.dump(data, f, indent=4)
 
 class VerifyCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.queue = asyncio.Queue()
+        # (guild_id, user_id) deja în coadă, ca reacțiile repetate să nu dubleze munca
+        self.queued = set()
+        self.workers = []
+
+    async def cog_load(self):
+        self.workers = [asyncio.create_task(self.verify_worker()) for _ in range(VERIFY_WORKERS)]
+
+    def cog_unload(self):
+        for worker in self.workers:
+            worker.cancel()
 
     @app_commands.command(name="setverify", description="Configure the verification system")
     @app_commands.describe(channel="The channel where the verification message will be sent", role="The role to assign")
@@ -27,12 +61,13 @@ class VerifyCog(commands.Cog):
             await interaction.response.send_message("⛔ Only the server owner can use this command.", ephemeral=True)
             return
 
-        config = load_config()
+        config = config_store.data
+        old_message_id = config.get(str(interaction.guild.id), {}).get("message_id")
         config[str(interaction.guild.id)] = {
             "channel_id": channel.id,
             "role_id": role.id
         }
-        save_config(config)
+        config_store.mark_dirty()
 
         embed = discord.Embed(
             title="✅ Verification Required",
@@ -50,30 +85,55 @@ class VerifyCog(commands.Cog):
 
         await message.add_reaction("✅")
 
+        verify_index.pop(old_message_id, None)
         config[str(interaction.guild.id)]["message_id"] = message.id
-        save_config(config)
+        config_store.mark_dirty()
+        verify_index[message.id] = (interaction.guild.id, role.id)
 
         await interaction.response.send_message(f"✅ Verification system has been configured in {channel.mention}.", ephemeral=True)
 
     @commands.Cog.listener()
-    async def on_reaction_add(self, reaction: discord.Reaction, user: discord.User):
-        if user.bot:
+    async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent):
+        target = verify_index.get(payload.message_id)
+        if target is None:
+            return
+        guild_id, role_id = target
+        if payload.guild_id != guild_id or str(payload.emoji) != VERIFY_EMOJI:
+            return
+        member = payload.member
+        if member is None or member.bot:
             return
 
-        config = load_config()
-        for guild_id, data in config.items():
-            if str(reaction.message.id) == str(data.get("message_id")):
-                role = reaction.message.guild.get_role(data["role_id"])
-                if role:
-                    member = reaction.message.guild.get_member(user.id)
-                    if member and role not in member.roles:
-                        await member.add_roles(role)
-                        await user.send("✅ You have been successfully verified! Welcome to the server! Now that you’re registered, say hi in the chat!")
-                    else:
-                        await user.send("✅ You are already verified.")
-                else:
-                    await user.send("⚠️ The verification role could not be found.")
-                return
+        key = (guild_id, member.id)
+        if key in self.queued:
+            return
+        self.queued.add(key)
+        self.queue.put_nowait((member, role_id))
+
+    async def verify_worker(self):
+        while True:
+            member, role_id = await self.queue.get()
+            try:
+                await self.verify_member(member, role_id)
+            except Exception as e:
+                print(f"[Verify Error] {member.id}: {e}")
+            finally:
+                self.queued.discard((member.guild.id, member.id))
+                self.queue.task_done()
+
+    async def verify_member(self, member: discord.Member, role_id: int):
+        role = member.guild.get_role(role_id)
+        if role is None:
+            message = "⚠️ The verification role could not be found."
+        elif role in member.roles:
+            message = "✅ You are already verified."
+        else:
+            await with_retry(lambda: member.add_roles(role, reason="Verification"))
+            message = "✅ You have been successfully verified! Welcome to the server! Now that you’re registered, say hi in the chat!"
+        try:
+            await with_retry(lambda: member.send(message))
+        except discord.Forbidden:
+            pass  # DM-uri închise
 
 async def setup(bot):
     await bot.add_cog(VerifyCog(bot))
\ No newline at end of file
@@ -1,31 +1,148 @@
 import discord
 from discord import app_commands
 from discord.ext import commands, tasks
+import aiohttp
+import asyncio
+import functools
 import os
-import json
-from datetime import datetime
+import tempfile
+from datetime import date, datetime, time, timedelta
+import pytz
+from utils import cluster, storage
+from utils.inventory import VPSInventory
+from utils.monitor import HostMonitor
+from utils.scheduler import DeadlineScheduler
+from utils import vps_io
 
+REQUIRED_INTENTS = ("guilds",)
 GUILD_ID = int(os.getenv("GUILD_ID"))
 NOTIFY_ROLE_ID = int(os.getenv("NOTIFY_ROLE_ID"))
+# Cu câte zile înainte de expirare anunțăm (0 = în ziua expirării)
+LEAD_DAYS = sorted({int(d) for d in os.getenv("VPS_NOTIFY_DAYS", "7,1,0").split(",") if d.strip()}, reverse=True)
+NOTIFY_TIME = time(10, 0)
+# Notificările ratate (bot oprit) mai vechi de atât nu mai sunt trimise
+CATCHUP_LIMIT = timedelta(days=3)
+TZ = pytz.timezone("Europe/Bucharest")
+MONITOR_INTERVAL = int(os.getenv("VPS_MONITOR_INTERVAL", "60"))
+MONITOR_CONCURRENCY = int(os.getenv("VPS_MONITOR_CONCURRENCY", "64"))
 vps_data_file = "vps_data.json"
 
-def load_data():
-    if not os.path.exists(vps_data_file):
-        return []
-    with open(vps_data_file, 'r') as f:
-        return json.load(f)
+PER_PAGE = 5
 
-def save_data(data):
-    with open(vps_data_file, 'w') as f:
-        json.dump(data, f, indent=4)
+vps_store = storage.open_store(vps_data_file, default=list, nested=("servers",))
+inventory = VPSInventory(vps_store)
+
+# Multe VPS-uri expiră în aceeași zi, iar TZ.localize e partea scumpă a programării
+@functools.lru_cache(maxsize=4096)
+def notify_at(expiration, lead):
+    return TZ.localize(datetime.combine(expiration - timedelta(days=lead), NOTIFY_TIME))
+
+class VPSPaginator(discord.ui.View):
+    """Embed-urile se construiesc doar pentru paginile vizitate și se păstrează în cache."""
+
+    def __init__(self, query, title):
+        super().__init__(timeout=180)
+        self.query = query
+        self.title = title
+        self.page = 0
+        self.total_pages = (len(query) + PER_PAGE - 1) // PER_PAGE
+        self.cache = {}
+
+    def render(self, page_index):
+        embed = self.cache.get(page_index)
+        if embed is None:
+            embed = discord.Embed(title=f"{self.title} (Pagina {page_index + 1}/{self.total_pages})", color=discord.Color.blue())
+            for entry in self.query.page(page_index, PER_PAGE):
+                embed.add_field(
+                    name=f"VPS #{entry['vps_number']}",
+                    value=f"User: <@{entry['user_id']}>\nExpiră: {entry['expiration']}\nIP: `{entry['ip']}`",
+                    inline=False
+                )
+            self.cache[page_index] = embed
+        return embed
+
+    @discord.ui.button(label="◀️ Înapoi", style=discord.ButtonStyle.blurple)
+    async def back(self, interaction_button: discord.Interaction, button: discord.ui.Button):
+        if self.page > 0:
+            self.page -= 1
+            await interaction_button.response.edit_message(embed=self.render(self.page), view=self)
+
+    @discord.ui.button(label="Înainte ▶️", style=discord.ButtonStyle.blurple)
+    async def next(self, interaction_button: discord.Interaction, button: discord.ui.Button):
+        if self.page < self.total_pages - 1:
+            self.page += 1
+            await interaction_button.response.edit_message(embed=self.render(self.page), view=self)
 
 class VPSCog(commands.Cog):
-    def __init__(self, bot):
+    def __init__(self, bot, pinger=None):
         self.bot = bot
-        self.check_vps_expiry.start()
+        self.expiry_scheduler = DeadlineScheduler(self.check_vps_expiry, TZ)
+        now = datetime.now(TZ)
+        for entry in inventory:
+            self.schedule_expiry(entry, now)
+        inventory.listeners.append(self.on_remote_vps)
+        monitor_options = {"concurrency": MONITOR_CONCURRENCY}
+        if pinger is not None:
+            monitor_options["pinger"] = pinger
+        self.monitor = HostMonitor(**monitor_options)
+
+    async def cog_load(self):
+        # Într-un cluster, buclele rulează doar în procesul care primește evenimentele serverului principal
+        if not cluster.owns_guild(GUILD_ID):
+            return
+        self.expiry_scheduler.start()
+        self.monitor_vps.start()
 
     def cog_unload(self):
-        self.check_vps_expiry.cancel()
+        inventory.listeners.remove(self.on_remote_vps)
+        self.expiry_scheduler.stop()
+        self.monitor_vps.cancel()
+        self.monitor.close()
+
+    def schedule_expiry(self, entry, now=None):
+        """Programează următoarea avertizare nefăcută pentru un VPS (sau una ratată la restart).
+
+        Doar o avertizare per VPS stă în scheduler; următoarea e programată când aceasta e trimisă.
+        """
+        now = now or datetime.now(TZ)
+        notified = entry.setdefault("notified", [])
+        # Formatul e deja validat la adăugare; fromisoformat e mult mai ieftin decât strptime
+        expiration = date.fromisoformat(entry["expiration"])
+        overdue = []
+        upcoming = None
+        # LEAD_DAYS e descrescător, deci termenele vin în ordine cronologică
+        for lead in LEAD_DAYS:
+            if lead in notified:
+                continue
+            when = notify_at(expiration, lead)
+            if when > now:
+                upcoming = (lead, when)
+                break
+            if now - when <= CATCHUP_LIMIT:
+                overdue.append(lead)
+            else:
+                notified.append(lead)
+
+        if overdue:
+            # Dintre avertizările ratate o trimitem doar pe cea mai urgentă
+            lead = min(overdue)
+            notified.extend(l for l in overdue if l != lead)
+            self.expiry_scheduler.schedule(entry["vps_number"], now, (lead, entry))
+        elif upcoming is not None:
+            lead, when = upcoming
+            self.expiry_scheduler.schedule(entry["vps_number"], when, (lead, entry))
+        else:
+            self.expiry_scheduler.cancel(entry["vps_number"])
+
+    def unschedule_expiry(self, vps_number):
+        self.expiry_scheduler.cancel(vps_number)
+
+    def on_remote_vps(self, vps_number, entry):
+        # VPS adăugat, prelungit sau șters de alt proces din cluster
+        if entry is None:
+            self.unschedule_expiry(vps_number)
+        else:
+            self.schedule_expiry(entry)
 
     @app_commands.command(name="addvps", description="Adaugă un VPS nou")
     @app_commands.describe(user="ID utilizator", expiration="Data expirării", added_by="ID adăugător", ip="IP VPS")
@@ -37,14 +154,14 @@ class VPSCog(commands.Cog):
 
         try:
             expire_date = datetime.strptime(expiration, "%Y-%m-%d").date()
-            vps_number = len(load_data()) + 1
         except ValueError:
             await interaction.response.send_message("Format dată invalid.", ephemeral=True)
             return
 
-        data = load_data()
-        data.append({"user_id": user, "expiration": str(expire_date), "added_by": added_by, "vps_number": vps_number, "ip": ip})
-        save_data(data)
+        vps_number = inventory.next_number()
+        entry = {"user_id": user, "expiration": str(expire_date), "added_by": added_by, "vps_number": vps_number, "ip": ip}
+        inventory.add(entry)
+        self.schedule_expiry(entry)
 
         embed = discord.Embed(title="VPS Adăugat", color=discord.Color.green())
         embed.add_field(name="Deținător", value=user)
@@ -55,46 +172,29 @@ class VPSCog(commands.Cog):
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
     @app_commands.command(name="vps", description="Afișează toate VPS-urile")
-    async def vps(self, interaction: discord.Interaction):
-        data = load_data()
-        if not data:
+    @app_commands.describe(owner="Doar VPS-urile acestui utilizator", expira_in="Doar VPS-urile care expiră în următoarele N zile")
+    async def vps(self, interaction: discord.Interaction, owner: discord.User = None, expira_in: app_commands.Range[int, 0, 3650] = None):
+        expires_from = expires_until = None
+        if expira_in is not None:
+            today = datetime.now(TZ).date()
+            expires_from, expires_until = str(today), str(today + timedelta(days=expira_in))
+        query = inventory.query(owner=str(owner.id) if owner else None, expires_from=expires_from, expires_until=expires_until)
+        if not len(query):
             await interaction.response.send_message("Nu există VPS-uri.")
             return
 
-        per_page = 5
-        pages = [data[i:i + per_page] for i in range(0, len(data), per_page)]
-        total_pages = len(pages)
-
-        def create_embed(page_index):
-            page_data = pages[page_index]
-            embed = discord.Embed(title=f"VPS-uri (Pagina {page_index + 1}/{total_pages})", color=discord.Color.blue())
-            for entry in page_data:
-                embed.add_field(
-                    name=f"VPS #{entry['vps_number']}",
-                    value=f"User: <@{entry['user_id']}>\nExpiră: {entry['expiration']}\nIP: `{entry['ip']}`",
-                    inline=False
-                )
-            return embed
-
-        class Paginator(discord.ui.View):
-            def __init__(self):
-                super().__init__(timeout=180)
-                self.page = 0
-
-            @discord.ui.button(label="◀️ Înapoi", style=discord.ButtonStyle.blurple)
-            async def back(self, interaction_button: discord.Interaction, button: discord.ui.Button):
-                if self.page > 0:
-                    self.page -= 1
-                    await interaction_button.response.edit_message(embed=create_embed(self.page), view=self)
+        view = VPSPaginator(query, "VPS-uri")
+        await interaction.response.send_message(embed=view.render(0), view=view)
 
-            @discord.ui.button(label="Înainte ▶️", style=discord.ButtonStyle.blurple)
-            async def next(self, interaction_button: discord.Interaction, button: discord.ui.Button):
-                if self.page < total_pages - 1:
-                    self.page += 1
-                    await interaction_button.response.edit_message(embed=create_embed(self.page), view=self)
+    @app_commands.command(name="myvps", description="Afișează VPS-urile tale")
+    async def myvps(self, interaction: discord.Interaction):
+        query = inventory.query(owner=str(interaction.user.id))
+        if not len(query):
+            await interaction.response.send_message("Nu ai niciun VPS.", ephemeral=True)
+            return
 
-        view = Paginator()
-        await interaction.response.send_message(embed=create_embed(0), view=view)
+        view = VPSPaginator(query, "VPS-urile tale")
+        await interaction.response.send_message(embed=view.render(0), view=view, ephemeral=True)
 
     @app_commands.command(name="renewvps", description="Prelungește un VPS")
     @app_commands.describe(vps_number="Număr VPS", new_expiration="Noua dată (YYYY-MM-DD)")
@@ -110,15 +210,15 @@ class VPSCog(commands.Cog):
             await interaction.response.send_message("Dată invalidă.", ephemeral=True)
             return
 
-        data = load_data()
-        for entry in data:
-            if entry["vps_number"] == vps_number:
-                entry["expiration"] = str(new_date)
-                save_data(data)
-                await interaction.response.send_message(f"VPS #{vps_number} prelungit.", ephemeral=True)
-                return
+        entry = inventory.get(vps_number)
+        if entry is None:
+            await interaction.response.send_message("VPS negăsit.", ephemeral=True)
+            return
 
-        await interaction.response.send_message("VPS negăsit.", ephemeral=True)
+        inventory.set_expiration(entry, str(new_date))
+        entry["notified"] = []
+        self.schedule_expiry(entry)
+        await interaction.response.send_message(f"VPS #{vps_number} prelungit.", ephemeral=True)
 
     @app_commands.command(name="removevps", description="Șterge un VPS")
     @app_commands.describe(vps_number="Număr VPS de șters")
@@ -128,27 +228,180 @@ class VPSCog(commands.Cog):
             await interaction.response.send_message("Nu ai permisiunea.", ephemeral=True)
             return
 
-        data = load_data()
-        new_data = [entry for entry in data if entry.get("vps_number") != vps_number]
-
-        if len(data) == len(new_data):
+        if inventory.remove(vps_number) is None:
             await interaction.response.send_message("VPS negăsit.", ephemeral=True)
         else:
-            save_data(new_data)
+            self.unschedule_expiry(vps_number)
             await interaction.response.send_message("VPS șters cu succes.", ephemeral=True)
 
-    @tasks.loop(hours=24)
-    async def check_vps_expiry(self):
-        today = datetime.now().date()
-        data = load_data()
-        guild = self.bot.get_guild(GUILD_ID)
-        channel = discord.utils.get(guild.text_channels, name="notificari-vps")
-        role = guild.get_role(NOTIFY_ROLE_ID)
-
-        for entry in data:
-            exp_date = datetime.strptime(entry["expiration"], "%Y-%m-%d").date()
-            if exp_date == today:
+    @app_commands.command(name="vpsimport", description="Importă VPS-uri dintr-un fișier CSV sau JSONL")
+    @app_commands.describe(fisier="CSV cu antetul user_id,expiration,added_by,ip sau JSONL cu aceleași câmpuri")
+    async def vpsimport(self, interaction: discord.Interaction, fisier: discord.Attachment):
+        notify_role = discord.utils.get(interaction.guild.roles, id=NOTIFY_ROLE_ID)
+        if notify_role not in interaction.user.roles:
+            await interaction.response.send_message("Nu ai permisiunea.", ephemeral=True)
+            return
+
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        report = vps_io.new_report()
+
+        with tempfile.TemporaryFile("w+b") as raw:
+            # Descărcăm pe bucăți pe disc, nu tot fișierul în memorie; scrierile merg pe thread
+            try:
+                async with aiohttp.ClientSession() as session:
+                    async with session.get(fisier.url) as resp:
+                        resp.raise_for_status()
+                        async for chunk in resp.content.iter_chunked(64 * 1024):
+                            await asyncio.to_thread(raw.write, chunk)
+            except aiohttp.ClientError as e:
+                print(f"[VPS Import Error]: {e}")
+                await interaction.followup.send("Nu am putut descărca fișierul. Încearcă din nou.", ephemeral=True)
+                return
+            raw.seek(0)
+
+            try:
+                with open(raw.fileno(), "r", encoding="utf-8-sig", newline="", closefd=False) as f:
+                    batches = vps_io.import_batches(f, vps_io.detect_format(fisier.filename), str(interaction.user.id), inventory.by_ip, report)
+                    # Parsarea fiecărui lot rulează pe thread, salvarea lotului pe loop
+                    while batch := await asyncio.to_thread(next, batches, None):
+                        for entry in batch:
+                            entry["vps_number"] = inventory.next_number()
+                        inventory.add_many(batch)
+                        for entry in batch:
+                            self.schedule_expiry(entry)
+                        report["imported"] += len(batch)
+            except UnicodeDecodeError:
+                # Loturile de dinainte de eroare rămân importate
+                await interaction.followup.send(
+                    f"Fișierul nu este text UTF-8 valid. Importate înainte de eroare: {report['imported']}.",
+                    ephemeral=True
+                )
+                return
+
+        embed = discord.Embed(title="Import VPS", color=discord.Color.green() if not report["errors"] else discord.Color.orange())
+        embed.add_field(name="Importate", value=str(report["imported"]))
+        embed.add_field(name="Duplicate (IP)", value=str(report["duplicates"]))
+        embed.add_field(name="Invalide", value=str(report["errors"]))
+        if report["error_samples"]:
+            embed.add_field(
+                name="Primele erori",
+                value="\n".join(f"Linia {line}: {reason}" for line, reason in report["error_samples"]),
+                inline=False
+            )
+        await interaction.followup.send(embed=embed, ephemeral=True)
+
+    @app_commands.command(name="vpsexport", description="Exportă toate VPS-urile ca fișier")
+    @app_commands.describe(format="Formatul fișierului")
+    @app_commands.choices(format=[app_commands.Choice(name="CSV", value="csv"), app_commands.Choice(name="JSONL", value="jsonl")])
+    async def vpsexport(self, interaction: discord.Interaction, format: str = "csv"):
+        notify_role = discord.utils.get(interaction.guild.roles, id=NOTIFY_ROLE_ID)
+        if notify_role not in interaction.user.roles:
+            await interaction.response.send_message("Nu ai permisiunea.", ephemeral=True)
+            return
+
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        # Doar referințele la intrări; scrierea fișierului se face pe thread
+        entries = list(inventory)
+        with tempfile.TemporaryFile("w+", encoding="utf-8", newline="") as f:
+            await asyncio.to_thread(vps_io.write_export, entries, f, format)
+            f.seek(0)
+            await interaction.followup.send(file=discord.File(f.buffer, filename=f"vps_export.{format}"), ephemeral=True)
+
+    @app_commands.command(name="vpsstatus", description="Afișează starea și latența VPS-urilor")
+    @app_commands.describe(vps_number="Număr VPS (opțional)")
+    async def vpsstatus(self, interaction: discord.Interaction, vps_number: int = None):
+        hosts = self.monitor.hosts
+        if vps_number is not None:
+            state = hosts.get(vps_number)
+            if state is None:
+                await interaction.response.send_message("VPS negăsit sau încă nemonitorizat.", ephemeral=True)
+                return
+            p50, p90, p99 = state.ring.percentiles(50, 90, 99)
+            embed = discord.Embed(
+                title=f"VPS #{vps_number} — {'🟢 online' if state.up else '🔴 offline'}",
+                color=discord.Color.green() if state.up else discord.Color.red()
+            )
+            embed.add_field(name="IP", value=f"`{state.ip}`")
+            embed.add_field(name="Pierderi", value=f"{state.ring.loss() * 100:.1f}%")
+            embed.add_field(
+                name="Latență (ms)",
+                value="Fără răspunsuri." if p50 is None else f"p50 {p50:.1f} · p90 {p90:.1f} · p99 {p99:.1f}",
+                inline=False
+            )
+            embed.set_footer(text=f"Ultimele {state.ring.count} măsurători, la fiecare {MONITOR_INTERVAL}s")
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            return
+
+        down = [(number, state) for number, state in hosts.items() if state.up is False]
+        embed = discord.Embed(title="Stare VPS-uri", color=discord.Color.red() if down else discord.Color.green())
+        embed.add_field(name="Monitorizate", value=str(len(hosts)))
+        embed.add_field(name="Online", value=str(sum(1 for state in hosts.values() if state.up)))
+        embed.add_field(name="Offline", value=str(len(down)))
+        if down:
+            embed.add_field(
+                name="VPS-uri offline",
+                value="\n".join(f"VPS #{number} `{state.ip}`" for number, state in sorted(down)[:20]),
+                inline=False
+            )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @tasks.loop(seconds=MONITOR_INTERVAL)
+    async def monitor_vps(self):
+        # O excepție scăpată din tasks.loop oprește bucla definitiv, deci nu lăsăm niciuna să iasă
+        try:
+            targets = {entry["vps_number"]: entry["ip"] for entry in inventory if entry.get("ip")}
+            transitions = await self.monitor.sweep(targets)
+            if not transitions:
+                return
+
+            guild = self.bot.get_guild(GUILD_ID)
+            channel = discord.utils.get(guild.text_channels, name="notificari-vps") if guild else None
+            if channel is None:
+                print(f"[VPS Monitor] Canalul notificari-vps lipsește; {len(transitions)} schimbări nu au fost anunțate.")
+                return
+            role = guild.get_role(NOTIFY_ROLE_ID)
+            mention = f"{role.mention}\n" if role else ""
+            lines = [
+                f"🟢 VPS #{number} (`{state.ip}`) răspunde din nou." if state.up
+                else f"🔴 VPS #{number} (`{state.ip}`) nu mai răspunde la ping."
+                for number, state in transitions
+            ]
+            # Un singur mesaj per rundă, chiar dacă pică multe VPS-uri deodată
+            await channel.send(mention + "\n".join(lines)[:1900])
+        except Exception as e:
+            print(f"[VPS Monitor Error]: {e}")
+
+    @monitor_vps.before_loop
+    async def before_monitor_vps(self):
+        await self.bot.wait_until_ready()
+
+    async def check_vps_expiry(self, vps_number, when, payload):
+        lead, entry = payload
+        await self.bot.wait_until_ready()
+        expiration = entry["expiration"]
+        try:
+            guild = self.bot.get_guild(GUILD_ID)
+            channel = discord.utils.get(guild.text_channels, name="notificari-vps")
+            role = guild.get_role(NOTIFY_ROLE_ID)
+
+            # Textul urmează zilele rămase acum: o avertizare recuperată după restart poate fi întârziată
+            days = (date.fromisoformat(entry["expiration"]) - datetime.now(TZ).date()).days
+            if days < 0:
+                await channel.send(f"{role.mention}, VPS #{entry['vps_number']} deținut de <@{entry['user_id']}> a expirat pe {entry['expiration']}!")
+            elif days == 0:
                 await channel.send(f"{role.mention}, VPS #{entry['vps_number']} deținut de <@{entry['user_id']}> expiră azi!")
+            elif days == 1:
+                await channel.send(f"{role.mention}, VPS #{entry['vps_number']} deținut de <@{entry['user_id']}> expiră mâine ({entry['expiration']})!")
+            else:
+                await channel.send(f"{role.mention}, VPS #{entry['vps_number']} deținut de <@{entry['user_id']}> expiră în {days} zile ({entry['expiration']}).")
+        finally:
+            # Dacă în timpul trimiterii VPS-ul a fost șters sau reînnoit, /renewvps a refăcut deja
+            # programarea și avertizările trimise; nu marcăm avertizarea pentru noua dată
+            if inventory.get(vps_number) is entry and entry["expiration"] == expiration:
+                # Și dacă trimiterea eșuează, trecem la următoarea avertizare a VPS-ului
+                entry.setdefault("notified", []).append(lead)
+                vps_store.mark_dirty()
+                self.schedule_expiry(entry)
 
 async def setup(bot):
     await bot.add_cog(VPSCog(bot))
@@ -0,0 +1,92 @@
+"""Pornește botul ca cluster: N procese worker, fiecare un AutoShardedBot pe un interval de shard-uri.
+
+Rulare: python launcher.py
+  CLUSTER_COUNT  câte procese (implicit numărul de nuclee)
+  SHARD_COUNT    câte shard-uri în total (implicit cât recomandă Discord)
+
+Workerii folosesc backend-ul sqlite (SHARED_DB, implicit cluster.db) pentru stările
+comune. Un worker care moare este repornit după RESTART_DELAY secunde.
+"""
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import aiohttp
+from dotenv import load_dotenv
+
+from utils.cluster import shard_ranges
+
+load_dotenv()
+
+TOKEN = os.getenv("DISCORD_TOKEN")
+CLUSTER_COUNT = int(os.getenv("CLUSTER_COUNT", str(os.cpu_count() or 1)))
+RESTART_DELAY = 5.0
+# Discord acceptă un IDENTIFY la 5 secunde (max_concurrency = 1); eșalonăm pornirea workerilor
+IDENTIFY_INTERVAL = 5.0
+
+
+async def recommended_shards(token):
+    async with aiohttp.ClientSession() as session:
+        async with session.get("https://discord.com/api/v10/gateway/bot", headers={"Authorization": f"Bot {token}"}) as response:
+            response.raise_for_status()
+            return (await response.json())["shards"]
+
+
+def worker_env(cluster_id, cluster_count, shard_count):
+    return dict(
+        os.environ,
+        CLUSTER_ID=str(cluster_id),
+        CLUSTER_COUNT=str(cluster_count),
+        SHARD_COUNT=str(shard_count),
+        STORAGE_BACKEND="sqlite",
+    )
+
+
+def run_cluster(command, cluster_count, shard_count):
+    ranges = shard_ranges(shard_count, cluster_count)
+    processes = {}
+    stopping = False
+
+    def start(cluster_id):
+        print(f"🚀 Cluster {cluster_id}: shard-urile {ranges[cluster_id][0]}-{ranges[cluster_id][-1]} din {shard_count}")
+        processes[cluster_id] = subprocess.Popen(command, env=worker_env(cluster_id, cluster_count, shard_count))
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for process in processes.values():
+            if process.poll() is None:
+                process.terminate()
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    for cluster_id in range(cluster_count):
+        start(cluster_id)
+        if cluster_id + 1 < cluster_count:
+            time.sleep(IDENTIFY_INTERVAL * len(ranges[cluster_id]))
+
+    while not stopping:
+        for cluster_id, process in list(processes.items()):
+            code = process.poll()
+            if code is not None and not stopping:
+                print(f"⚠️ Cluster {cluster_id} s-a oprit (cod {code}); repornire în {RESTART_DELAY:.0f}s")
+                time.sleep(RESTART_DELAY)
+                start(cluster_id)
+        time.sleep(1)
+
+    for process in processes.values():
+        process.wait()
+
+
+def main():
+    shard_count = int(os.getenv("SHARD_COUNT") or 0) or asyncio.run(recommended_shards(TOKEN))
+    cluster_count = max(1, min(CLUSTER_COUNT, shard_count))
+    run_cluster([sys.executable, "main.py"], cluster_count, shard_count)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,28 @@
 import discord
 from discord.ext import commands
 from dotenv import load_dotenv
+import asyncio
+import atexit
+import hashlib
+import json
 import os
+import time
+from utils import cluster, metrics, storage
+from utils.gateway import GATEWAY_MODE, client_options
+from utils.watchdog import LoopWatchdog
+
+STARTED = time.perf_counter()
 
 load_dotenv()
 
 TOKEN = os.getenv("DISCORD_TOKEN")
+# Canalul staff unde ajung blocajele buclei; fără el rămân doar în watchdog.log
+WATCHDOG_CHANNEL_ID = int(os.getenv("WATCHDOG_CHANNEL_ID", "0"))
+# Același loc din cod nu e raportat pe canal mai des de atât (secunde)
+STALL_REPORT_COOLDOWN = 300
 
-intents = discord.Intents.all()
-bot = commands.Bot(command_prefix="!", intents=intents)
+# Hash-ul arborelui de comenzi sincronizat ultima dată; sync doar când se schimbă
+bot_state_store = storage.open_store("bot_state.json", default=dict)
 
 initial_extensions = [
     "cogs.vps",
@@ -20,29 +34,150 @@ initial_extensions = [
     "cogs.donat"
 ]
 
-async def load_extensions():
-    for ext in initial_extensions:
+
+def elapsed_ms(since):
+    return (time.perf_counter() - since) * 1000
+
+
+class Bot(commands.AutoShardedBot):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.timeline = []
+        self.ready_ms = None
+        self.metrics_runner = None
+        # Listener original -> varianta cronometrată, ca remove_listener să o găsească la unload
+        self.timed_listeners = {}
+        self.watchdog = LoopWatchdog()
+        self.stall_reported_at = {}
+
+    async def setup_hook(self):
+        # Rulează o singură dată, după login și înainte de gateway; reconectările nu îl mai apelează
+        self.timeline.append(("login", elapsed_ms(STARTED)))
+        # Pornit primul, ca să prindă și încărcările lente de extensii
+        self.watchdog.start(self.report_stall)
+        storage.start_sync()
+        await self.start_metrics()
+        await self.load_extensions()
+        # Comenzile sunt globale; într-un cluster le sincronizează doar primul proces
+        if cluster.is_primary():
+            await self.sync_tree()
+        for step, ms in self.timeline:
+            print(f"⏱️ {step:<24} {ms:>8.0f} ms")
+
+    async def start_metrics(self):
+        if not metrics.METRICS_PORT:
+            return
+        port = metrics.METRICS_PORT + cluster.CLUSTER_ID
+        try:
+            self.metrics_runner = await metrics.start_server(port)
+            print(f"📈 Metrics on http://{metrics.METRICS_HOST}:{port}/metrics")
+        except OSError as e:
+            print(f"❌ Metrics server error: {e}")
+
+    async def report_stall(self, incident):
+        print(f"🐢 Event loop blocked {incident['lag'] * 1000:.0f} ms at {incident['where']}")
+        if not WATCHDOG_CHANNEL_ID or not self.is_ready():
+            return
+        now = time.monotonic()
+        if now - self.stall_reported_at.get(incident["where"], -STALL_REPORT_COOLDOWN) < STALL_REPORT_COOLDOWN:
+            return
+        channel = self.get_channel(WATCHDOG_CHANNEL_ID)
+        if channel is None:
+            return
+        self.stall_reported_at[incident["where"]] = now
+        stack = "".join(incident["stack"][-8:])[-1500:] or "stivă indisponibilă"
+        embed = discord.Embed(
+            title="🐢 Bucla botului a fost blocată",
+            description=f"**{incident['lag'] * 1000:.0f} ms** la {incident['at']} (cluster {cluster.CLUSTER_ID})\n```\n{stack}\n```",
+            color=discord.Color.orange()
+        )
+        embed.set_footer(text=incident["where"][:200])
+        await channel.send(embed=embed)
+
+    # Toate comenzile și listenerele din cog-uri trec pe aici, deci le cronometrăm fără modificări în cog-uri
+    async def add_cog(self, cog, **kwargs):
+        await super().add_cog(cog, **kwargs)
+        for command in cog.walk_app_commands():
+            if isinstance(command, discord.app_commands.Command):
+                metrics.instrument_command(command)
+
+    def add_listener(self, func, /, name=discord.utils.MISSING):
+        name = func.__name__ if name is discord.utils.MISSING else name
+        timed = metrics.instrument_listener(func, name)
+        self.timed_listeners[(func, name)] = timed
+        super().add_listener(timed, name)
+
+    def remove_listener(self, func, /, name=discord.utils.MISSING):
+        name = func.__name__ if name is discord.utils.MISSING else name
+        super().remove_listener(self.timed_listeners.pop((func, name), func), name)
+
+    async def load_extension_timed(self, ext):
+        start = time.perf_counter()
         try:
-            await bot.load_extension(ext)
+            await self.load_extension(ext)
             print(f"✅ Loaded {ext}")
         except Exception as e:
             print(f"❌ Error loading {ext}: {e}")
+        self.timeline.append((ext, elapsed_ms(start)))
 
-@bot.event
-async def on_ready():
-    print(f"✅ Logged in as {bot.user}")
+    async def load_extensions(self):
+        # Extensiile nu depind una de alta; partea async (setup, cog_load) se suprapune
+        start = time.perf_counter()
+        await asyncio.gather(*(self.load_extension_timed(ext) for ext in initial_extensions))
+        self.timeline.append(("extensions total", elapsed_ms(start)))
 
-    await bot.change_presence(
-        status=discord.Status.online,
-        activity=discord.Game(name="🎮 byteshield.biz!")
-    )
+    def tree_hash(self):
+        commands_payload = sorted(
+            (command.to_dict(self.tree) for command in self.tree.get_commands()),
+            key=lambda payload: (payload.get("type", 1), payload["name"])
+        )
+        payload = json.dumps([self.application_id, commands_payload], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def sync_tree(self):
+        start = time.perf_counter()
+        current = self.tree_hash()
+        if bot_state_store.data.get("tree_hash") == current:
+            print("🔁 Slash commands unchanged, sync skipped.")
+            self.timeline.append(("tree sync (skipped)", elapsed_ms(start)))
+            return
+        try:
+            synced = await self.tree.sync()
+            print(f"🔁 Synced {len(synced)} slash commands.")
+        except Exception as e:
+            print(f"❌ Sync error: {e}")
+            return
+        bot_state_store.data["tree_hash"] = current
+        bot_state_store.mark_dirty()
+        self.timeline.append(("tree sync", elapsed_ms(start)))
 
-    await load_extensions()
+    async def close(self):
+        # Scriem pe disc tot ce a rămas nesalvat înainte de deconectare
+        self.watchdog.stop()
+        await storage.flush_all()
+        if self.metrics_runner is not None:
+            await self.metrics_runner.cleanup()
+        await super().close()
 
-    try:
-        synced = await bot.tree.sync()
-        print(f"🔁 Synced {len(synced)} slash commands.")
-    except Exception as e:
-        print(f"❌ Sync error: {e}")
 
-bot.run(TOKEN)
\ No newline at end of file
+shard_options = {"shard_ids": cluster.shard_ids(), "shard_count": cluster.SHARD_COUNT} if cluster.enabled() else {}
+bot = Bot(
+    command_prefix="!",
+    **client_options(GATEWAY_MODE, initial_extensions),
+    **shard_options,
+    http_trace=metrics.http_trace(),
+    # Prezența se trimite la IDENTIFY, fără apel separat la fiecare on_ready
+    status=discord.Status.online,
+    activity=discord.Game(name="🎮 byteshield.biz!")
+)
+atexit.register(storage.flush_all_sync)
+
+@bot.event
+async def on_ready():
+    if bot.ready_ms is None:
+        bot.ready_ms = elapsed_ms(STARTED)
+        print(f"⏱️ {'ready':<24} {bot.ready_ms:>8.0f} ms")
+    print(f"✅ Logged in as {bot.user}")
+
+if __name__ == "__main__":
+    bot.run(TOKEN)
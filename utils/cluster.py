@@ -0,0 +1,42 @@
+import os
+
+# Setate de launcher.py pentru fiecare proces worker; lipsesc când botul rulează singur
+CLUSTER_ID = int(os.getenv("CLUSTER_ID", "0"))
+CLUSTER_COUNT = int(os.getenv("CLUSTER_COUNT", "1"))
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", "0")) or None
+
+
+def shard_for(guild_id, shard_count):
+    """Formula Discord: pe ce shard vin evenimentele unui server."""
+    return (int(guild_id) >> 22) % shard_count
+
+
+def shard_ranges(shard_count, cluster_count):
+    """Împarte shard-urile 0..shard_count-1 în intervale continue, câte unul per proces."""
+    base, extra = divmod(shard_count, cluster_count)
+    ranges, start = [], 0
+    for cluster_id in range(cluster_count):
+        size = base + (1 if cluster_id < extra else 0)
+        ranges.append(list(range(start, start + size)))
+        start += size
+    return ranges
+
+
+def enabled():
+    return SHARD_COUNT is not None
+
+
+def shard_ids():
+    return shard_ranges(SHARD_COUNT, CLUSTER_COUNT)[CLUSTER_ID] if enabled() else None
+
+
+def owns_guild(guild_id):
+    """True dacă evenimentele serverului ajung în procesul curent (mereu True fără cluster)."""
+    if not enabled():
+        return True
+    return shard_for(guild_id, SHARD_COUNT) in shard_ids()
+
+
+def is_primary():
+    # Sarcini fără server asociat (ex. sync-ul comenzilor globale) rulează doar în clusterul 0
+    return CLUSTER_ID == 0
@@ -0,0 +1,381 @@
+import heapq
+import math
+import re
+import unicodedata
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict, deque
+
+# Ponderea fiecărui câmp în scor (BM25F simplificat)
+FIELD_WEIGHTS = {"keywords": 3.0, "question": 1.5, "answer": 1.0}
+K1 = 1.2
+B = 0.75
+# Termenii incompleți ("colo" -> "colocare") contează mai puțin decât potrivirile exacte
+PREFIX_WEIGHT = 0.5
+MAX_PREFIX_EXPANSIONS = 20
+# Articolul hotărât lipit de cuvânt ("colocarea", "serverul"), tăiat la potrivirea automată
+ARTICLE_SUFFIXES = ("ului", "lor", "lui", "ul", "le", "a")
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def fold(text):
+    """Litere mici, fără diacritice (ă/â/î/ș/ț și variantele cu sedilă)."""
+    text = text.lower()
+    if text.isascii():
+        return text
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(fold(text))
+
+
+class FAQIndex:
+    """Index inversat peste FAQ-uri, actualizat incremental la adăugare/ștergere."""
+
+    def __init__(self, entries=()):
+        self.entries = {}
+        self.postings = defaultdict(dict)
+        self.doc_len = {}
+        self.total_len = 0.0
+        self.vocabulary = []
+        for entry in entries:
+            self.add(entry)
+
+    def _weighted_terms(self, entry):
+        terms = Counter()
+        for keyword in entry.get("keywords", []):
+            for token in tokenize(keyword):
+                terms[token] += FIELD_WEIGHTS["keywords"]
+        for token in tokenize(entry.get("question", "")):
+            terms[token] += FIELD_WEIGHTS["question"]
+        for token in tokenize(entry.get("answer", "")):
+            terms[token] += FIELD_WEIGHTS["answer"]
+        return terms
+
+    def add(self, entry):
+        faq_id = entry["id"]
+        if faq_id in self.entries:
+            self.remove(faq_id)
+        terms = self._weighted_terms(entry)
+        self.entries[faq_id] = entry
+        self.doc_len[faq_id] = length = sum(terms.values())
+        self.total_len += length
+        for term, weight in terms.items():
+            if term not in self.postings:
+                insort(self.vocabulary, term)
+            self.postings[term][faq_id] = weight
+
+    def remove(self, faq_id):
+        entry = self.entries.pop(faq_id, None)
+        if entry is None:
+            return None
+        self.total_len -= self.doc_len.pop(faq_id)
+        for term in self._weighted_terms(entry):
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            posting.pop(faq_id, None)
+            if not posting:
+                del self.postings[term]
+                del self.vocabulary[bisect_left(self.vocabulary, term)]
+        return entry
+
+    def _expand(self, term):
+        expansions = []
+        if term in self.postings:
+            expansions.append((term, 1.0))
+        start = bisect_left(self.vocabulary, term)
+        for candidate in self.vocabulary[start:start + MAX_PREFIX_EXPANSIONS + 1]:
+            if not candidate.startswith(term):
+                break
+            if candidate != term:
+                expansions.append((candidate, PREFIX_WEIGHT))
+        return expansions
+
+    def search(self, query, limit=5):
+        if not self.entries:
+            return []
+        n = len(self.entries)
+        avg_len = self.total_len / n
+        scores = defaultdict(float)
+
+        for term in set(tokenize(query)):
+            for candidate, boost in self._expand(term):
+                posting = self.postings[candidate]
+                idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+                for faq_id, tf in posting.items():
+                    norm = tf + K1 * (1 - B + B * self.doc_len[faq_id] / avg_len)
+                    scores[faq_id] += boost * idf * tf * (K1 + 1) / norm
+
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+        return [self.entries[faq_id] for faq_id, _ in best]
+
+
+def trigrams(term):
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class _TrieNode:
+    __slots__ = ("label", "children", "ids")
+
+    def __init__(self, label=""):
+        self.label = label
+        self.children = {}
+        self.ids = set()
+
+
+def _common_prefix(a, b):
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
+
+
+class FAQSuggester:
+    """Sugestii pentru autocomplete: trie pe prefixe + index de trigrame pentru greșeli de tipar.
+
+    Trie-ul e comprimat (radix): lanțurile fără ramificații sunt o singură muchie,
+    altfel întrebările lungi ar crea câte un nod pe caracter.
+    """
+
+    # Scorul minim (Jaccard pe trigrame) ca un termen să fie considerat o greșeală de tipar
+    MIN_SIMILARITY = 0.3
+
+    def __init__(self, entries=()):
+        self.root = _TrieNode()
+        self.keys = {}
+        self.term_ids = defaultdict(set)
+        self.term_grams = {}
+        self.trigram_terms = defaultdict(set)
+        for entry in entries:
+            self.add(entry)
+
+    def _keys_for(self, entry):
+        keys = {fold(entry.get("question", "")).strip()}
+        keys.update(fold(keyword).strip() for keyword in entry.get("keywords", []))
+        keys.update(tokenize(entry.get("question", "")))
+        keys.discard("")
+        return keys
+
+    def _terms_for(self, entry):
+        terms = set(tokenize(entry.get("question", "")))
+        for keyword in entry.get("keywords", []):
+            terms.update(tokenize(keyword))
+        return terms
+
+    def add(self, entry):
+        faq_id = entry["id"]
+        self.remove(faq_id)
+        keys = self._keys_for(entry)
+        self.keys[faq_id] = (keys, self._terms_for(entry))
+        for key in keys:
+            self._insert(key, faq_id)
+        for term in self.keys[faq_id][1]:
+            if term not in self.term_ids:
+                grams = trigrams(term)
+                self.term_grams[term] = len(grams)
+                for gram in grams:
+                    self.trigram_terms[gram].add(term)
+            self.term_ids[term].add(faq_id)
+
+    def remove(self, faq_id):
+        indexed = self.keys.pop(faq_id, None)
+        if indexed is None:
+            return
+        keys, terms = indexed
+        for key in keys:
+            self._delete(key, faq_id)
+        for term in terms:
+            ids = self.term_ids[term]
+            ids.discard(faq_id)
+            if not ids:
+                del self.term_ids[term]
+                del self.term_grams[term]
+                for gram in trigrams(term):
+                    self.trigram_terms[gram].discard(term)
+                    if not self.trigram_terms[gram]:
+                        del self.trigram_terms[gram]
+
+    def _insert(self, key, faq_id):
+        node = self.root
+        while key:
+            child = node.children.get(key[0])
+            if child is None:
+                child = node.children[key[0]] = _TrieNode(key)
+                node = child
+                break
+            common = _common_prefix(key, child.label)
+            if common < len(child.label):
+                # Spargem muchia în punctul unde cheia diverge
+                middle = _TrieNode(child.label[:common])
+                child.label = child.label[common:]
+                middle.children[child.label[0]] = child
+                node.children[key[0]] = middle
+                child = middle
+            node = child
+            key = key[common:]
+        node.ids.add(faq_id)
+
+    def _delete(self, key, faq_id):
+        path = [self.root]
+        node = self.root
+        while key:
+            node = node.children.get(key[0])
+            if node is None or not key.startswith(node.label):
+                return
+            path.append(node)
+            key = key[len(node.label):]
+        node.ids.discard(faq_id)
+        # Curățăm nodurile rămase goale și lipim muchiile fără ramificații
+        for depth in range(len(path) - 1, 0, -1):
+            node, parent = path[depth], path[depth - 1]
+            if not node.ids and not node.children:
+                del parent.children[node.label[0]]
+            elif not node.ids and len(node.children) == 1:
+                (child,) = node.children.values()
+                child.label = node.label + child.label
+                parent.children[child.label[0]] = child
+            else:
+                break
+
+    def _prefix(self, prefix, limit):
+        node = self.root
+        while prefix:
+            node = node.children.get(prefix[0])
+            if node is None:
+                return []
+            if len(prefix) <= len(node.label):
+                if not node.label.startswith(prefix):
+                    return []
+                break
+            if not prefix.startswith(node.label):
+                return []
+            prefix = prefix[len(node.label):]
+        found = []
+        stack = [node]
+        while stack and len(found) < limit:
+            node = stack.pop()
+            found.extend(sorted(node.ids - set(found)))
+            stack.extend(node.children[char] for char in sorted(node.children, reverse=True))
+        return found[:limit]
+
+    def _fuzzy(self, term, limit):
+        grams = trigrams(term)
+        shared = Counter()
+        for gram in grams:
+            for candidate in self.trigram_terms.get(gram, ()):
+                shared[candidate] += 1
+        scored = []
+        for candidate, common in shared.items():
+            similarity = common / (len(grams) + self.term_grams[candidate] - common)
+            if similarity >= self.MIN_SIMILARITY:
+                scored.append((similarity, candidate))
+        scored.sort(reverse=True)
+        found = []
+        for _, candidate in scored:
+            for faq_id in sorted(self.term_ids[candidate]):
+                if faq_id not in found:
+                    found.append(faq_id)
+            if len(found) >= limit:
+                break
+        return found[:limit]
+
+    def suggest(self, text, limit=25):
+        folded = fold(text).strip()
+        if not folded:
+            return heapq.nsmallest(limit, self.keys)
+        found = [int(folded)] if folded.isdigit() and int(folded) in self.keys else []
+        found += [faq_id for faq_id in self._prefix(folded, limit) if faq_id not in found]
+        tokens = tokenize(folded)
+        if len(found) < limit and len(tokens) > 1:
+            found += [faq_id for faq_id in self._prefix(tokens[-1], limit) if faq_id not in found]
+        if len(found) < limit and tokens:
+            found += [faq_id for faq_id in self._fuzzy(tokens[-1], limit) if faq_id not in found]
+        return found[:limit]
+
+
+def stem(token):
+    for suffix in ARTICLE_SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            return token[:-len(suffix)]
+    return token
+
+
+class KeywordMatcher:
+    """Automat Aho-Corasick peste cuvintele cheie normalizate.
+
+    Alfabetul automatului sunt cuvintele (nu caracterele), așa că potrivirile
+    respectă granițele de cuvânt, iar costul unui mesaj depinde doar de
+    numărul lui de cuvinte, nu de câte FAQ-uri există.
+    """
+
+    def __init__(self, entries=()):
+        self.rebuild(entries)
+
+    def rebuild(self, entries):
+        keyword_ids = defaultdict(set)
+        for entry in entries:
+            for keyword in entry.get("keywords", []):
+                words = tuple(stem(token) for token in tokenize(keyword))
+                if words:
+                    keyword_ids[words].add(entry["id"])
+        self.keyword_ids = dict(keyword_ids)
+        self._build()
+
+    def _build(self):
+        goto = [{}]
+        outputs = [()]
+        for keyword in self.keyword_ids:
+            state = 0
+            for word in keyword:
+                next_state = goto[state].get(word)
+                if next_state is None:
+                    next_state = goto[state][word] = len(goto)
+                    goto.append({})
+                    outputs.append(())
+                state = next_state
+            outputs[state] = (keyword,)
+
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for word, next_state in goto[state].items():
+                queue.append(next_state)
+                fallback = fail[state]
+                while fallback and word not in goto[fallback]:
+                    fallback = fail[fallback]
+                target = goto[fallback].get(word, 0)
+                fail[next_state] = target if target != next_state else 0
+                outputs[next_state] = outputs[next_state] + outputs[fail[next_state]]
+        self._goto = goto
+        self._fail = fail
+        self._outputs = outputs
+
+    def find(self, text):
+        """Cuvintele cheie care apar în text (după normalizare), ca tuple de cuvinte."""
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        root = goto[0]
+        found = set()
+        state = 0
+        for token in tokenize(text):
+            word = stem(token)
+            while state and word not in goto[state]:
+                state = fail[state]
+            state = (goto[state] if state else root).get(word, 0)
+            if outputs[state]:
+                found.update(outputs[state])
+        return found
+
+    def best_match(self, text):
+        scores = Counter()
+        for keyword in self.find(text):
+            for faq_id in self.keyword_ids[keyword]:
+                scores[faq_id] += sum(map(len, keyword))
+        if not scores:
+            return None
+        return min(scores, key=lambda faq_id: (-scores[faq_id], faq_id))
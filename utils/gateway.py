@@ -0,0 +1,42 @@
+import ast
+import importlib.util
+import os
+
+import discord
+
+# "full" = comportamentul vechi (toate intent-urile, cache complet); "lean" = doar ce declară cog-urile
+GATEWAY_MODE = os.getenv("GATEWAY_MODE", "full")
+# Câte mesaje ține cache-ul în modul lean; niciun cog nu citește mesaje vechi din cache
+LEAN_MAX_MESSAGES = int(os.getenv("LEAN_MAX_MESSAGES", "200"))
+
+
+def declared_intents(extensions):
+    """Uniunea REQUIRED_INTENTS declarate de extensii.
+
+    Intent-urile trebuie știute înainte de login, deci citim declarația din
+    sursă (un tuplu literal) în loc să importăm modulele de două ori.
+    """
+    names = {"guilds"}
+    for ext in extensions:
+        spec = importlib.util.find_spec(ext)
+        with open(spec.origin, "r", encoding="utf-8") as f:
+            tree = ast.parse(f.read(), filename=spec.origin)
+        for node in tree.body:
+            if isinstance(node, ast.Assign) and any(getattr(target, "id", None) == "REQUIRED_INTENTS" for target in node.targets):
+                names.update(ast.literal_eval(node.value))
+    return names
+
+
+def client_options(mode, extensions):
+    """Argumentele pentru Bot(...) în modul ales."""
+    if mode == "full":
+        return {"intents": discord.Intents.all()}
+    if mode != "lean":
+        raise ValueError(f"GATEWAY_MODE necunoscut: {mode}")
+    return {
+        "intents": discord.Intents(**{name: True for name in declared_intents(extensions)}),
+        # Membrii vin din evenimente și interacțiuni; nu îi păstrăm și nu îi cerem pe toți la pornire
+        "member_cache_flags": discord.MemberCacheFlags.none(),
+        "chunk_guilds_at_startup": False,
+        "max_messages": LEAN_MAX_MESSAGES or None,
+    }
@@ -0,0 +1,185 @@
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+
+
+class VPSQuery:
+    """Rezultatul unei căutări: doar limitele, paginile se materializează la cerere."""
+
+    def __init__(self, inventory, keys, lo=0, hi=None, key_to_number=None):
+        self.inventory = inventory
+        self.keys = keys
+        self.lo = lo
+        self.hi = len(keys) if hi is None else hi
+        self.key_to_number = key_to_number
+
+    def __len__(self):
+        return max(0, self.hi - self.lo)
+
+    def page(self, index, per_page):
+        start = self.lo + index * per_page
+        keys = self.keys[start:min(start + per_page, self.hi)]
+        if self.key_to_number is not None:
+            keys = map(self.key_to_number, keys)
+        return [entry for entry in map(self.inventory.by_number.get, keys) if entry is not None]
+
+
+def migrate_legacy(entries):
+    """Lista veche -> {"next_number", "servers"}.
+
+    Vechiul /addvps numerota cu len(listă) + 1, deci după un /removevps apăreau numere
+    duplicate. Prima intrare își păstrează numărul, următoarele primesc numere noi.
+    """
+    next_number = max((e["vps_number"] for e in entries), default=0) + 1
+    servers = {}
+    for entry in entries:
+        key = str(entry["vps_number"])
+        if key in servers:
+            print(f"[VPS Migrare] VPS #{key} ({entry.get('ip')}) e duplicat; renumerotat ca #{next_number}.")
+            entry["vps_number"] = next_number
+            key = str(next_number)
+            next_number += 1
+        servers[key] = entry
+    return {"next_number": next_number, "servers": servers}
+
+
+class VPSInventory:
+    """Flota de VPS-uri cu indexuri după număr, deținător și data expirării.
+
+    Numerele VPS vin dintr-o secvență persistată și nu se refolosesc după ștergere.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        if isinstance(store.data, list):
+            # Formatul vechi: doar lista de VPS-uri
+            store.set(migrate_legacy(store.data))
+        # callback(număr, intrare nouă sau None) pentru VPS-urile modificate de alt proces din cluster
+        self.listeners = []
+        self._reindex()
+        store.subscribe(self._on_remote_change)
+
+    def _reindex(self):
+        self.by_number = {}
+        self.by_owner = defaultdict(list)
+        self.by_ip = {}
+        self.by_expiration = []
+        self.order = []
+        for entry in self.servers.values():
+            self._index(entry)
+
+    def _on_remote_change(self, key, value):
+        # Store-ul e deja actualizat; indexurile încă țin intrarea veche, deci o scoatem după număr
+        parent, _, item = key.partition("/")
+        if item and parent == "servers":
+            number = int(item)
+            old = self.by_number.get(number)
+            if old is not None:
+                self._unindex(old)
+            entry = self.servers.get(item)
+            if entry is not None:
+                self._index(entry)
+            self._notify(number, entry)
+        elif key == "servers" and isinstance(self.store.data, dict) and "servers" in self.store.data:
+            # Harta întreagă s-a schimbat (migrare sau date scrise înainte de împărțirea pe rânduri)
+            previous = set(self.by_number)
+            self._reindex()
+            for number in previous | set(self.by_number):
+                self._notify(number, self.by_number.get(number))
+
+    def _notify(self, number, entry):
+        for callback in self.listeners:
+            callback(number, entry)
+
+    @property
+    def servers(self):
+        return self.store.data["servers"]
+
+    def __len__(self):
+        return len(self.by_number)
+
+    def __iter__(self):
+        return iter(self.servers.values())
+
+    def get(self, vps_number):
+        return self.by_number.get(vps_number)
+
+    def next_number(self):
+        number = self.store.data["next_number"]
+        self.store.data["next_number"] = number + 1
+        self.store.mark_dirty()
+        return number
+
+    def _index(self, entry):
+        number = entry["vps_number"]
+        self.by_number[number] = entry
+        insort(self.by_owner[entry["user_id"]], number)
+        self.by_ip[entry["ip"]] = number
+        insort(self.by_expiration, (entry["expiration"], number))
+        insort(self.order, number)
+
+    def _unindex(self, entry):
+        number = entry["vps_number"]
+        del self.by_number[number]
+        owned = self.by_owner[entry["user_id"]]
+        del owned[bisect_left(owned, number)]
+        if not owned:
+            del self.by_owner[entry["user_id"]]
+        if self.by_ip.get(entry["ip"]) == number:
+            del self.by_ip[entry["ip"]]
+        del self.by_expiration[bisect_left(self.by_expiration, (entry["expiration"], number))]
+        del self.order[bisect_left(self.order, number)]
+
+    def add(self, entry):
+        self.servers[str(entry["vps_number"])] = entry
+        self._index(entry)
+        self.store.mark_dirty()
+
+    def add_many(self, entries):
+        """Adăugare în lot: indexurile sortate se refac o singură dată per lot, nu per intrare."""
+        for entry in entries:
+            number = entry["vps_number"]
+            self.servers[str(number)] = entry
+            self.by_number[number] = entry
+            self.by_owner[entry["user_id"]].append(number)
+            self.by_ip[entry["ip"]] = number
+            self.by_expiration.append((entry["expiration"], number))
+            self.order.append(number)
+        # Timsort îmbină în timp liniar lista deja sortată cu lotul adăugat la coadă
+        for owner in {entry["user_id"] for entry in entries}:
+            self.by_owner[owner].sort()
+        self.by_expiration.sort()
+        self.order.sort()
+        self.store.mark_dirty()
+
+    def remove(self, vps_number):
+        entry = self.by_number.get(vps_number)
+        if entry is None:
+            return None
+        self._unindex(entry)
+        del self.servers[str(vps_number)]
+        self.store.mark_dirty()
+        return entry
+
+    def set_expiration(self, entry, expiration):
+        self._unindex(entry)
+        entry["expiration"] = expiration
+        self._index(entry)
+        self.store.mark_dirty()
+
+    def query(self, owner=None, expires_from=None, expires_until=None):
+        if owner is not None:
+            numbers = self.by_owner.get(owner, [])
+            if expires_from is not None or expires_until is not None:
+                numbers = [
+                    n for n in numbers
+                    if (expires_from is None or self.by_number[n]["expiration"] >= expires_from)
+                    and (expires_until is None or self.by_number[n]["expiration"] <= expires_until)
+                ]
+            return VPSQuery(self, numbers)
+
+        if expires_from is not None or expires_until is not None:
+            lo = 0 if expires_from is None else bisect_left(self.by_expiration, (expires_from,))
+            hi = len(self.by_expiration) if expires_until is None else bisect_right(self.by_expiration, (expires_until, float("inf")))
+            return VPSQuery(self, self.by_expiration, lo, hi, key_to_number=lambda key: key[1])
+
+        return VPSQuery(self, self.order)
@@ -0,0 +1,51 @@
+from bisect import bisect_left, insort
+
+
+class InviteStats:
+    """Contoare per invitator (intrări, plecări) și clasament ținut sortat după net.
+
+    `counters` e un JsonStore mic ({guild: {inviter: [intrări, plecări]}});
+    cine pe cine a invitat stă într-un KeyValueLog, pentru că poate avea
+    sute de mii de chei și e nevoie de el ca să atribuim plecările.
+    """
+
+    def __init__(self, counters, members):
+        self.counters = counters
+        self.members = members
+        self.rankings = {}
+        for guild_id, inviters in counters.data.items():
+            self.rankings[guild_id] = sorted((-(joins - leaves), inviter_id) for inviter_id, (joins, leaves) in inviters.items())
+
+    def _update(self, guild_id, inviter_id, joins=0, leaves=0):
+        inviters = self.counters.data.setdefault(guild_id, {})
+        ranking = self.rankings.setdefault(guild_id, [])
+        old = inviters.get(inviter_id)
+        if old is not None:
+            del ranking[bisect_left(ranking, (-(old[0] - old[1]), inviter_id))]
+        new = [(old or [0, 0])[0] + joins, (old or [0, 0])[1] + leaves]
+        inviters[inviter_id] = new
+        insort(ranking, (-(new[0] - new[1]), inviter_id))
+        self.counters.mark_dirty()
+
+    def record_join(self, guild_id, member_id, inviter_id):
+        guild_id, member_id, inviter_id = str(guild_id), str(member_id), str(inviter_id)
+        self.members.set(f"{guild_id}:{member_id}", inviter_id)
+        self._update(guild_id, inviter_id, joins=1)
+
+    def record_leave(self, guild_id, member_id):
+        guild_id, member_id = str(guild_id), str(member_id)
+        inviter_id = self.members.get(f"{guild_id}:{member_id}")
+        if inviter_id is None:
+            return None
+        self.members.delete(f"{guild_id}:{member_id}")
+        self._update(guild_id, inviter_id, leaves=1)
+        return inviter_id
+
+    def get(self, guild_id, inviter_id):
+        joins, leaves = self.counters.data.get(str(guild_id), {}).get(str(inviter_id), (0, 0))
+        return joins, leaves, joins - leaves
+
+    def top(self, guild_id, n=10):
+        guild_id = str(guild_id)
+        inviters = self.counters.data.get(guild_id, {})
+        return [(inviter_id, *inviters[inviter_id]) for _, inviter_id in self.rankings.get(guild_id, [])[:n]]
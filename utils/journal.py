@@ -0,0 +1,231 @@
+import asyncio
+import json
+import mmap
+import os
+import tempfile
+from array import array
+
+from utils.metrics import background_task, run_io
+
+# Compactăm doar când intrările moarte depășesc pragul și jumătate din fișier
+COMPACT_MIN_BYTES = 64 * 1024
+
+
+def _encode(record):
+    return json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n"
+
+
+class Snapshot:
+    """Înregistrările active la un moment dat; `seq` e ultima modificare din jurnal inclusă.
+
+    Jurnalul local nu primește modificări din alte procese, deci seq rămâne 0.
+    SharedJournal îl completează la prima citire, în aceeași tranzacție cu înregistrările.
+    """
+
+    def __init__(self, records, seq=0):
+        self._records = records
+        self.seq = seq
+
+    def __iter__(self):
+        return self._records
+
+
+class Journal:
+    """Log append-only (JSONL) cu tombstone-uri și index compact id -> offset.
+
+    Id-urile sunt numere întregi consecutive, deci indexul e un array
+    indexat direct după id (-1 = inexistent sau șters).
+    """
+
+    def __init__(self, path, legacy_path=None):
+        self.path = path
+        self.last_id = 0
+        self.size = 0
+        self.dead_bytes = 0
+        self._offsets = array("q")
+        self._lengths = array("l")
+        self._lock = asyncio.Lock()
+        self._compact_task = None
+
+        if not os.path.exists(path) and legacy_path and os.path.exists(legacy_path):
+            self._migrate(legacy_path)
+        self._load_index()
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_APPEND)
+
+    def _migrate(self, legacy_path):
+        with open(legacy_path, "r", encoding="utf-8") as f:
+            content = f.read()
+        records = json.loads(content) if content.strip() else []
+        records.sort(key=lambda r: r["id"])
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=".jsonl", dir=directory)
+        with os.fdopen(fd, "wb") as f:
+            for record in records:
+                f.write(_encode(record))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def _set(self, record_id, offset, length):
+        missing = record_id + 1 - len(self._offsets)
+        if missing > 0:
+            self._offsets.extend([-1] * missing)
+            self._lengths.extend([0] * missing)
+        self._offsets[record_id] = offset
+        self._lengths[record_id] = length
+
+    def _load_index(self):
+        if not os.path.exists(self.path):
+            return
+        offset = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("linie incompletă")
+                    record = json.loads(line)
+                except ValueError:
+                    # Scriere întreruptă de un crash: tăiem coada coruptă
+                    break
+                self._apply(record, offset, len(line))
+                offset += len(line)
+        if offset != os.path.getsize(self.path):
+            os.truncate(self.path, offset)
+        self.size = offset
+
+    def _apply(self, record, offset, length):
+        record_id = record["id"]
+        self.last_id = max(self.last_id, record_id)
+        if record.get("_deleted"):
+            if self.get_location(record_id) is not None:
+                self.dead_bytes += self._lengths[record_id]
+                self._offsets[record_id] = -1
+            self.dead_bytes += length
+        else:
+            self._set(record_id, offset, length)
+
+    def get_location(self, record_id):
+        if record_id <= 0 or record_id >= len(self._offsets):
+            return None
+        offset = self._offsets[record_id]
+        if offset < 0:
+            return None
+        return offset, self._lengths[record_id]
+
+    def __contains__(self, record_id):
+        return self.get_location(record_id) is not None
+
+    def subscribe(self, callback):
+        # Jurnalul local are un singur scriitor; vezi SharedJournal pentru cluster
+        pass
+
+    def next_id(self):
+        self.last_id += 1
+        return self.last_id
+
+    async def get(self, record_id):
+        # Un pread pe fișierul local e mai ieftin decât trecerea pe un thread
+        location = self.get_location(record_id)
+        if location is None:
+            return None
+        offset, length = location
+        return json.loads(os.pread(self._fd, length, offset))
+
+    async def append(self, record):
+        line = _encode(record)
+        async with self._lock:
+            await run_io(os.write, self._fd, line)
+            self.last_id = max(self.last_id, record["id"])
+            self._set(record["id"], self.size, len(line))
+            self.size += len(line)
+        return record["id"]
+
+    async def remove(self, record_id):
+        async with self._lock:
+            location = self.get_location(record_id)
+            if location is None:
+                return False
+            line = _encode({"id": record_id, "_deleted": True})
+            await run_io(os.write, self._fd, line)
+            self._offsets[record_id] = -1
+            self.size += len(line)
+            self.dead_bytes += location[1] + len(line)
+        self._maybe_compact()
+        return True
+
+    def scan(self):
+        """Iterator peste intrările active, pe un snapshot luat acum.
+
+        Poate fi consumat dintr-un thread; nu vede scrierile de după apel.
+        """
+        fd = os.dup(self._fd)
+        offsets = self._offsets[:]
+        lengths = self._lengths[:]
+        size = self.size
+
+        def iterate():
+            try:
+                if size == 0:
+                    return
+                with mmap.mmap(fd, size, access=mmap.ACCESS_READ) as mm:
+                    for record_id, offset in enumerate(offsets):
+                        if offset >= 0:
+                            yield json.loads(mm[offset:offset + lengths[record_id]])
+            finally:
+                os.close(fd)
+
+        return Snapshot(iterate())
+
+    def _maybe_compact(self):
+        if self.dead_bytes < COMPACT_MIN_BYTES or self.dead_bytes * 2 < self.size:
+            return
+        if self._compact_task is not None and not self._compact_task.done():
+            return
+        self._compact_task = background_task(self.compact())
+
+    async def compact(self):
+        async with self._lock:
+            new_fd, offsets, lengths, size = await run_io(self._rewrite)
+            old_fd = self._fd
+            self._fd = new_fd
+            self._offsets = offsets
+            self._lengths = lengths
+            self.size = size
+            self.dead_bytes = 0
+            os.close(old_fd)
+
+    def _rewrite(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=".jsonl", dir=directory)
+        offsets = array("q", [-1]) * len(self._offsets)
+        lengths = array("l", [0]) * len(self._lengths)
+        position = 0
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for record_id, offset in enumerate(self._offsets):
+                    if offset < 0:
+                        continue
+                    line = os.pread(self._fd, self._lengths[record_id], offset)
+                    f.write(line)
+                    offsets[record_id] = position
+                    lengths[record_id] = len(line)
+                    position += len(line)
+                # Ultimul id trebuie să supraviețuiască compactării ca să nu fie refolosit
+                if self.last_id not in self:
+                    line = _encode({"id": self.last_id, "_deleted": True})
+                    f.write(line)
+                    position += len(line)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+        new_fd = os.open(self.path, os.O_RDWR | os.O_APPEND)
+        return new_fd, offsets, lengths, position
+
+    def close(self):
+        os.close(self._fd)
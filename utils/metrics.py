@@ -0,0 +1,216 @@
+"""Latențe per comandă slash și per listener, expuse local în format Prometheus.
+
+Fiecare apel de handler are un `Span` ținut într-un contextvar. Pe el se adună
+timpul de I/O pe stare (`run_io`) și timpul apelurilor REST (trace-ul aiohttp al
+clientului, care acoperă și răspunsurile la interacțiuni). La final span-ul intră
+în histograme. Costul per apel e de câteva microsecunde, deci rămâne pornit.
+"""
+import asyncio
+import contextvars
+import functools
+import os
+import time
+from bisect import bisect_left
+
+import aiohttp
+from aiohttp import web
+
+# Portul de bază; în cluster fiecare proces ascultă pe METRICS_PORT + CLUSTER_ID. 0 = dezactivat
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+current_span = contextvars.ContextVar("metrics_span", default=None)
+
+
+class Span:
+    __slots__ = ("start", "io", "rest", "response")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.io = 0.0
+        self.rest = 0.0
+        self.response = None
+
+
+class Histogram:
+    __slots__ = ("counts", "sum")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+
+
+class Registry:
+    """Histograme și contoare indexate după etichete; totul în memorie, fără lock-uri (un singur loop)."""
+
+    def __init__(self):
+        self.histograms = {}
+        self.counters = {}
+
+    def observe(self, metric, labels, value):
+        key = (metric, labels)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram()
+        histogram.observe(value)
+
+    def increment(self, metric, labels, amount=1):
+        key = (metric, labels)
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+    def record(self, kind, name, span, failed):
+        labels = (("kind", kind), ("name", name))
+        self.observe("bot_handler_duration_seconds", labels, time.perf_counter() - span.start)
+        self.observe("bot_handler_state_io_seconds", labels, span.io)
+        self.observe("bot_handler_rest_seconds", labels, span.rest)
+        if span.response is not None:
+            self.observe("bot_command_response_seconds", (("name", name),), span.response)
+        if failed:
+            self.increment("bot_handler_errors_total", labels)
+
+    def render(self):
+        lines = []
+        for metric, help_text in HELP.items():
+            kind = "counter" if metric.endswith("_total") else "histogram"
+            series = self.counters if kind == "counter" else self.histograms
+            rows = sorted((labels, value) for (name, labels), value in series.items() if name == metric)
+            if not rows:
+                continue
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {kind}")
+            for labels, value in rows:
+                if kind == "counter":
+                    lines.append(f"{metric}{_labels(labels)} {value}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(BUCKETS + ("+Inf",), value.counts):
+                    cumulative += count
+                    lines.append(f"{metric}_bucket{_labels(labels + (('le', str(bound)),))} {cumulative}")
+                lines.append(f"{metric}_sum{_labels(labels)} {value.sum:.6f}")
+                lines.append(f"{metric}_count{_labels(labels)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+HELP = {
+    "bot_handler_duration_seconds": "Durata totală a unei comenzi slash sau a unui listener.",
+    "bot_command_response_seconds": "Timpul până la primul răspuns la interacțiune (send_message/defer/modal).",
+    "bot_handler_state_io_seconds": "Timpul petrecut în I/O pe stare (store-uri, jurnale, transcrieri) per apel.",
+    "bot_handler_rest_seconds": "Timpul petrecut în apeluri REST către Discord per apel.",
+    "bot_handler_errors_total": "Apeluri terminate cu excepție.",
+    "bot_loop_lag_seconds": "Întârzierea buclei asyncio măsurată de watchdog.",
+    "bot_loop_stalls_total": "Blocaje ale buclei peste pragul watchdog-ului.",
+}
+
+registry = Registry()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+async def run_io(func, *args):
+    """`asyncio.to_thread` care adaugă durata la I/O-ul handler-ului curent."""
+    span = current_span.get()
+    if span is None:
+        return await asyncio.to_thread(func, *args)
+    start = time.perf_counter()
+    try:
+        return await asyncio.to_thread(func, *args)
+    finally:
+        span.io += time.perf_counter() - start
+
+
+def background_task(coro):
+    """`create_task` într-un context gol: munca de fundal pornită dintr-un handler nu se adună la span-ul lui."""
+    return asyncio.get_running_loop().create_task(coro, context=contextvars.Context())
+
+
+async def _observe(kind, name, call):
+    span = Span()
+    token = current_span.set(span)
+    failed = True
+    try:
+        result = await call()
+        failed = False
+        return result
+    finally:
+        current_span.reset(token)
+        registry.record(kind, name, span, failed)
+
+
+def instrument_command(command):
+    """Înlocuiește `_do_call` al comenzii; parametrii sunt deja convertiți, verificările deja trecute."""
+    if getattr(command, "_metrics_wrapped", False):
+        return
+    do_call = command._do_call
+    name = command.qualified_name
+
+    async def timed_call(interaction, params):
+        return await _observe("command", name, lambda: do_call(interaction, params))
+
+    command._do_call = timed_call
+    command._metrics_wrapped = True
+
+
+def instrument_listener(func, event):
+    name = f"{event}:{getattr(func, '__qualname__', func.__name__)}"
+
+    @functools.wraps(func)
+    async def timed_listener(*args, **kwargs):
+        return await _observe("listener", name, lambda: func(*args, **kwargs))
+
+    return timed_listener
+
+
+def _is_interaction_callback(url):
+    # POST /interactions/{id}/{token}/callback: send_message, defer, send_modal, edit_message
+    return url.path.endswith("/callback") and "/interactions/" in url.path
+
+
+async def _on_request_start(session, ctx, params):
+    ctx.start = time.perf_counter()
+
+
+async def _on_request_end(session, ctx, params):
+    span = current_span.get()
+    if span is None:
+        return
+    now = time.perf_counter()
+    span.rest += now - ctx.start
+    if span.response is None and _is_interaction_callback(params.url):
+        span.response = now - span.start
+
+
+def http_trace():
+    """TraceConfig pentru `http_trace=` al clientului; sesiunea e folosită și de webhook-urile interacțiunilor."""
+    trace = aiohttp.TraceConfig()
+    trace.on_request_start.append(_on_request_start)
+    trace.on_request_end.append(_on_request_end)
+    trace.on_request_exception.append(_on_request_end)
+    return trace
+
+
+async def _serve_metrics(request):
+    return web.Response(body=registry.render().encode("utf-8"),
+                        headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+
+async def start_server(port, host=METRICS_HOST):
+    app = web.Application()
+    app.router.add_get("/metrics", _serve_metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
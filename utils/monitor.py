@@ -0,0 +1,121 @@
+import asyncio
+import math
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+
+import ping3
+
+
+def ping_host(ip, timeout):
+    """Latența în ms sau None dacă hostul nu răspunde (ping3 e blocant, rulează pe thread)."""
+    try:
+        latency = ping3.ping(ip, timeout=timeout, unit="ms")
+    except Exception:
+        return None
+    return latency if latency else None
+
+
+class LatencyRing:
+    """Ultimele N măsurători într-un buffer circular; NaN = pachet pierdut."""
+
+    __slots__ = ("samples", "position", "count")
+
+    def __init__(self, size):
+        self.samples = array("f", [math.nan]) * size
+        self.position = 0
+        self.count = 0
+
+    def add(self, latency):
+        self.samples[self.position] = math.nan if latency is None else latency
+        self.position = (self.position + 1) % len(self.samples)
+        self.count = min(self.count + 1, len(self.samples))
+
+    def values(self):
+        if self.count < len(self.samples):
+            return self.samples[:self.count]
+        return self.samples[self.position:] + self.samples[:self.position]
+
+    def loss(self):
+        if not self.count:
+            return 0.0
+        return sum(1 for value in self.values() if math.isnan(value)) / self.count
+
+    def percentiles(self, *ps):
+        received = sorted(value for value in self.values() if not math.isnan(value))
+        if not received:
+            return [None for _ in ps]
+        return [received[min(len(received) - 1, int(round(p / 100 * (len(received) - 1))))] for p in ps]
+
+    def last(self):
+        if not self.count:
+            return None
+        value = self.samples[self.position - 1]
+        return None if math.isnan(value) else value
+
+
+class HostState:
+    __slots__ = ("ip", "ring", "up", "failures")
+
+    def __init__(self, ip, history):
+        self.ip = ip
+        self.ring = LatencyRing(history)
+        self.up = None
+        self.failures = 0
+
+
+class HostMonitor:
+    """Ping concurent, cu număr limitat de thread-uri, peste o listă de hosturi.
+
+    `sweep` întoarce doar tranzițiile de stare (sus -> jos și invers), ca
+    alertele să nu se repete la fiecare rundă.
+    """
+
+    def __init__(self, pinger=ping_host, concurrency=64, timeout=1.0, history=60, fail_threshold=3):
+        self.pinger = pinger
+        self.timeout = timeout
+        self.history = history
+        self.fail_threshold = fail_threshold
+        self.concurrency = concurrency
+        self.hosts = {}
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="vps-ping")
+
+    async def sweep(self, targets):
+        loop = asyncio.get_running_loop()
+        for key in set(self.hosts) - set(targets):
+            del self.hosts[key]
+
+        keys = list(targets)
+        results = {}
+        pending = iter(keys)
+
+        # Doar `concurrency` ping-uri în zbor, ca loop-ul să nu fie inundat de futures
+        async def worker():
+            for key in pending:
+                results[key] = await loop.run_in_executor(self._executor, self.pinger, targets[key], self.timeout)
+
+        await asyncio.gather(*(worker() for _ in range(min(self.concurrency, len(keys)))))
+
+        transitions = []
+        for key in keys:
+            latency = results[key]
+            state = self.hosts.get(key)
+            if state is None or state.ip != targets[key]:
+                state = self.hosts[key] = HostState(targets[key], self.history)
+            state.ring.add(latency)
+
+            if latency is None:
+                state.failures += 1
+                # Declarăm hostul căzut doar după mai multe eșecuri consecutive
+                if state.failures >= self.fail_threshold and state.up is not False:
+                    state.up = False
+                    transitions.append((key, state))
+            else:
+                state.failures = 0
+                # La pornire nu anunțăm hosturile care răspund, doar revenirile
+                if state.up is False:
+                    transitions.append((key, state))
+                state.up = True
+        return transitions
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
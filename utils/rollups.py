@@ -0,0 +1,117 @@
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict
+from datetime import datetime
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def to_cents(suma):
+    return int(round(float(suma) * 100))
+
+
+def period_keys(timestamp):
+    # Timestamp-urile sunt deja salvate în ora României
+    day = timestamp[:10]
+    year, week, _ = datetime.strptime(day, "%Y-%m-%d").isocalendar()
+    return day, f"{year}-W{week:02d}", timestamp[:7]
+
+
+class DonationRollups:
+    """Agregate ținute la zi la fiecare donație adăugată sau ștearsă.
+
+    Sumele sunt păstrate în bani (cenți) ca să nu acumulăm erori de float.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        # Ultima modificare din jurnalul comun inclusă în agregate (doar în cluster)
+        self.seq = 0
+        self.total = 0
+        self.count = 0
+        self.by_day = Counter()
+        self.by_week = Counter()
+        self.by_month = Counter()
+        self.per_user = Counter()
+        self.usernames = {}
+        self._ranking = []
+        self._amounts = []
+
+    def _update_user(self, user_id, delta):
+        old = self.per_user[user_id]
+        if old:
+            del self._ranking[bisect_left(self._ranking, (-old, user_id))]
+        new = old + delta
+        if new:
+            self.per_user[user_id] = new
+            insort(self._ranking, (-new, user_id))
+        else:
+            del self.per_user[user_id]
+
+    def _apply(self, donatie, sign):
+        cents = to_cents(donatie.get("suma", 0))
+        delta = sign * cents
+        self.total += delta
+        self.count += sign
+        for bucket, key in zip((self.by_day, self.by_week, self.by_month), period_keys(donatie["timestamp"])):
+            bucket[key] += delta
+            if not bucket[key]:
+                del bucket[key]
+        self._update_user(donatie["user_id"], delta)
+        if sign > 0:
+            insort(self._amounts, cents)
+            self.usernames[donatie["user_id"]] = donatie.get("username", donatie["user_id"])
+        else:
+            del self._amounts[bisect_left(self._amounts, cents)]
+
+    def add(self, donatie):
+        self._apply(donatie, 1)
+
+    def remove(self, donatie):
+        self._apply(donatie, -1)
+
+    def top(self, n=10):
+        return [(user_id, -cents) for cents, user_id in self._ranking[:n]]
+
+    def percentile(self, p):
+        if not self._amounts:
+            return 0
+        index = min(len(self._amounts) - 1, int(round(p / 100 * (len(self._amounts) - 1))))
+        return self._amounts[index]
+
+    def rebuild(self, donatii):
+        """Recalculează totul dintr-o singură trecere peste istoric (pentru verificare)."""
+        self.reset()
+        per_user = defaultdict(int)
+        amounts = []
+        for donatie in donatii:
+            cents = to_cents(donatie.get("suma", 0))
+            day, week, month = period_keys(donatie["timestamp"])
+            self.by_day[day] += cents
+            self.by_week[week] += cents
+            self.by_month[month] += cents
+            per_user[donatie["user_id"]] += cents
+            self.usernames[donatie["user_id"]] = donatie.get("username", donatie["user_id"])
+            amounts.append(cents)
+        self.total = sum(amounts)
+        self.count = len(amounts)
+        self.per_user = Counter({user_id: cents for user_id, cents in per_user.items() if cents})
+        self._ranking = sorted((-cents, user_id) for user_id, cents in self.per_user.items())
+        self._amounts = sorted(amounts)
+        for bucket in (self.by_day, self.by_week, self.by_month):
+            for key in [key for key, cents in bucket.items() if not cents]:
+                del bucket[key]
+        return self
+
+    def snapshot(self):
+        return {
+            "total": self.total,
+            "count": self.count,
+            "by_day": dict(self.by_day),
+            "by_week": dict(self.by_week),
+            "by_month": dict(self.by_month),
+            "per_user": dict(self.per_user),
+            "ranking": list(self._ranking),
+            "amounts": list(self._amounts),
+        }
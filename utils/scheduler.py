@@ -0,0 +1,89 @@
+import asyncio
+import heapq
+import itertools
+from datetime import datetime
+
+# Re-evaluăm cel puțin o dată pe oră, în caz că ceasul sistemului sare
+MAX_SLEEP = 3600
+
+
+class DeadlineScheduler:
+    """Min-heap de termene: doarme până la următorul termen și apelează callback-ul.
+
+    Fiecare cheie are cel mult un termen activ; reprogramarea sau anularea
+    invalidează intrarea veche din heap (ștergere leneșă). Heap-ul e ordonat după
+    timestamp: compararea a două datetime cu fus orar apelează utcoffset() de fiecare dată.
+    """
+
+    def __init__(self, callback, tz):
+        self.callback = callback
+        self.tz = tz
+        self._heap = []
+        self._versions = {}
+        self._counter = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+    def __len__(self):
+        return len(self._versions)
+
+    def __contains__(self, key):
+        return key in self._versions
+
+    def schedule(self, key, when, payload=None):
+        version = next(self._counter)
+        self._versions[key] = version
+        heapq.heappush(self._heap, (when.timestamp(), version, key, when, payload))
+        if self._heap[0][1] == version:
+            self._wakeup.set()
+        self._maybe_compact()
+
+    def cancel(self, key):
+        self._versions.pop(key, None)
+
+    def _maybe_compact(self):
+        if len(self._heap) > 2 * len(self._versions) + 64:
+            self._heap = [item for item in self._heap if self._versions.get(item[2]) == item[1]]
+            heapq.heapify(self._heap)
+
+    def pop_due(self, now):
+        due = []
+        now = now.timestamp()
+        while self._heap and self._heap[0][0] <= now:
+            _, version, key, when, payload = heapq.heappop(self._heap)
+            if self._versions.get(key) != version:
+                continue
+            del self._versions[key]
+            due.append((key, when, payload))
+        return due
+
+    def next_deadline(self):
+        while self._heap and self._versions.get(self._heap[0][2]) != self._heap[0][1]:
+            heapq.heappop(self._heap)
+        return self._heap[0][3] if self._heap else None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _run(self):
+        while True:
+            for key, when, payload in self.pop_due(datetime.now(self.tz)):
+                try:
+                    await self.callback(key, when, payload)
+                except Exception as e:
+                    print(f"[Scheduler Error] {key}: {e}")
+
+            self._wakeup.clear()
+            deadline = self.next_deadline()
+            timeout = MAX_SLEEP
+            if deadline is not None:
+                timeout = min(MAX_SLEEP, max(0.0, (deadline - datetime.now(self.tz)).total_seconds()))
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
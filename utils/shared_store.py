@@ -0,0 +1,516 @@
+"""Backend SQLite (WAL) pentru stările partajate între procesele unui cluster.
+
+Fiecare proces ține în continuare datele în memorie, cu aceleași API-uri ca
+JsonStore / KeyValueLog / Journal. Scrierile merg în SQLite (care serializează
+scriitorii între procese), iar modificările făcute de alte procese sunt aduse
+periodic: `PRAGMA data_version` spune ieftin dacă a scris altcineva, apoi citim
+doar rândurile mai noi decât ultima versiune văzută.
+
+Un JsonStore-dicționar e împărțit pe chei de prim nivel (un rând per cheie), deci
+două procese care modifică servere/utilizatori diferiți nu se calcă pe picioare.
+Hărțile mari de sub o cheie (ex. "servers" din vps_data.json) pot fi împărțite
+mai departe, un rând per intrare, cu `nested=`.
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from utils import storage
+from utils.journal import Journal, Snapshot
+from utils.metrics import run_io
+
+# Cât de des aducem modificările făcute de celelalte procese
+POLL_INTERVAL = float(os.getenv("SHARED_POLL_INTERVAL", "1.0"))
+# Cheia sub care se salvează documentele care nu sunt dicționare (ex. lista de FAQ)
+WHOLE_DOCUMENT = "$"
+# Rândul unei intrări dintr-o hartă `nested` este "<cheie>/<intrare>"
+NESTED_SEPARATOR = "/"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS kv (
+    store TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT,
+    version INTEGER NOT NULL,
+    writer TEXT NOT NULL,
+    PRIMARY KEY (store, key)
+);
+CREATE INDEX IF NOT EXISTS kv_version ON kv (version);
+CREATE TABLE IF NOT EXISTS journal (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    store TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    record TEXT,
+    writer TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS journal_id ON journal (store, id);
+"""
+
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False, sort_keys=True)
+
+
+def _enable_wal(conn, timeout):
+    # Schimbarea modului de jurnal nu așteaptă busy_timeout când pornesc mai multe procese deodată
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            return
+        except sqlite3.OperationalError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+class SharedDatabase:
+    """Conexiunea procesului la baza comună și bucla care aduce modificările celorlalți."""
+
+    def __init__(self, path):
+        self.path = path
+        self.writer = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        _enable_wal(self.conn, 30)
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.lock = threading.Lock()
+        self.stores = {}
+        self.journals = {}
+        self.last_version = self.conn.execute("SELECT coalesce(max(version), 0) FROM kv").fetchone()[0]
+        self.last_seq = self.conn.execute("SELECT coalesce(max(seq), 0) FROM journal").fetchone()[0]
+        self.data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        self._poll_task = None
+
+    def read(self, sql, params=()):
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def write(self, fn):
+        """Rulează fn(conn) într-o tranzacție de scriere (BEGIN IMMEDIATE = un singur scriitor)."""
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(self.conn)
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+            return result
+
+    def fetch_changes(self):
+        """Rândurile scrise de alte procese de la ultimul apel; gol dacă nu a scris nimeni."""
+        with self.lock:
+            data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+            if data_version == self.data_version:
+                return [], []
+            self.data_version = data_version
+            self.conn.execute("BEGIN")
+            try:
+                kv = self.conn.execute(
+                    "SELECT store, key, value FROM kv WHERE version > ? AND writer != ? ORDER BY version",
+                    (self.last_version, self.writer)
+                ).fetchall()
+                journal = self.conn.execute(
+                    "SELECT seq, store, id, record FROM journal WHERE seq > ? AND writer != ? ORDER BY seq",
+                    (self.last_seq, self.writer)
+                ).fetchall()
+                # Pentru un tombstone, rollup-urile au nevoie de înregistrarea ștearsă
+                journal = [
+                    (seq, store, record_id, record, None if record is not None else self._previous(store, record_id, seq))
+                    for seq, store, record_id, record in journal
+                ]
+                self.last_version = self.conn.execute("SELECT coalesce(max(version), 0) FROM kv").fetchone()[0]
+                self.last_seq = self.conn.execute("SELECT coalesce(max(seq), 0) FROM journal").fetchone()[0]
+            finally:
+                self.conn.execute("COMMIT")
+            return kv, journal
+
+    def _previous(self, store, record_id, seq):
+        row = self.conn.execute(
+            "SELECT record FROM journal WHERE store = ? AND id = ? AND seq < ? AND record IS NOT NULL ORDER BY seq DESC LIMIT 1",
+            (store, record_id, seq)
+        ).fetchone()
+        return row[0] if row else None
+
+    def apply_changes(self, kv, journal):
+        for store, key, value in kv:
+            if store in self.stores:
+                self.stores[store].apply_remote(key, value)
+        for seq, store, record_id, record, previous in journal:
+            if store in self.journals:
+                self.journals[store].apply_remote(seq, record_id, record, previous)
+
+    async def poll_forever(self):
+        while True:
+            try:
+                kv, journal = await asyncio.to_thread(self.fetch_changes)
+                self.apply_changes(kv, journal)
+            except Exception as e:
+                print(f"[Storage Error] {self.path}: {e}")
+            await asyncio.sleep(POLL_INTERVAL)
+
+    def start(self):
+        if self._poll_task is None or self._poll_task.done():
+            self._poll_task = asyncio.get_running_loop().create_task(self.poll_forever())
+
+    def stop(self):
+        if self._poll_task is not None:
+            self._poll_task.cancel()
+
+
+def _next_version(conn):
+    return conn.execute("SELECT coalesce(max(version), 0) + 1 FROM kv").fetchone()[0]
+
+
+def _write_rows(db, store, rows):
+    """rows: {cheie: json sau None pentru ștergere}."""
+    def write(conn):
+        version = _next_version(conn)
+        conn.executemany(
+            "INSERT OR REPLACE INTO kv (store, key, value, version, writer) VALUES (?, ?, ?, ?, ?)",
+            [(store, key, value, version + i, db.writer) for i, (key, value) in enumerate(rows.items())]
+        )
+    db.write(write)
+
+
+def _import_once(db, store, rows_from_file):
+    """Prima pornire în modul cluster: copiem fișierul vechi, o singură dată pentru toate procesele."""
+    def write(conn):
+        if conn.execute("SELECT 1 FROM kv WHERE store = ? LIMIT 1", (store,)).fetchone():
+            return False
+        rows = rows_from_file()
+        version = _next_version(conn)
+        conn.executemany(
+            "INSERT INTO kv (store, key, value, version, writer) VALUES (?, ?, ?, ?, ?)",
+            [(store, key, value, version + i, db.writer) for i, (key, value) in enumerate(rows.items())]
+        )
+        return True
+    return db.write(write)
+
+
+class SharedStore(storage.WriteBehind):
+    """Înlocuitor pentru JsonStore: aceleași `.data`, `set`, `mark_dirty`, `flush`."""
+
+    def __init__(self, db, path, default=dict, nested=()):
+        super().__init__()
+        self.db = db
+        self.path = path
+        self.default = default
+        self.nested = frozenset(nested)
+        self._listeners = []
+        self._dirty = False
+
+        _import_once(db, path, self._rows_from_file)
+        rows = dict(db.read("SELECT key, value FROM kv WHERE store = ? AND value IS NOT NULL", (path,)))
+        self._written = rows
+        self.data = self._document(rows)
+        db.stores[path] = self
+
+    def _rows_from_file(self):
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, "r", encoding="utf-8") as f:
+            content = f.read()
+        return self._rows(json.loads(content)) if content.strip() else {}
+
+    def _rows(self, data):
+        if not isinstance(data, dict):
+            return {WHOLE_DOCUMENT: _dumps(data)}
+        rows = {}
+        for key, value in data.items():
+            if key in self.nested and isinstance(value, dict):
+                # Rândul cheii rămâne ca marcaj, ca o hartă goală să existe în continuare
+                rows[key] = "{}"
+                for item, item_value in value.items():
+                    rows[f"{key}{NESTED_SEPARATOR}{item}"] = _dumps(item_value)
+            else:
+                rows[key] = _dumps(value)
+        return rows
+
+    def _split(self, key):
+        parent, separator, item = key.partition(NESTED_SEPARATOR)
+        if separator and parent in self.nested:
+            return parent, item
+        return key, None
+
+    def _document(self, rows):
+        if WHOLE_DOCUMENT in rows:
+            return json.loads(rows[WHOLE_DOCUMENT])
+        if not rows:
+            return self.default()
+        data = {}
+        for key, value in rows.items():
+            parent, item = self._split(key)
+            if item is not None:
+                data.setdefault(parent, {})[item] = json.loads(value)
+            elif not (key in self.nested and isinstance(data.get(key), dict)):
+                data[key] = json.loads(value)
+        return data
+
+    def subscribe(self, callback):
+        """callback(cheie, valoare nouă sau None) la fiecare modificare venită din alt proces."""
+        self._listeners.append(callback)
+
+    def apply_remote(self, key, value):
+        if self._dirty and self._local_change(key):
+            # Avem o modificare locală nescrisă pe aceeași cheie; câștigă ultima scriere (a noastră)
+            return
+        parent, item = self._split(key)
+        if key == WHOLE_DOCUMENT:
+            if value is not None:
+                self.data = json.loads(value)
+            elif not isinstance(self.data, dict):
+                self.data = self.default()
+        elif value is None:
+            if isinstance(self.data, dict):
+                target = self.data if item is None else self.data.get(parent)
+                if isinstance(target, dict):
+                    target.pop(key if item is None else item, None)
+        else:
+            if not isinstance(self.data, dict):
+                self.data = {}
+            if item is not None:
+                if not isinstance(self.data.get(parent), dict):
+                    self.data[parent] = {}
+                self.data[parent][item] = json.loads(value)
+            elif not (key in self.nested and value == "{}" and isinstance(self.data.get(key), dict)):
+                self.data[key] = json.loads(value)
+        if value is None:
+            self._written.pop(key, None)
+        else:
+            self._written[key] = value
+        for callback in self._listeners:
+            callback(key, json.loads(value) if value is not None else None)
+
+    def _local_change(self, key):
+        if key == WHOLE_DOCUMENT or not isinstance(self.data, dict):
+            return True
+        parent, item = self._split(key)
+        if parent not in self.data:
+            current = None
+        elif item is not None:
+            entries = self.data[parent]
+            current = _dumps(entries[item]) if isinstance(entries, dict) and item in entries else None
+        elif key in self.nested and isinstance(self.data[key], dict):
+            current = "{}"
+        else:
+            current = _dumps(self.data[key])
+        return current != self._written.get(key)
+
+    def set(self, data):
+        self.data = data
+        self.mark_dirty()
+
+    def mark_dirty(self):
+        self._dirty = True
+        super().mark_dirty()
+
+    def _has_changes(self):
+        return self._dirty
+
+    def _take(self):
+        # Serializăm pe loop (ca JsonStore), dar scriem doar cheile schimbate
+        written = self._written
+        current = self._rows(self.data)
+        # Ștergerile primesc versiunile mai mici, ca cititorii să le aplice înaintea cheilor noi
+        changed = {key: None for key in written if key not in current}
+        changed.update({key: value for key, value in current.items() if written.get(key) != value})
+        self._written = current
+        self._dirty = False
+        return written, changed
+
+    def _write(self, batch):
+        _, changed = batch
+        if changed:
+            _write_rows(self.db, self.path, changed)
+
+    def _restore(self, batch):
+        self._written, _ = batch
+        self._dirty = True
+
+
+class SharedKeyValue(storage.WriteBehind):
+    """Înlocuitor pentru KeyValueLog: un rând per cheie, scris cu întârziere."""
+
+    def __init__(self, db, path):
+        super().__init__()
+        self.db = db
+        self.path = path
+        self._pending = {}
+
+        def rows_from_file():
+            if not os.path.exists(path):
+                return {}
+            return {key: _dumps(value) for key, value in storage.KeyValueLog(path).data.items()}
+
+        _import_once(db, path, rows_from_file)
+        self.data = {key: json.loads(value) for key, value in db.read("SELECT key, value FROM kv WHERE store = ? AND value IS NOT NULL", (path,))}
+        db.stores[path] = self
+
+    def apply_remote(self, key, value):
+        if key in self._pending:
+            return
+        if value is None:
+            self.data.pop(key, None)
+        else:
+            self.data[key] = json.loads(value)
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def set(self, key, value):
+        if value is None:
+            self.data.pop(key, None)
+        else:
+            self.data[key] = value
+        self._pending[key] = None if value is None else _dumps(value)
+        self.mark_dirty()
+
+    def delete(self, key):
+        if key in self.data:
+            self.set(key, None)
+
+    def _has_changes(self):
+        return bool(self._pending)
+
+    def _take(self):
+        pending, self._pending = self._pending, {}
+        return pending
+
+    def _write(self, pending):
+        _write_rows(self.db, self.path, pending)
+
+    def _restore(self, pending):
+        # Scrierea a eșuat; valorile setate între timp sunt mai noi și rămân
+        pending.update(self._pending)
+        self._pending = pending
+
+
+class SharedJournal:
+    """Înlocuitor pentru Journal: aceleași operații, cu id-uri unice în tot clusterul."""
+
+    def __init__(self, db, path, legacy_path=None):
+        self.db = db
+        self.path = path
+        self._listeners = []
+        self._lock = asyncio.Lock()
+
+        def migrate(conn):
+            if conn.execute("SELECT 1 FROM journal WHERE store = ? LIMIT 1", (path,)).fetchone():
+                return
+            if not (os.path.exists(path) or (legacy_path and os.path.exists(legacy_path))):
+                return
+            old = Journal(path, legacy_path=legacy_path)
+            conn.executemany(
+                "INSERT INTO journal (store, id, record, writer) VALUES (?, ?, ?, ?)",
+                ((path, record["id"], _dumps(record), db.writer) for record in old.scan())
+            )
+            old.close()
+
+        db.write(migrate)
+        rows = db.read(
+            "SELECT id, record IS NOT NULL FROM journal WHERE store = ? AND seq IN "
+            "(SELECT max(seq) FROM journal WHERE store = ? GROUP BY id)",
+            (path, path)
+        )
+        self.live = {record_id for record_id, alive in rows if alive}
+        self.last_id = max((record_id for record_id, _ in rows), default=0)
+        db.journals[path] = self
+
+    def __contains__(self, record_id):
+        return record_id in self.live
+
+    def subscribe(self, callback):
+        """callback(înregistrare, ștearsă, seq) pentru adăugările/ștergerile făcute de alte procese.
+
+        Modificările vin în ordinea seq; cine a pornit dintr-un `scan()` le ignoră
+        pe cele cu seq <= snapshot.seq, care sunt deja incluse.
+        """
+        self._listeners.append(callback)
+
+    def apply_remote(self, seq, record_id, record, previous):
+        self.last_id = max(self.last_id, record_id)
+        if record is not None:
+            self.live.add(record_id)
+            for callback in self._listeners:
+                callback(json.loads(record), False, seq)
+        else:
+            self.live.discard(record_id)
+            if previous is not None:
+                for callback in self._listeners:
+                    callback(json.loads(previous), True, seq)
+
+    def next_id(self):
+        # Doar o propunere; append() alege altul dacă alt proces l-a luat între timp
+        self.last_id += 1
+        return self.last_id
+
+    async def get(self, record_id):
+        # Pe thread: lock-ul conexiunii poate fi ținut de un scriitor care așteaptă BEGIN IMMEDIATE
+        rows = await run_io(
+            self.db.read,
+            "SELECT record FROM journal WHERE store = ? AND id = ? ORDER BY seq DESC LIMIT 1",
+            (self.path, record_id)
+        )
+        return json.loads(rows[0][0]) if rows and rows[0][0] is not None else None
+
+    async def append(self, record):
+        """Adaugă înregistrarea și întoarce id-ul final (record["id"] e actualizat)."""
+        def write(conn):
+            taken = conn.execute("SELECT 1 FROM journal WHERE store = ? AND id = ? LIMIT 1", (self.path, record["id"])).fetchone()
+            if taken:
+                record["id"] = conn.execute("SELECT max(id) + 1 FROM journal WHERE store = ?", (self.path,)).fetchone()[0]
+            conn.execute(
+                "INSERT INTO journal (store, id, record, writer) VALUES (?, ?, ?, ?)",
+                (self.path, record["id"], _dumps(record), self.db.writer)
+            )
+            return record["id"]
+
+        async with self._lock:
+            record_id = await run_io(self.db.write, write)
+            self.live.add(record_id)
+            self.last_id = max(self.last_id, record_id)
+        return record_id
+
+    async def remove(self, record_id):
+        async with self._lock:
+            if record_id not in self.live:
+                return False
+            await run_io(self.db.write, lambda conn: conn.execute(
+                "INSERT INTO journal (store, id, record, writer) VALUES (?, ?, NULL, ?)", (self.path, record_id, self.db.writer)
+            ))
+            self.live.discard(record_id)
+        return True
+
+    def scan(self):
+        """Snapshot al intrărilor active, pe o conexiune proprie (poate rula într-un thread).
+
+        `snapshot.seq` se citește în aceeași tranzacție cu înregistrările, deci
+        modificările aduse ulterior de polling cu seq <= snapshot.seq sunt deja incluse.
+        """
+        def iterate():
+            conn = sqlite3.connect(self.db.path, timeout=30, isolation_level=None)
+            try:
+                conn.execute("BEGIN")
+                snapshot.seq = conn.execute("SELECT coalesce(max(seq), 0) FROM journal").fetchone()[0]
+                cursor = conn.execute(
+                    "SELECT record FROM journal WHERE store = ? AND seq IN "
+                    "(SELECT max(seq) FROM journal WHERE store = ? GROUP BY id) AND record IS NOT NULL ORDER BY id",
+                    (self.path, self.path)
+                )
+                for (record,) in cursor:
+                    yield json.loads(record)
+                conn.execute("COMMIT")
+            finally:
+                conn.close()
+
+        snapshot = Snapshot(iterate())
+        return snapshot
+
+    def close(self):
+        pass
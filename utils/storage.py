@@ -0,0 +1,299 @@
+import asyncio
+import json
+import marshal
+import os
+import tempfile
+
+from utils.metrics import background_task, run_io
+
+# Cât așteptăm după ultima modificare înainte să scriem pe disc
+FLUSH_DELAY = 2.0
+# "json" = fișiere locale (un singur proces); "sqlite" = bază comună pentru procesele unui cluster
+BACKEND = os.getenv("STORAGE_BACKEND", "json")
+SHARED_DB = os.getenv("SHARED_DB", "cluster.db")
+# Peste această dimensiune scriem JSON compact: cu indent, json.dumps folosește encoder-ul lent, în Python
+COMPACT_BYTES = 256 * 1024
+
+_stores = {}
+_shared_db = None
+
+
+def shared_db():
+    global _shared_db
+    if _shared_db is None:
+        from utils.shared_store import SharedDatabase
+        _shared_db = SharedDatabase(SHARED_DB)
+    return _shared_db
+
+
+def _atomic_write(path, payload):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=".json", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _dump(snapshot, ensure_ascii):
+    indent = None if len(snapshot) > COMPACT_BYTES else 4
+    return json.dumps(marshal.loads(snapshot), indent=indent, ensure_ascii=ensure_ascii)
+
+
+def _write_snapshot(path, snapshot, ensure_ascii):
+    _atomic_write(path, _dump(snapshot, ensure_ascii))
+
+
+class WriteBehind:
+    """Scriere cu întârziere (debounce), comună tuturor store-urilor.
+
+    Subclasele spun doar ce au de scris și cum: `_has_changes()`, `_take()`
+    (pe loop: ia modificările și le marchează ca scrise), `_write(batch)` (pe
+    thread) și `_restore(batch)` (după o scriere eșuată).
+    """
+
+    def __init__(self):
+        self._flush_task = None
+        self._lock = asyncio.Lock()
+
+    def mark_dirty(self):
+        if self._flush_task is not None and not self._flush_task.done():
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # Fără event loop (scripturi, teste) scriem imediat
+            self.flush_sync()
+            return
+        self._flush_task = background_task(self._delayed_flush())
+
+    async def _delayed_flush(self):
+        # mark_dirty() din timpul scrierii nu pornește alt task (acesta încă rulează), deci reluăm aici
+        while True:
+            await asyncio.sleep(FLUSH_DELAY)
+            await self.flush()
+            if not self._has_changes():
+                return
+
+    async def flush(self):
+        async with self._lock:
+            if not self._has_changes():
+                return
+            batch = self._take()
+            try:
+                await run_io(self._write, batch)
+            except Exception:
+                self._restore(batch)
+                raise
+
+    def flush_sync(self):
+        if not self._has_changes():
+            return
+        batch = self._take()
+        try:
+            self._write(batch)
+        except Exception:
+            self._restore(batch)
+            raise
+
+
+class JsonStore(WriteBehind):
+    """Un fișier JSON ținut în memorie, scris pe disc cu întârziere (write-behind)."""
+
+    def __init__(self, path, default=dict, ensure_ascii=True):
+        super().__init__()
+        self.path = path
+        self.default = default
+        self.ensure_ascii = ensure_ascii
+        self.data = self._read()
+        self._dirty = False
+
+    def _read(self):
+        if not os.path.exists(self.path):
+            return self.default()
+        with open(self.path, "r", encoding="utf-8") as f:
+            content = f.read()
+        if not content.strip():
+            return self.default()
+        return json.loads(content)
+
+    def subscribe(self, callback):
+        # Într-un singur proces nimeni altcineva nu modifică datele; vezi SharedStore
+        pass
+
+    def set(self, data):
+        self.data = data
+        self.mark_dirty()
+
+    def mark_dirty(self):
+        self._dirty = True
+        super().mark_dirty()
+
+    def _has_changes(self):
+        return self._dirty
+
+    def _take(self):
+        # Copia se face pe loop ca să nu concurăm cu modificările; serializarea și scrierea, pe thread.
+        # marshal copiază un document JSON de ~10x mai repede decât îl serializează json.dumps
+        snapshot = marshal.dumps(self.data)
+        self._dirty = False
+        return snapshot
+
+    def _write(self, snapshot):
+        _write_snapshot(self.path, snapshot, self.ensure_ascii)
+
+    def _restore(self, snapshot):
+        self._dirty = True
+
+
+class KeyValueLog(WriteBehind):
+    """Dicționar mare persistat ca log JSONL: fiecare modificare e o linie adăugată la coadă.
+
+    Potrivit pentru mapări cu sute de mii de chei unde rescrierea întregului
+    fișier la fiecare schimbare ar costa prea mult. Logul se compactează
+    când are de câteva ori mai multe linii decât chei.
+    """
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self.data = {}
+        self._lines = 0
+        self._pending = []
+        self._read()
+
+    def _read(self):
+        if not os.path.exists(self.path):
+            return
+        offset = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("linie incompletă")
+                    key, value = json.loads(line)
+                except ValueError:
+                    # Scriere întreruptă de un crash: tăiem coada coruptă
+                    break
+                offset += len(line)
+                self._lines += 1
+                if value is None:
+                    self.data.pop(key, None)
+                else:
+                    self.data[key] = value
+        if offset != os.path.getsize(self.path):
+            os.truncate(self.path, offset)
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def set(self, key, value):
+        if value is None:
+            self.data.pop(key, None)
+        else:
+            self.data[key] = value
+        self._pending.append(json.dumps([key, value], ensure_ascii=False) + "\n")
+        self.mark_dirty()
+
+    def delete(self, key):
+        if key in self.data:
+            self.set(key, None)
+
+    def _needs_compaction(self):
+        return self._lines > 4 * len(self.data) + 1000
+
+    def _has_changes(self):
+        return bool(self._pending)
+
+    def _take(self):
+        lines, line_count, self._pending = self._pending, self._lines, []
+        self._lines += len(lines)
+        if self._needs_compaction():
+            # Snapshot-ul se face pe loop; scrierea lui, pe thread
+            self._lines = len(self.data)
+            payload = "".join(json.dumps([k, v], ensure_ascii=False) + "\n" for k, v in self.data.items())
+            return lines, line_count, True, payload
+        return lines, line_count, False, "".join(lines)
+
+    def _write(self, batch):
+        _, _, rewrite, payload = batch
+        if rewrite:
+            _atomic_write(self.path, payload)
+        else:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _restore(self, batch):
+        # Scrierea a eșuat: liniile revin în fața celor adăugate între timp
+        lines, line_count, _, _ = batch
+        self._pending[:0] = lines
+        self._lines = line_count
+
+
+def open_log(path):
+    store = _stores.get(path)
+    if store is None:
+        if BACKEND == "sqlite":
+            from utils.shared_store import SharedKeyValue
+            store = SharedKeyValue(shared_db(), path)
+        else:
+            store = KeyValueLog(path)
+        _stores[path] = store
+    return store
+
+
+def open_store(path, default=dict, ensure_ascii=True, nested=()):
+    """`nested`: chei ale căror hărți se salvează în cluster un rând per intrare (ignorat pentru JSON)."""
+    store = _stores.get(path)
+    if store is None:
+        if BACKEND == "sqlite":
+            from utils.shared_store import SharedStore
+            store = SharedStore(shared_db(), path, default=default, nested=nested)
+        else:
+            store = JsonStore(path, default=default, ensure_ascii=ensure_ascii)
+        _stores[path] = store
+    return store
+
+
+def open_journal(path, legacy_path=None):
+    if BACKEND == "sqlite":
+        from utils.shared_store import SharedJournal
+        return SharedJournal(shared_db(), path, legacy_path=legacy_path)
+    from utils.journal import Journal
+    return Journal(path, legacy_path=legacy_path)
+
+
+def start_sync():
+    """Pornește aducerea modificărilor făcute de celelalte procese (doar pentru backend-ul sqlite)."""
+    if _shared_db is not None:
+        _shared_db.start()
+
+
+async def flush_all():
+    if _shared_db is not None:
+        _shared_db.stop()
+    for store in list(_stores.values()):
+        if store._flush_task is not None and not store._flush_task.done():
+            store._flush_task.cancel()
+        try:
+            await store.flush()
+        except Exception as e:
+            print(f"[Storage Error] {store.path}: {e}")
+
+
+def flush_all_sync():
+    for store in list(_stores.values()):
+        try:
+            store.flush_sync()
+        except Exception as e:
+            print(f"[Storage Error] {store.path}: {e}")
@@ -0,0 +1,70 @@
+import asyncio
+from collections import defaultdict
+
+
+class TicketRegistry:
+    """Ticketele deschise, indexate după autor și după canal.
+
+    `store.data` rămâne sursa persistată ({user_id: {channel_id, guild_id, opened_at}});
+    indexul după canal e doar în memorie și se reconstruiește la pornire.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.by_channel = {}
+        self.channel_of = {}
+        for user_id, info in store.data.items():
+            self._index(user_id, info)
+        # Un lock per utilizator: două click-uri simultane nu creează două canale
+        self.locks = defaultdict(asyncio.Lock)
+        store.subscribe(self._on_remote_change)
+
+    def _index(self, user_id, info):
+        self.by_channel[int(info["channel_id"])] = user_id
+        self.channel_of[user_id] = int(info["channel_id"])
+
+    def _unindex(self, user_id):
+        channel_id = self.channel_of.pop(user_id, None)
+        if channel_id is not None:
+            self.by_channel.pop(channel_id, None)
+
+    def _on_remote_change(self, user_id, info):
+        # Ticket deschis/închis de alt proces din cluster; store-ul e deja actualizat
+        self._unindex(user_id)
+        if info is not None:
+            self._index(user_id, info)
+
+    def __len__(self):
+        return len(self.store.data)
+
+    def lock(self, user_id):
+        return self.locks[str(user_id)]
+
+    def get_by_user(self, user_id):
+        return self.store.data.get(str(user_id))
+
+    def get_by_channel(self, channel_id):
+        user_id = self.by_channel.get(channel_id)
+        if user_id is None:
+            return None
+        return user_id, self.store.data[user_id]
+
+    def open(self, user_id, info):
+        user_id = str(user_id)
+        self.close_user(user_id)
+        self.store.data[user_id] = info
+        self._index(user_id, info)
+        self.store.mark_dirty()
+
+    def close_user(self, user_id):
+        info = self.store.data.pop(str(user_id), None)
+        if info is not None:
+            self._unindex(str(user_id))
+            self.store.mark_dirty()
+        return info
+
+    def close_channel(self, channel_id):
+        user_id = self.by_channel.get(channel_id)
+        if user_id is None:
+            return None
+        return user_id, self.close_user(user_id)
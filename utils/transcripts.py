@@ -0,0 +1,87 @@
+import gzip
+import html
+import json
+from contextlib import nullcontext
+
+from utils.metrics import run_io
+
+# Câte mesaje adunăm înainte de o scriere (pe thread) în fișiere
+WRITE_BATCH = 200
+
+HTML_HEAD = """<!DOCTYPE html>
+<html lang="ro">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body {{ font-family: sans-serif; background: #313338; color: #dbdee1; }}
+.msg {{ margin: 6px 0; }}
+.author {{ font-weight: bold; color: #fff; }}
+.time {{ color: #949ba4; font-size: 0.8em; margin-left: 6px; }}
+.content {{ white-space: pre-wrap; }}
+a {{ color: #00a8fc; }}
+</style>
+</head>
+<body>
+<h2>{title}</h2>
+"""
+HTML_TAIL = "</body>\n</html>\n"
+
+
+def message_record(message):
+    """Ce păstrăm dintr-un mesaj; atașamentele rămân doar ca link, nu se descarcă."""
+    return {
+        "id": message.id,
+        "author_id": message.author.id,
+        "author": str(message.author),
+        "created_at": message.created_at.isoformat(),
+        "content": message.content,
+        "attachments": [{"filename": a.filename, "url": a.url, "size": a.size} for a in message.attachments],
+        "embeds": len(message.embeds),
+    }
+
+
+def html_row(record):
+    parts = [
+        f'<div class="msg"><span class="author">{html.escape(record["author"])}</span>',
+        f'<span class="time">{record["created_at"][:19].replace("T", " ")}</span>',
+        f'<div class="content">{html.escape(record["content"])}</div>',
+    ]
+    for attachment in record["attachments"]:
+        parts.append(f'<div><a href="{html.escape(attachment["url"])}">{html.escape(attachment["filename"])}</a></div>')
+    parts.append("</div>\n")
+    return "".join(parts)
+
+
+def _write_batch(jsonl, page, lines, rows):
+    jsonl.write("".join(lines))
+    if page is not None:
+        page.write("".join(rows))
+
+
+async def export_transcript(messages, jsonl_path, html_path=None, title="Transcript"):
+    """Scrie mesajele (un async iterator, ex. channel.history) în JSONL gzip și opțional HTML.
+
+    Mesajele sunt consumate pe măsură ce vin, în loturi de WRITE_BATCH, deci
+    memoria nu crește cu lungimea ticketului. Întoarce numărul de mesaje.
+    """
+    count = 0
+    with gzip.open(jsonl_path, "wt", compresslevel=6, encoding="utf-8") as jsonl, \
+            (open(html_path, "w", encoding="utf-8") if html_path else nullcontext()) as page:
+        if page is not None:
+            page.write(HTML_HEAD.format(title=html.escape(title)))
+        lines, rows = [], []
+        async for message in messages:
+            record = message_record(message)
+            lines.append(json.dumps(record, ensure_ascii=False) + "\n")
+            if page is not None:
+                rows.append(html_row(record))
+            count += 1
+            if len(lines) >= WRITE_BATCH:
+                await run_io(_write_batch, jsonl, page, lines, rows)
+                lines, rows = [], []
+        if lines:
+            await run_io(_write_batch, jsonl, page, lines, rows)
+        if page is not None:
+            page.write(HTML_TAIL)
+    return count
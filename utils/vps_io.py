@@ -0,0 +1,110 @@
+import csv
+import ipaddress
+import json
+from datetime import date
+
+FIELDS = ("vps_number", "user_id", "expiration", "added_by", "ip")
+BATCH_SIZE = 1000
+# Câte erori păstrăm ca exemplu în raport; restul sunt doar numărate
+MAX_ERROR_SAMPLES = 10
+
+
+def new_report():
+    return {"imported": 0, "errors": 0, "error_samples": [], "duplicates": 0}
+
+
+def _reject(report, line_number, reason):
+    report["errors"] += 1
+    if len(report["error_samples"]) < MAX_ERROR_SAMPLES:
+        report["error_samples"].append((line_number, reason))
+
+
+def detect_format(filename):
+    return "jsonl" if filename.lower().endswith((".jsonl", ".ndjson")) else "csv"
+
+
+def iter_rows(f, fmt):
+    """(număr linie, dict) pentru fiecare rând din fișier, citit linie cu linie."""
+    if fmt == "jsonl":
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield line_number, row if isinstance(row, dict) else None
+    else:
+        reader = csv.DictReader(f)
+        for row in reader:
+            yield reader.line_num, row
+
+
+def validate(rows, default_added_by, report):
+    for line_number, row in rows:
+        if row is None:
+            _reject(report, line_number, "rând invalid")
+            continue
+        user_id = str(row.get("user_id") or "").strip().strip("<@!>")
+        ip = str(row.get("ip") or "").strip()
+        expiration = str(row.get("expiration") or "").strip()
+        added_by = str(row.get("added_by") or "").strip() or default_added_by
+
+        if not user_id.isdigit():
+            _reject(report, line_number, "user_id invalid")
+            continue
+        try:
+            expiration = str(date.fromisoformat(expiration))
+        except ValueError:
+            _reject(report, line_number, "dată invalidă")
+            continue
+        try:
+            ip = str(ipaddress.ip_address(ip))
+        except ValueError:
+            _reject(report, line_number, "IP invalid")
+            continue
+        yield {"user_id": user_id, "expiration": expiration, "added_by": added_by, "ip": ip}
+
+
+def dedupe_batches(records, known_ips, report, size=BATCH_SIZE):
+    """Loturi fără IP-uri duplicate.
+
+    `seen` ține doar IP-urile lotului curent: când consumatorul cere lotul următor,
+    cel anterior e deja salvat, deci IP-urile lui se găsesc în known_ips.
+    """
+    seen = set()
+    batch = []
+    for record in records:
+        ip = record["ip"]
+        if ip in seen or ip in known_ips:
+            report["duplicates"] += 1
+            continue
+        seen.add(ip)
+        batch.append(record)
+        if len(batch) == size:
+            yield batch
+            batch = []
+            seen.clear()
+    if batch:
+        yield batch
+
+
+def import_batches(f, fmt, default_added_by, known_ips, report):
+    """Pipeline-ul de import: citire -> validare -> deduplicare pe IP, în loturi.
+
+    known_ips trebuie să conțină IP-urile fiecărui lot înainte de cererea lotului următor
+    (vpsimport le adaugă în inventar, deci în inventory.by_ip).
+    """
+    rows = iter_rows(f, fmt)
+    records = validate(rows, default_added_by, report)
+    return dedupe_batches(records, known_ips, report)
+
+
+def write_export(entries, f, fmt):
+    if fmt == "jsonl":
+        for entry in entries:
+            f.write(json.dumps({field: entry.get(field) for field in FIELDS}, ensure_ascii=False) + "\n")
+    else:
+        writer = csv.DictWriter(f, fieldnames=FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(entries)
@@ -0,0 +1,135 @@
+"""Watchdog pentru bucla asyncio: măsoară lag-ul continuu și prinde stiva celui care o blochează.
+
+Un task pe buclă bate la fiecare TICK_INTERVAL. Un thread separat verifică bătăile.
+Dacă bucla nu a mai bătut de LAG_THRESHOLD secunde, callback-ul vinovat încă rulează,
+așa că thread-ul îi citește stiva din `sys._current_frames()`. Când bucla își revine,
+incidentul (lag + stivă) se scrie în jurnalul rotativ și se trimite mai departe.
+"""
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+from utils.metrics import registry, run_io
+
+LAG_THRESHOLD = float(os.getenv("LOOP_LAG_THRESHOLD", "0.5"))
+TICK_INTERVAL = 0.1
+LOG_PATH = os.getenv("WATCHDOG_LOG", "watchdog.log")
+LOG_MAX_BYTES = 1024 * 1024
+LOG_BACKUPS = 3
+STACK_LIMIT = 30
+
+
+def _stack_of(thread_id):
+    frame = sys._current_frames().get(thread_id)
+    if frame is None:
+        return []
+    return traceback.format_stack(frame, limit=STACK_LIMIT)
+
+
+def _where(stack):
+    # Ultimul cadru din codul nostru, nu din asyncio/discord
+    for entry in reversed(stack):
+        location = entry.strip().splitlines()[0]
+        if "site-packages" not in location and "/asyncio/" not in location:
+            return location
+    return stack[-1].strip().splitlines()[0] if stack else "necunoscut"
+
+
+def _open_log(path):
+    logger = logging.getLogger("watchdog")
+    logger.propagate = False
+    if not logger.handlers:
+        handler = RotatingFileHandler(path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+    return logger
+
+
+class LoopWatchdog:
+    """Pornit cu `start(report)`; `report(incident)` e o corutină apelată pentru fiecare blocaj."""
+
+    def __init__(self, threshold=LAG_THRESHOLD, interval=TICK_INTERVAL, log_path=LOG_PATH):
+        self.threshold = threshold
+        self.interval = interval
+        self.log_path = log_path
+        self.last_beat = time.perf_counter()
+        self.stalls = 0
+        # (bătaia după care a apărut blocajul, stiva)
+        self._stack = None
+        self._stack_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._task = None
+        self._incidents = set()
+        self._thread = None
+
+    def start(self, report=None):
+        self.report = report
+        self.logger = _open_log(self.log_path)
+        self.loop_thread = threading.get_ident()
+        self.last_beat = time.perf_counter()
+        self._task = asyncio.get_running_loop().create_task(self._tick())
+        self._thread = threading.Thread(target=self._sample, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _tick(self):
+        while True:
+            beat = self.last_beat = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - beat - self.interval)
+            registry.observe("bot_loop_lag_seconds", (), lag)
+            if lag >= self.threshold:
+                # Bătaia merge mai departe cât timp incidentul se scrie; stiva e luată acum, ca
+                # thread-ul să nu o mai poată suprascrie cu bucla liberă
+                self.last_beat = time.perf_counter()
+                with self._stack_lock:
+                    captured, self._stack = self._stack, None
+                stack = captured[1] if captured is not None and captured[0] == beat else []
+                task = asyncio.get_running_loop().create_task(self._incident(lag, stack))
+                self._incidents.add(task)
+                task.add_done_callback(self._incidents.discard)
+
+    def _sample(self):
+        # Rulează pe thread propriu, deci vede bucla și când aceasta e blocată
+        period = self.threshold / 4
+        while not self._stopped.wait(period):
+            beat = self.last_beat
+            stalled = time.perf_counter() - beat - self.interval
+            if stalled < self.threshold:
+                continue
+            with self._stack_lock:
+                # O singură captură per blocaj: prima e cea din callback-ul care a depășit pragul.
+                # O captură rămasă de la o bătaie mai veche e înlocuită
+                if self._stack is None or self._stack[0] != beat:
+                    self._stack = (beat, _stack_of(self.loop_thread))
+
+    async def _incident(self, lag, stack):
+        self.stalls += 1
+        registry.increment("bot_loop_stalls_total", ())
+        incident = {
+            "at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "lag": lag,
+            "where": _where(stack),
+            "stack": stack,
+        }
+        entry = f"{incident['at']} lag {lag * 1000:.0f} ms — {incident['where']}\n" + "".join(stack)
+        try:
+            await run_io(self.logger.info, entry)
+        except Exception as e:
+            print(f"❌ Watchdog log error: {e}")
+        if self.report is not None:
+            try:
+                await self.report(incident)
+            except Exception as e:
+                print(f"❌ Watchdog report error: {e}")